@@ -1,61 +1,84 @@
+import logging
+import time
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_wtf import CSRFProtect
-from werkzeug.security import generate_password_hash
 
 # Initialize extensions (without app yet)
 db = SQLAlchemy()
 login_manager = LoginManager()
 csrf = CSRFProtect()
 
-# Import models here to avoid circular import issues
-from app.models import User
-
-def create_admin_user():
-    admin_email = "contact@multticonstruction.com"
-    admin_password = "Africa19!"
-
-    user = User.query.filter_by(email=admin_email).first()
-
-    if user:
-        if user.role != "admin":
-            user.role = "admin"
-            db.session.commit()
-            print("🔁 Existing user promoted to admin.")
-        else:
-            print("ℹ️ Admin user already exists.")
-    else:
-        admin = User(
-            full_name="Admin",
-            address="Admin Address",
-            phone="0000000000",
-            email=admin_email,
-            password=generate_password_hash(admin_password),
-            role="admin"
-        )
-        db.session.add(admin)
-        db.session.commit()
-        print("✅ Admin user created.")
+logger = logging.getLogger(__name__)
+
 
 def create_app():
+    # Schema creation and admin seeding are one-shot CLI commands
+    # (`flask init-db`, `flask seed-admin`), not per-worker boot work.
+    timings = {}
+    started = phase_start = time.perf_counter()
+
+    def mark(phase):
+        nonlocal phase_start
+        now = time.perf_counter()
+        timings[phase] = now - phase_start
+        phase_start = now
+
     app = Flask(__name__)
 
     # ✅ Load configuration
     app.config.from_object("config.Config")
+    logging.basicConfig(level=app.config['LOG_LEVEL'],  # no-op if the server configured logging
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    mark('config')
+
+    # ✅ Initialize extensions with app (imported here, not at package import)
+    from app import models  # registers the models and the user_loader
+    from app import database, instrumentation, storage, assets, templating, thumbnails, jobs, identity, search, bulk, catalog, cli
+    from app import estimates  # registers the PDF job handler
+    from app.cache import cache
+    mark('imports')
 
-    # ✅ Initialize extensions with app
+    database.configure(app)  # engine options must be in place before db.init_app
     db.init_app(app)
+    database.init_app(app)
     login_manager.init_app(app)
+
+    # ✅ Instrumentation first, so its hooks time everything registered after it
+    instrumentation.init_app(app)
+
+    # ✅ Per-route upload limits must be applied before CSRF reads the body
+    storage.init_app(app)
+    cache.init_app(app)
+    assets.init_app(app)
+    templating.init_app(app)
+    identity.init_app(app)
+    thumbnails.init_app(app)
+    jobs.init_app(app)
+    search.init_app(app)
+    bulk.init_app(app)
+    catalog.init_app(app)
+    cli.init_app(app)
+
     csrf.init_app(app)  # ✅ moved here, after app is created
+    mark('extensions')
 
     # ✅ Register blueprints
     from app.routes import bp as main_bp
+    from app.api import bp as api_bp
     app.register_blueprint(main_bp)
+    app.register_blueprint(api_bp)
+    mark('blueprints')
+
+    # ✅ Compile every template now (before fork under gunicorn's preload_app)
+    if app.config['TEMPLATES_PRELOAD']:
+        templating.preload_templates(app)
+        mark('templates')
 
-    # ✅ Create DB tables + ensure admin
-    with app.app_context():
-        db.create_all()
-        create_admin_user()
+    timings['total'] = time.perf_counter() - started
+    app.extensions['startup_timings'] = timings
+    logger.info("App created in %.1f ms", timings['total'] * 1000)
 
     return app
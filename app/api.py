@@ -0,0 +1,298 @@
+import hashlib
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_login import current_user
+from sqlalchemy import func, select
+from werkzeug.exceptions import HTTPException
+
+from app import db
+from app.assets import versioned_url
+from app.models import EstimateRequest, Project, ProjectMessage, ProjectUpload, User
+from app.pagination import keyset_page
+
+# -------------------
+# JSON API (v1)
+# -------------------
+# Read-only JSON for the crew/mobile apps: estimates, projects and each
+# project's messages and uploads, with ?fields= selection (only those columns
+# are queried) and the same keyset cursors as the dashboards (?cursor=).
+#
+# Every response carries a strong ETag computed from one aggregate query
+# (row count + newest updated_at/id for the filtered set, plus the newest
+# users.updated_at when customer_* fields are selected). A request whose
+# If-None-Match matches gets 304 before any row is fetched or serialized,
+# so polling an unchanged list costs a single indexed aggregate.
+# Auth is the normal login session; customers only see their own records.
+
+bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+
+class Resource:
+    def __init__(self, model, timestamp, version, fields, default_fields):
+        self.model = model
+        self.timestamp = timestamp    # newest-first ordering / cursor column
+        self.version = version        # column whose max() changes on every write
+        self.fields = fields          # name -> (column, formatter or None)
+        self.default_fields = default_fields
+
+    def select_fields(self, raw):
+        names = [name.strip() for name in raw.split(',') if name.strip()] if raw else self.default_fields
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            return None, unknown
+        return list(dict.fromkeys(names)), []
+
+    def query(self, names):
+        columns = [self.fields[name][0].label(name) for name in names]
+        # id and timestamp are always fetched for the cursor
+        for column in (self.model.id, self.timestamp):
+            if column.key not in names:
+                columns.append(column.label(column.key))
+        return self.join_users(db.session.query(*columns).select_from(self.model), names)
+
+    def uses_users(self, names):
+        return any(self.fields[name][0].table is User.__table__ for name in names)
+
+    def join_users(self, query, names):
+        if self.uses_users(names):
+            query = query.outerjoin(User, User.id == self.model.customer_id)
+        return query
+
+    def version_columns(self, names):
+        # Customer fields come from the joined users row: its edits must
+        # change the ETag too
+        if self.uses_users(names):
+            return [self.version, User.updated_at]
+        return [self.version]
+
+    def serialize(self, row, names):
+        item = {}
+        for name in names:
+            value = getattr(row, name)
+            formatter = self.fields[name][1]
+            item[name] = formatter(value) if formatter and value is not None else _plain(value)
+        return item
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _static_url(folder):
+    return lambda key: versioned_url(f"{folder}/{key}", _external=True)
+
+
+RESOURCES = {
+    'estimates': Resource(
+        EstimateRequest, EstimateRequest.timestamp, EstimateRequest.updated_at,
+        {
+            'id': (EstimateRequest.id, None),
+            'estimate_number': (EstimateRequest.estimate_number, None),
+            'customer_id': (EstimateRequest.customer_id, None),
+            'customer_name': (User.full_name, None),
+            'project_type': (EstimateRequest.project_type, None),
+            'services': (EstimateRequest.services, lambda raw: [s for s in raw.split(',') if s]),
+            'total_sqft': (EstimateRequest.total_sqft, None),
+            'details': (EstimateRequest.details, None),
+            'status': (EstimateRequest.status, None),
+            'estimate_pdf_url': (EstimateRequest.estimate_pdf, _static_url('estimates')),
+            'created_at': (EstimateRequest.timestamp, None),
+            'updated_at': (EstimateRequest.updated_at, None),
+        },
+        ['id', 'estimate_number', 'customer_name', 'project_type', 'status', 'created_at', 'updated_at'],
+    ),
+    'projects': Resource(
+        Project, Project.created_at, Project.updated_at,
+        {
+            'id': (Project.id, None),
+            'project_number': (Project.project_number, None),
+            'customer_id': (Project.customer_id, None),
+            'customer_name': (User.full_name, None),
+            'customer_address': (User.address, None),
+            'customer_phone': (User.phone, None),
+            'project_type': (Project.project_type, None),
+            'services': (Project.services, lambda raw: [s for s in raw.split(',') if s]),
+            'total_sqft': (Project.total_sqft, None),
+            'details': (Project.details, None),
+            'status': (Project.status, None),
+            'schedule': (Project.schedule_data, None),
+            'sketch_url': (Project.sketch_filename, _static_url('uploads')),
+            'created_at': (Project.created_at, None),
+            'updated_at': (Project.updated_at, None),
+        },
+        ['id', 'project_number', 'customer_name', 'project_type', 'status', 'schedule', 'created_at', 'updated_at'],
+    ),
+    # Messages and uploads are append-only: count + max(id) version them
+    'messages': Resource(
+        ProjectMessage, ProjectMessage.timestamp, ProjectMessage.id,
+        {
+            'id': (ProjectMessage.id, None),
+            'project_id': (ProjectMessage.project_id, None),
+            'sender': (ProjectMessage.sender, None),
+            'content': (ProjectMessage.content, None),
+            'timestamp': (ProjectMessage.timestamp, None),
+        },
+        ['id', 'sender', 'content', 'timestamp'],
+    ),
+    'uploads': Resource(
+        ProjectUpload, ProjectUpload.timestamp, ProjectUpload.id,
+        {
+            'id': (ProjectUpload.id, None),
+            'project_id': (ProjectUpload.project_id, None),
+            'filename': (ProjectUpload.filename, None),
+            'url': (ProjectUpload.filename, _static_url('project_uploads')),
+            'timestamp': (ProjectUpload.timestamp, None),
+        },
+        ['id', 'filename', 'url', 'timestamp'],
+    ),
+}
+
+
+# ---- helpers ----
+
+def error(status, message):
+    response = jsonify({'error': message})
+    response.status_code = status
+    return response
+
+
+@bp.errorhandler(HTTPException)
+def http_error(exc):
+    return error(exc.code, exc.description)
+
+
+@bp.app_errorhandler(404)
+@bp.app_errorhandler(405)
+def unrouted_error(exc):
+    # Unknown URLs never reach the blueprint's own handler
+    if request.path.startswith(bp.url_prefix + '/'):
+        return error(exc.code, exc.description)
+    return exc
+
+
+@bp.before_request
+def require_login():
+    if not current_user.is_authenticated:
+        return error(401, "Authentication required.")
+
+
+def _etag(*parts):
+    return hashlib.sha1('|'.join(map(str, parts)).encode()).hexdigest()
+
+
+def _not_modified(etag):
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return None
+
+
+def _respond(payload, etag):
+    response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'  # always revalidate, cheaply
+    return response
+
+
+def _scoped(model, filters):
+    if current_user.role != 'admin':
+        filters.append(model.customer_id == current_user.id)
+    return filters
+
+
+def _list(name, filters):
+    resource = RESOURCES[name]
+    names, unknown = resource.select_fields(request.args.get('fields'))
+    if unknown:
+        return error(400, f"Unknown field(s): {', '.join(unknown)}")
+    limit = min(max(request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int), 1),
+                current_app.config['API_MAX_PAGE_SIZE'])
+    cursor = request.args.get('cursor')
+
+    aggregate = select(func.count(resource.model.id), *map(func.max, resource.version_columns(names)))
+    count, *versions = db.session.execute(
+        resource.join_users(aggregate.select_from(resource.model), names).where(*filters)
+    ).one()
+    etag = _etag(name, current_user.id, count, *versions, ','.join(names), cursor, limit, request.args.get('status'))
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
+    rows, next_cursor = keyset_page(resource.query(names).filter(*filters),
+                                    resource.timestamp, resource.model.id, cursor=cursor, per_page=limit)
+    return _respond({
+        'data': [resource.serialize(row, names) for row in rows],
+        'next_cursor': next_cursor,
+    }, etag)
+
+
+def _detail(name, record_id, filters):
+    resource = RESOURCES[name]
+    names, unknown = resource.select_fields(request.args.get('fields'))
+    if unknown:
+        return error(400, f"Unknown field(s): {', '.join(unknown)}")
+
+    versions = db.session.execute(
+        resource.join_users(select(*resource.version_columns(names)).select_from(resource.model), names)
+        .where(resource.model.id == record_id, *filters)
+    ).first()
+    if versions is None:
+        return error(404, f"{name[:-1].capitalize()} not found.")
+    etag = _etag(name, record_id, *versions, ','.join(names))
+    cached = _not_modified(etag)
+    if cached is not None:
+        return cached
+
+    row = resource.query(names).filter(resource.model.id == record_id).one()
+    return _respond({'data': resource.serialize(row, names)}, etag)
+
+
+def _can_see_project(project_id):
+    # Other customers' projects answer like missing ones: ids are not revealed
+    owner = db.session.execute(select(Project.customer_id).where(Project.id == project_id)).first()
+    return owner is not None and (current_user.role == 'admin' or owner[0] == current_user.id)
+
+
+# ---- endpoints ----
+
+@bp.route('/estimates')
+def list_estimates():
+    filters = _scoped(EstimateRequest, [])
+    if request.args.get('status'):
+        filters.append(EstimateRequest.status == request.args['status'])
+    return _list('estimates', filters)
+
+
+@bp.route('/estimates/<int:estimate_id>')
+def get_estimate(estimate_id):
+    return _detail('estimates', estimate_id, _scoped(EstimateRequest, []))
+
+
+@bp.route('/projects')
+def list_projects():
+    filters = _scoped(Project, [])
+    if request.args.get('status'):
+        filters.append(Project.status == request.args['status'])
+    return _list('projects', filters)
+
+
+@bp.route('/projects/<int:project_id>')
+def get_project(project_id):
+    return _detail('projects', project_id, _scoped(Project, []))
+
+
+@bp.route('/projects/<int:project_id>/messages')
+def list_project_messages(project_id):
+    if not _can_see_project(project_id):
+        return error(404, "Project not found.")
+    return _list('messages', [ProjectMessage.project_id == project_id])
+
+
+@bp.route('/projects/<int:project_id>/uploads')
+def list_project_uploads(project_id):
+    if not _can_see_project(project_id):
+        return error(404, "Project not found.")
+    return _list('uploads', [ProjectUpload.project_id == project_id])
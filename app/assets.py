@@ -0,0 +1,236 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import urllib.request
+
+import click
+from flask import abort, current_app, redirect, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from app.storage import KINDS as STORAGE_KINDS
+
+# -------------------
+# Static asset delivery
+# -------------------
+# Templates link files under app/static with versioned_url(), which puts a
+# hash of the file's content in the path (/assets/<digest>/<filename>).
+# Those URLs never change meaning, so they are served with a one-year
+# `immutable` Cache-Control and browsers/CDNs never revalidate them; a new
+# file version simply gets a new URL. Digests are cached per process and
+# recomputed only when a file's mtime or size changes. Uploads already live
+# under their content digest (see storage.py), so their URLs reuse it
+# without reading the file.
+#
+# Text assets are sent from precompressed .br/.gz siblings built by
+# `flask assets build` (nothing is compressed per request), Range requests
+# get 206 partial responses (large PDFs), and with ASSETS_SENDFILE the file
+# body is handed off to Apache (X-Sendfile) or nginx (X-Accel-Redirect).
+
+DIGEST_LENGTH = 12
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.map', '.txt')
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # preferred first
+UPLOAD_FOLDERS = STORAGE_KINDS + ('derivatives',)  # never compressed
+
+# Third-party files copied into static/ by `flask assets vendor`; until they
+# are, base.html falls back to the CDN copy
+BOOTSTRAP_VERSION = '5.3.0'
+VENDOR_FILES = {
+    f'vendor/bootstrap-{BOOTSTRAP_VERSION}/bootstrap.min.css':
+        f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/css/bootstrap.min.css',
+    f'vendor/bootstrap-{BOOTSTRAP_VERSION}/bootstrap.bundle.min.js':
+        f'https://cdn.jsdelivr.net/npm/bootstrap@{BOOTSTRAP_VERSION}/dist/js/bootstrap.bundle.min.js',
+}
+
+_digests = {}  # filename -> (mtime_ns, size, digest)
+
+
+def static_path(filename):
+    return safe_join(current_app.static_folder, filename)
+
+
+def _upload_digest(filename):
+    # "<kind>/<sha256 prefix>/<name>" keys are content-addressed already
+    parts = filename.split('/')
+    if len(parts) == 3 and parts[0] in STORAGE_KINDS and len(parts[1]) >= DIGEST_LENGTH:
+        return parts[1][:DIGEST_LENGTH]
+    return None
+
+
+def file_digest(filename):
+    """Content digest of a static file, or None when it doesn't exist."""
+    digest = _upload_digest(filename)
+    if digest:
+        return digest
+    path = static_path(filename)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        return None
+    if stat is None:
+        return None
+    cached = _digests.get(filename)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(64 * 1024):
+            sha256.update(chunk)
+    digest = sha256.hexdigest()[:DIGEST_LENGTH]
+    _digests[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+    return digest
+
+
+def versioned_url(filename, fallback=None, _external=False):
+    """Fingerprinted URL for a file under static/ (``fallback`` if it's missing)."""
+    digest = file_digest(filename)
+    if digest is None:
+        return fallback or url_for('static', filename=filename, _external=_external)
+    return url_for('versioned_static', digest=digest, filename=filename, _external=_external)
+
+
+# ---- serving ----
+
+def _encoded_variant(path):
+    # Whole-file responses only: byte ranges refer to the uncompressed file
+    if request.range or not path.endswith(COMPRESSIBLE):
+        return path, None
+    for encoding, suffix in ENCODINGS:
+        if encoding in request.accept_encodings and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def send_asset(filename, max_age=None, immutable=False):
+    path = static_path(filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    body_path, encoding = _encoded_variant(path)
+
+    if current_app.config['ASSETS_SENDFILE'] == 'x-accel-redirect':
+        # nginx reads the file itself (and handles ranges and conditionals)
+        response = current_app.response_class(mimetype=mimetype)
+        relative = os.path.relpath(body_path, current_app.static_folder).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = f"{current_app.config['ASSETS_ACCEL_PREFIX']}/{relative}"
+        if max_age is not None:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+    else:
+        # conditional=True: ETag/Last-Modified 304s and Range -> 206
+        response = send_file(body_path, mimetype=mimetype, conditional=True, max_age=max_age)
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if path.endswith(COMPRESSIBLE):
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+def serve_versioned(digest, filename):
+    current = file_digest(filename)
+    if current is None:
+        abort(404)
+    if digest != current:
+        # Link rendered before the file changed: point at the current version
+        response = redirect(versioned_url(filename))
+        response.cache_control.no_cache = True
+        return response
+    return send_asset(filename, max_age=current_app.config['ASSETS_MAX_AGE'], immutable=True)
+
+
+# -------------------
+# CLI
+# -------------------
+
+def compress_file(path):
+    """Write .gz (and .br when brotli is installed) next to ``path`` if stale."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None  # gzip only
+
+    written = []
+    source_mtime = os.path.getmtime(path)
+    for encoding, suffix in ENCODINGS:
+        target = path + suffix
+        if encoding == 'br' and brotli is None:
+            continue
+        if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        packed = brotli.compress(data, quality=11) if encoding == 'br' else gzip.compress(data, 9, mtime=0)
+        if len(packed) >= len(data):
+            continue  # not worth sending
+        tmp_path = f"{target}.tmp"
+        with open(tmp_path, 'wb') as out:
+            out.write(packed)
+        os.replace(tmp_path, target)
+        written.append(target)
+    return written
+
+
+def compress_static(root):
+    written = []
+    for folder, dirs, files in os.walk(root):
+        if folder == root:
+            dirs[:] = [d for d in dirs if d not in UPLOAD_FOLDERS]
+        for name in files:
+            if name.endswith(COMPRESSIBLE):
+                written += compress_file(os.path.join(folder, name))
+    return written
+
+
+def vendor_files(root):
+    fetched = []
+    for filename, source in VENDOR_FILES.items():
+        target = os.path.join(root, filename)
+        if os.path.exists(target):
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.tmp"
+        with urllib.request.urlopen(source, timeout=30) as response, open(tmp_path, 'wb') as out:
+            shutil.copyfileobj(response, out)
+        os.replace(tmp_path, target)
+        fetched.append(target)
+    return fetched
+
+
+@click.group('assets')
+def assets_cli():
+    """Vendored and precompressed static assets."""
+
+
+@assets_cli.command('vendor')
+def vendor_command():
+    """Download the third-party CSS/JS into app/static/vendor."""
+    for path in vendor_files(current_app.static_folder):
+        click.echo(f"✅ Fetched {os.path.relpath(path, current_app.static_folder)}")
+
+
+@assets_cli.command('compress')
+def compress_command():
+    """Write .gz/.br variants of the text assets (uploads are skipped)."""
+    written = compress_static(current_app.static_folder)
+    click.echo(f"✅ Wrote {len(written)} compressed file(s).")
+
+
+@assets_cli.command('build')
+@click.pass_context
+def build_command(ctx):
+    """vendor + compress; run once per deploy."""
+    ctx.invoke(vendor_command)
+    ctx.invoke(compress_command)
+
+
+def init_app(app):
+    if app.config['ASSETS_SENDFILE'] == 'x-sendfile':
+        app.config['USE_X_SENDFILE'] = True  # send_file() then only sets the header
+    app.add_url_rule('/assets/<digest>/<path:filename>', 'versioned_static', serve_versioned)
+    app.add_template_global(versioned_url)
+    app.cli.add_command(assets_cli)
@@ -0,0 +1,147 @@
+from datetime import date, timedelta
+
+from sqlalchemy import delete, insert, select, update
+
+from app import db
+from app.models import (
+    Project, ProjectMessage, ProjectUpload, ProjectService, ScheduleSlot, Service, ProjectStatus
+)
+
+# -------------------
+# Batch project actions
+# -------------------
+# Each action runs a few set-based statements over the selected ids (UPDATE /
+# DELETE ... WHERE id IN (...), executemany INSERTs) in a single transaction.
+# Projects not in a state the action applies to are reported as skipped.
+# Bulk statements bypass the ORM flush hooks, so the search index and the
+# dashboard caches are updated here explicitly.
+
+# action -> (new status, statuses it applies to; None = any other status)
+STATUS_ACTIONS = {
+    'approve': (ProjectStatus.SCHEDULE_APPROVED, [ProjectStatus.WAITING_APPROVAL]),
+    'complete': (ProjectStatus.COMPLETED, None),
+}
+ACTIONS = ('schedule', 'approve', 'complete', 'delete')
+LABELS = {
+    'schedule': "scheduled on the next free dates and sent for approval",
+    'approve': "marked schedule approved",
+    'complete': "marked completed",
+    'delete': "deleted",
+}
+
+# Child rows removed with their projects, in one DELETE per table
+CHILD_TABLES = (ProjectMessage, ProjectUpload, ProjectService, ScheduleSlot)
+
+
+class BatchResult:
+    def __init__(self, action, requested, changed):
+        self.action = action
+        self.requested = requested
+        self.changed = changed
+
+    @property
+    def skipped(self):
+        return self.requested - self.changed
+
+    def summary(self):
+        text = f"{self.changed} project(s) {LABELS[self.action]}."
+        if self.skipped:
+            text += f" {self.skipped} skipped (not found or not in a matching status)."
+        return text
+
+    def as_dict(self):
+        return {'action': self.action, 'requested': self.requested,
+                'changed': self.changed, 'skipped': self.skipped}
+
+
+def _bulk(statement, params=None):
+    return db.session.execute(statement, params, execution_options={'synchronize_session': False})
+
+
+def _delete_projects(ids):
+    from app.search import reindex
+
+    message_ids = db.session.execute(
+        select(ProjectMessage.id).where(ProjectMessage.project_id.in_(ids))
+    ).scalars().all()
+    for model in CHILD_TABLES:
+        _bulk(delete(model).where(model.project_id.in_(ids)))
+    changed = _bulk(delete(Project).where(Project.id.in_(ids))).rowcount
+
+    conn = db.session.connection()
+    reindex(conn, 'project', ids)  # ids that no longer exist drop out of the index
+    reindex(conn, 'message', message_ids)
+    return changed
+
+
+def _schedule_projects(ids):
+    """Book every service of each pending project on its crew's next free day."""
+    from app.scheduling import ScheduleIndex, crew_for
+
+    project_ids = db.session.execute(
+        select(Project.id).where(Project.id.in_(ids), Project.status == ProjectStatus.PENDING_SCHEDULE)
+        .order_by(Project.created_at, Project.id)
+    ).scalars().all()
+    services = {}
+    for project_id, service_id, name in db.session.execute(
+        select(ProjectService.project_id, Service.id, Service.name)
+        .join(Service, Service.id == ProjectService.service_id)
+        .where(ProjectService.project_id.in_(project_ids))
+        .order_by(ProjectService.project_id, ProjectService.position)
+    ):
+        services.setdefault(project_id, []).append((service_id, name))
+
+    # Previous bookings of these projects are replaced, so they must not block
+    _bulk(delete(ScheduleSlot).where(ScheduleSlot.project_id.in_(list(services))))
+    start = date.today() + timedelta(days=1)
+    crews = {crew_for(name) for booked in services.values() for _, name in booked}
+    index = ScheduleIndex.load(crews, start)
+
+    slots, projects = [], []
+    for project_id in project_ids:
+        if project_id not in services:
+            continue  # nothing to schedule
+        schedule = {}
+        for service_id, name in services[project_id]:
+            crew = crew_for(name)
+            day = index.next_free(crew, start)
+            slot = ScheduleSlot(project_id=project_id, service_id=service_id, crew=crew, start_date=day, end_date=day)
+            index.book(slot)
+            slots.append({'project_id': project_id, 'service_id': service_id, 'crew': crew,
+                          'start_date': day, 'end_date': day})
+            schedule[name] = day.strftime('%Y-%m-%d')
+        projects.append({'id': project_id, 'schedule_data': schedule, 'status': ProjectStatus.WAITING_APPROVAL})
+
+    if projects:
+        db.session.execute(insert(ScheduleSlot), slots)
+        db.session.execute(update(Project), projects)  # executemany UPDATE by primary key
+    return len(projects)
+
+
+def apply_project_action(action, project_ids):
+    from app.cache import cache
+
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action!r}")
+    ids = sorted(set(project_ids))
+    if not ids:
+        return BatchResult(action, 0, 0)
+
+    # Customers whose dashboards change (read before rows move or disappear)
+    customer_ids = set(db.session.execute(
+        select(Project.customer_id).where(Project.id.in_(ids), Project.customer_id.isnot(None))
+    ).scalars())
+
+    if action == 'delete':
+        changed = _delete_projects(ids)
+    elif action == 'schedule':
+        changed = _schedule_projects(ids)
+    else:
+        status, allowed = STATUS_ACTIONS[action]
+        selected = Project.status.in_(allowed) if allowed else Project.status != status
+        changed = _bulk(update(Project).where(Project.id.in_(ids), selected).values(status=status)).rowcount
+
+    db.session.commit()
+    if changed:
+        cache.bump('admin', *(f"customer:{cid}" for cid in customer_ids))
+    return BatchResult(action, len(ids), changed)
@@ -0,0 +1,362 @@
+import csv
+import io
+import json
+import secrets
+import uuid
+from datetime import datetime
+from itertools import islice
+
+import click
+from flask import current_app
+from sqlalchemy import insert, select
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import (
+    User, EstimateRequest, Project, Service, EstimateService, ProjectService, EstimateStatus, ProjectStatus
+)
+
+# -------------------
+# Bulk import / export
+# -------------------
+# One flat row per customer, estimate or project (the "job book" format):
+#
+#   type, number, customer_email, customer_name, customer_address,
+#   customer_phone, project_type, services, total_sqft, details, status,
+#   created_at
+#
+# Imports stream rows through a generator pipeline (read -> clean -> chunk)
+# and write each chunk with a few executemany INSERTs and one commit.
+# Customers are matched by email against an index prefetched once, and rows
+# whose estimate/project number already exists are skipped, so re-running
+# an import is safe. Exports stream rows out with yield_per, never holding a
+# whole table in memory.
+
+FIELDS = [
+    'type', 'number', 'customer_email', 'customer_name', 'customer_address', 'customer_phone',
+    'project_type', 'services', 'total_sqft', 'details', 'status', 'created_at',
+]
+KINDS = ('customer', 'estimate', 'project')
+FORMATS = ('csv', 'jsonl')
+EXPORT_BATCH = 1000
+MAX_REPORTED_ERRORS = 50
+
+MODELS = {
+    'estimate': dict(model=EstimateRequest, links=EstimateService, link_fk='estimate_id', prefix='EST',
+                     number=EstimateRequest.estimate_number, created=EstimateRequest.timestamp,
+                     statuses=EstimateStatus, default_status=EstimateStatus.WAITING_ESTIMATE),
+    'project': dict(model=Project, links=ProjectService, link_fk='project_id', prefix='PROJ',
+                    number=Project.project_number, created=Project.created_at,
+                    statuses=ProjectStatus, default_status=ProjectStatus.PENDING_SCHEDULE),
+}
+
+
+class RowError(ValueError):
+    pass
+
+
+def format_for(filename):
+    return 'csv' if (filename or '').lower().endswith('.csv') else 'jsonl'
+
+
+# ---- import pipeline ----
+
+def read_rows(stream, fmt):
+    """Yield ``(line_no, row dict)`` from a text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError:
+            yield line_no, RowError("invalid JSON")
+
+
+def clean_rows(rows):
+    """Yield ``(line_no, record)``, or ``(line_no, RowError)`` for bad rows."""
+    for line_no, row in rows:
+        try:
+            if isinstance(row, RowError):
+                raise row
+            yield line_no, _clean(row)
+        except RowError as error:
+            yield line_no, error
+
+
+def _clean(row):
+    if not isinstance(row, dict):
+        raise RowError("expected an object")
+
+    def get(field):
+        value = row.get(field)
+        return '' if value is None else str(value).strip()
+
+    kind = get('type').lower() or 'project'
+    if kind not in KINDS:
+        raise RowError(f"unknown type {kind!r}")
+    email = get('customer_email').lower()
+    if '@' not in email:
+        raise RowError("customer_email is required")
+
+    record = {
+        'type': kind,
+        'email': email,
+        'customer': {
+            'full_name': get('customer_name') or email.split('@')[0],
+            'address': get('customer_address'),
+            'phone': get('customer_phone'),
+        },
+    }
+    if kind == 'customer':
+        return record
+
+    spec = MODELS[kind]
+    status = get('status') or spec['default_status'].value
+    if status not in {s.value for s in spec['statuses']}:
+        raise RowError(f"unknown status {status!r}")
+    if not get('project_type'):
+        raise RowError("project_type is required")
+    try:
+        total_sqft = int(float(get('total_sqft'))) if get('total_sqft') else None
+        created_at = datetime.fromisoformat(get('created_at')) if get('created_at') else datetime.utcnow()
+    except ValueError as error:
+        raise RowError(str(error))
+
+    record.update({
+        'number': get('number'),
+        'project_type': get('project_type'),
+        'services': list(dict.fromkeys(s.strip() for s in get('services').split(',') if s.strip())),
+        'total_sqft': total_sqft,
+        'details': get('details') or None,
+        'status': status,
+        'created_at': created_at,
+    })
+    return record
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = {kind: 0 for kind in KINDS}
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, str(message)))
+
+    def summary(self):
+        created = ", ".join(f"{n} {kind}s" for kind, n in self.created.items())
+        return f"Imported {created}; skipped {self.skipped} existing, {self.error_count} invalid rows."
+
+
+class Importer:
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or current_app.config['IMPORT_CHUNK_SIZE']
+        self.result = ImportResult()
+        # Prefetched once; every chunk resolves against these in memory
+        self.user_ids = {email.lower(): user_id for user_id, email in db.session.execute(select(User.id, User.email))}
+        self.service_ids = dict(db.session.execute(select(Service.name, Service.id)).all())
+        self.numbers = {kind: set(db.session.execute(select(spec['number'])).scalars()) for kind, spec in MODELS.items()}
+        # Imported customers get an unguessable password until they reset it
+        self.password_hash = generate_password_hash(secrets.token_urlsafe(32))
+
+    def run(self, stream, fmt):
+        for chunk in chunked(clean_rows(read_rows(stream, fmt)), self.chunk_size):
+            self._import_chunk(chunk)
+        return self.result
+
+    def _import_chunk(self, chunk):
+        from app.cache import cache
+        from app.search import reindex
+
+        records = []
+        for line_no, record in chunk:
+            if isinstance(record, RowError):
+                self.result.error(line_no, record)
+            else:
+                records.append(record)
+
+        self._create_customers(records)
+        touched = {}
+        for kind in MODELS:
+            touched[kind] = self._create_jobs(kind, [r for r in records if r['type'] == kind])
+
+        # Bulk INSERTs skip the flush hooks, so index and invalidate explicitly
+        conn = db.session.connection()
+        for kind, (ids, _) in touched.items():
+            reindex(conn, kind, ids)
+        db.session.commit()
+        customers = {cid for _, customer_ids in touched.values() for cid in customer_ids}
+        if customers:
+            cache.bump('admin', *(f"customer:{cid}" for cid in customers))
+
+    def _create_customers(self, records):
+        new_users = {}
+        for record in records:
+            email = record['email']
+            if email in self.user_ids or email in new_users:
+                if record['type'] == 'customer':
+                    self.result.skipped += 1
+                continue
+            new_users[email] = {**record['customer'], 'email': email,
+                                'password': self.password_hash, 'role': 'customer'}
+        if new_users:
+            rows = db.session.execute(
+                insert(User).returning(User.id, User.email, sort_by_parameter_order=True),
+                list(new_users.values())
+            )
+            self.user_ids.update((email, user_id) for user_id, email in rows)
+            self.result.created['customer'] += len(new_users)
+
+    def _create_jobs(self, kind, records):
+        spec = MODELS[kind]
+        model = spec['model']
+        numbers = self.numbers[kind]
+
+        rows, services = [], []
+        for record in records:
+            number = record['number'] or f"{spec['prefix']}-{uuid.uuid4().hex[:8].upper()}"
+            if number in numbers:
+                self.result.skipped += 1
+                continue
+            numbers.add(number)
+            rows.append({
+                spec['number'].key: number,
+                'customer_id': self.user_ids[record['email']],
+                'project_type': record['project_type'],
+                'services': ",".join(record['services']),
+                'total_sqft': record['total_sqft'],
+                'details': record['details'],
+                'status': record['status'],
+                spec['created'].key: record['created_at'],
+            })
+            services.append(record['services'])
+        if not rows:
+            return [], set()
+
+        ids = db.session.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        self._ensure_services({name for names in services for name in names})
+        links = [
+            {spec['link_fk']: record_id, 'service_id': self.service_ids[name], 'position': position}
+            for record_id, names in zip(ids, services)
+            for position, name in enumerate(names)
+        ]
+        if links:
+            db.session.execute(insert(spec['links']), links)
+        self.result.created[kind] += len(ids)
+        return ids, {row['customer_id'] for row in rows}
+
+    def _ensure_services(self, names):
+        missing = sorted(names - set(self.service_ids))
+        if missing:
+            rows = db.session.execute(
+                insert(Service).returning(Service.id, Service.name, sort_by_parameter_order=True),
+                [{'name': name} for name in missing]
+            )
+            self.service_ids.update((name, service_id) for service_id, name in rows)
+
+
+def import_records(stream, fmt, chunk_size=None):
+    return Importer(chunk_size).run(stream, fmt)
+
+
+# ---- export ----
+
+def _stream(stmt):
+    return db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH))
+
+
+def export_records(kind='all'):
+    """Yield export rows (dicts in FIELDS order) for one kind or all of them."""
+    kinds = KINDS if kind == 'all' else (kind,)
+    for kind in kinds:
+        if kind == 'customer':
+            stmt = (select(User.email, User.full_name, User.address, User.phone)
+                    .where(User.role == 'customer').order_by(User.id))
+            for row in _stream(stmt):
+                yield {'type': 'customer', 'customer_email': row.email, 'customer_name': row.full_name,
+                       'customer_address': row.address, 'customer_phone': row.phone}
+            continue
+
+        spec = MODELS[kind]
+        model = spec['model']
+        stmt = (select(spec['number'], model.project_type, model.services, model.total_sqft, model.details,
+                       model.status, spec['created'], User.email, User.full_name, User.address, User.phone)
+                .join(User, User.id == model.customer_id).order_by(model.id))
+        for row in _stream(stmt):
+            created_at = row[6]
+            yield {
+                'type': kind, 'number': row[0], 'customer_email': row.email, 'customer_name': row.full_name,
+                'customer_address': row.address, 'customer_phone': row.phone,
+                'project_type': row.project_type, 'services': row.services, 'total_sqft': row.total_sqft,
+                'details': row.details, 'status': str(row.status),
+                'created_at': created_at.isoformat() if created_at else None,
+            }
+
+
+def encode(records, fmt):
+    """Yield the records as CSV or JSON Lines text, one row at a time."""
+    if fmt == 'jsonl':
+        for record in records:
+            yield json.dumps({field: record.get(field) for field in FIELDS}) + '\n'
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+# -------------------
+# CLI
+# -------------------
+
+@click.group('data')
+def data_cli():
+    """Bulk import and export of customers, estimates and projects."""
+
+
+@data_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Defaults from the file extension.')
+@click.option('--chunk-size', type=int, default=None, help='Rows per INSERT batch and commit.')
+def import_command(source, fmt, chunk_size):
+    """Import rows from a CSV or JSON Lines file ('-' for stdin)."""
+    result = import_records(source, fmt or format_for(source.name), chunk_size)
+    for line_no, message in result.errors:
+        click.echo(f"⚠️ line {line_no}: {message}", err=True)
+    click.echo(f"✅ {result.summary()}")
+
+
+@data_cli.command('export')
+@click.argument('kind', type=click.Choice(('all', 'customers', 'estimates', 'projects')), default='all')
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), default='csv')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-')
+def export_command(kind, fmt, output):
+    """Export rows as CSV or JSON Lines."""
+    for chunk in encode(export_records(kind.rstrip('s')), fmt):
+        output.write(chunk)
+
+
+def init_app(app):
+    app.cli.add_command(data_cli)
@@ -0,0 +1,334 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from markupsafe import Markup
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from werkzeug.utils import import_string
+
+# -------------------
+# Fragment / result cache
+# -------------------
+# Rendered dashboard fragments are cached under keys that embed a "view
+# version" per namespace ('admin', 'customer:<id>'). Commits touching an
+# EstimateRequest, Project or ProjectMessage replace the affected versions, so
+# stale fragments are never read again and simply age out of the backend.
+#
+# Version tokens (CACHE_VERSIONS):
+#   'database'  the cache_version table (default): a commit in any gunicorn
+#               worker, `flask jobs worker` or a CLI command invalidates
+#               its own process at once and the others within
+#               CACHE_VERSION_TTL seconds, for which each process reuses the
+#               tokens it read (so warm pages run no version query)
+#   'cache'     in CACHE_BACKEND itself; only correct when every process
+#               shares it (one process, or 'filesystem' on a single host)
+#
+# Backends (CACHE_BACKEND):
+#   'memory'      per-process LRU with TTL (default)
+#   'filesystem'  shared by all workers on a host, under CACHE_DIR
+#   'null'        caching disabled
+#   'pkg.module.Class'  any class taking (app) with get/set/delete
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=1024, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else 0
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # least recently used
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FileSystemBackend:
+    def __init__(self, directory, max_entries=1024, default_ttl=300):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as fh:
+                expires_at, value = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as fh:
+            pickle.dump((expires_at, value), fh, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self._path(key))  # readers never see partial files
+        self._prune()
+
+    def delete(self, key):
+        _remove(self._path(key))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            _remove(os.path.join(self.directory, name))
+
+    def _prune(self):
+        names = [n for n in os.listdir(self.directory) if not n.startswith('.')]
+        if len(names) <= self.max_entries:
+            return
+        # Over the limit: drop the least recently written entries down to 80%
+        paths = sorted((os.path.join(self.directory, n) for n in names), key=_mtime)
+        for path in paths[:len(paths) - self.max_entries * 4 // 5]:
+            _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0
+
+
+class NullBackend:
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+
+class BackendVersions:
+    """Version tokens kept in the cache backend."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, namespaces):
+        tokens = []
+        for namespace in namespaces:
+            key = f"version:{namespace}"
+            current = self.backend.get(key)
+            if current is None:
+                current = uuid.uuid4().hex
+                self.backend.set(key, current, ttl=0)
+            tokens.append(current)
+        return tokens
+
+    def bump(self, namespaces):
+        # A fresh random token (not a counter) so concurrent bumps never collide
+        for namespace in namespaces:
+            self.backend.set(f"version:{namespace}", uuid.uuid4().hex, ttl=0)
+
+
+UPSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+class DatabaseVersions:
+    """Version tokens in the cache_version table, seen by every process."""
+
+    UNSET = '0'  # never bumped; the same in every process
+
+    def __init__(self, ttl=0, max_entries=4096):
+        # Tokens read here are reused for ``ttl`` seconds (0: read every time)
+        self.memo = MemoryBackend(max_entries, ttl) if ttl else NullBackend()
+
+    def get(self, namespaces):
+        from app import db
+        from app.models import CacheVersion
+
+        tokens = {ns: self.memo.get(ns) for ns in namespaces}
+        missing = [ns for ns, token in tokens.items() if token is None]
+        if missing:
+            found = dict(db.session.execute(
+                db.select(CacheVersion.namespace, CacheVersion.token).where(CacheVersion.namespace.in_(missing))
+            ).all())
+            for ns in missing:
+                tokens[ns] = found.get(ns, self.UNSET)
+                self.memo.set(ns, tokens[ns])
+        return [tokens[ns] for ns in namespaces]
+
+    def bump(self, namespaces):
+        from app import db
+
+        # A short transaction of its own: writers don't hold the version
+        # rows' locks for the length of theirs
+        with db.engine.begin() as conn:
+            tokens = self.write(conn, namespaces)
+        for ns, token in tokens.items():
+            self.memo.set(ns, token)  # this process sees its own changes at once
+
+    def write(self, conn, namespaces):
+        """New tokens for ``namespaces`` in ``conn``'s transaction; returns them."""
+        from app.models import CacheVersion
+
+        table = CacheVersion.__table__
+        rows = [{'namespace': ns, 'token': uuid.uuid4().hex, 'updated_at': datetime.utcnow()}
+                for ns in dict.fromkeys(namespaces)]
+        upsert = UPSERTS.get(conn.dialect.name)
+        if upsert:
+            statement = upsert(table)
+            conn.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.namespace],
+                set_={'token': statement.excluded.token, 'updated_at': statement.excluded.updated_at},
+            ), rows)
+        else:
+            for row in rows:
+                if not conn.execute(table.update().where(table.c.namespace == row['namespace'])
+                                    .values(token=row['token'], updated_at=row['updated_at'])).rowcount:
+                    conn.execute(table.insert().values(**row))
+        return {row['namespace']: row['token'] for row in rows}
+
+
+class Cache:
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        self.versions = BackendVersions(self.backend)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        name = app.config['CACHE_BACKEND']
+        max_entries = app.config['CACHE_MAX_ENTRIES']
+        ttl = app.config['CACHE_DEFAULT_TTL']
+        if name == 'memory':
+            self.backend = MemoryBackend(max_entries, ttl)
+        elif name == 'filesystem':
+            self.backend = FileSystemBackend(app.config['CACHE_DIR'], max_entries, ttl)
+        elif name == 'null':
+            self.backend = NullBackend()
+        else:
+            self.backend = import_string(name)(app)
+        if app.config['CACHE_VERSIONS'] == 'database':
+            self.versions = DatabaseVersions(app.config['CACHE_VERSION_TTL'])
+        else:
+            self.versions = BackendVersions(self.backend)
+        app.extensions['cache'] = self
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    # ---- view versions ----
+
+    def version(self, namespace):
+        return self.versions.get([namespace])[0]
+
+    def bump(self, *namespaces):
+        if namespaces:
+            self.versions.bump(namespaces)
+
+    def fragment(self, name, namespaces, render, ttl=None, vary=()):
+        """Return a cached Markup fragment, calling ``render()`` on a miss."""
+        versions = ':'.join(self.versions.get(namespaces))
+        key = ':'.join(['fragment', name, versions, *map(str, vary)])
+        html = self.get(key)
+        if html is None:
+            html = str(render())
+            self.set(key, html, ttl)
+        return Markup(html)
+
+
+cache = Cache()
+
+
+# -------------------
+# Dashboard invalidation
+# -------------------
+# Namespaces touched during a flush are collected on the session and bumped
+# once the transaction commits (database versions in a short transaction of
+# their own). Rolled back writes change nothing.
+
+def _customer_ids(obj):
+    history = inspect(obj).attrs.customer_id.history
+    return {cid for cid in (*history.added, *history.unchanged, *history.deleted) if cid}
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_dashboard_changes(session, flush_context):
+    from app.models import EstimateRequest, Project, ProjectMessage
+
+    namespaces = session.info.setdefault('cache_namespaces', set())
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    for obj in (*session.new, *dirty, *session.deleted):
+        if isinstance(obj, (EstimateRequest, Project)):
+            namespaces.add('admin')
+            namespaces.update(f"customer:{cid}" for cid in _customer_ids(obj))
+        elif isinstance(obj, ProjectMessage):
+            namespaces.add('admin')
+            customer_id = session.execute(
+                Project.__table__.select()
+                .with_only_columns(Project.customer_id)
+                .where(Project.id == obj.project_id)
+            ).scalar()
+            if customer_id:
+                namespaces.add(f"customer:{customer_id}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_dashboard_versions(session):
+    namespaces = session.info.pop('cache_namespaces', None)
+    if namespaces:
+        cache.bump(*namespaces)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dashboard_changes(session):
+    session.info.pop('cache_namespaces', None)
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import threading
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.cache import cache
+
+# -------------------
+# Service catalog
+# -------------------
+# Project types, the services offered for each and their prices live in the
+# project_type / project_type_service / service tables (seeded from the
+# defaults below by migration 7). Requests read an immutable Catalog snapshot
+# kept per process and reloaded read-through when:
+#
+# - the 'catalog' cache version changes: any committed change to a
+#   ProjectType, its services or a Service row bumps it (same mechanism as
+#   the dashboard fragments, see app/cache.py), so every worker reloads on
+#   its next request, whichever process - `flask catalog` included - made
+#   the edit;
+# - the snapshot is older than CATALOG_TTL, a backstop for
+#   CACHE_VERSIONS='cache' setups where processes don't share versions.
+#
+# Pages fetch the catalog from /catalog.json (ETag'd, versioned URL) instead
+# of inlining it.
+
+DEFAULT_SERVICES = {
+    'Kitchen Remodel': ['Demolition', 'Standard Cabinets', 'Custom Cabinets', 'Flooring', 'Painting', 'Backsplash', 'Countertop', 'Lighting', 'Doors/Windows'],
+    'Bath Remodel': ['Demolition', 'Bathtub Replacement', 'Acrylic Shower Replacement', 'Tile Shower', 'Flooring', 'Painting', 'Lighting', 'Cabinets', 'Doors/Windows'],
+    'Flooring': ['Old Floor Removal', 'Tile', 'Carpet', 'Hardwood', 'Glue Down', 'Laminate', 'Vinyl', 'Other', 'Re-leveling', 'New Baseboard Install', 'Doors/Windows'],
+    'Painting': ['Interior Painting', 'Exterior Painting', 'Patching', 'Priming', 'Trimming', 'Doors/Windows']
+}
+
+# service -> (rate in dollars, unit); 'sqft' rates are multiplied by total_sqft
+DEFAULT_PRICES = {
+    'Demolition': (2.50, 'sqft'),
+    'Standard Cabinets': (4500, 'job'),
+    'Custom Cabinets': (9500, 'job'),
+    'Cabinets': (3500, 'job'),
+    'Flooring': (6.00, 'sqft'),
+    'Painting': (3.00, 'sqft'),
+    'Backsplash': (1200, 'job'),
+    'Countertop': (3200, 'job'),
+    'Lighting': (850, 'job'),
+    'Doors/Windows': (650, 'job'),
+    'Bathtub Replacement': (2800, 'job'),
+    'Acrylic Shower Replacement': (3400, 'job'),
+    'Tile Shower': (5200, 'job'),
+    'Old Floor Removal': (1.75, 'sqft'),
+    'Tile': (8.50, 'sqft'),
+    'Carpet': (4.25, 'sqft'),
+    'Hardwood': (9.00, 'sqft'),
+    'Glue Down': (5.50, 'sqft'),
+    'Laminate': (4.75, 'sqft'),
+    'Vinyl': (4.50, 'sqft'),
+    'Re-leveling': (2.25, 'sqft'),
+    'New Baseboard Install': (1.50, 'sqft'),
+    'Interior Painting': (3.00, 'sqft'),
+    'Exterior Painting': (3.75, 'sqft'),
+    'Patching': (350, 'job'),
+    'Priming': (0.90, 'sqft'),
+    'Trimming': (1.25, 'sqft'),
+}
+
+UNITS = ('sqft', 'job')
+
+
+class Catalog:
+    """Read-only snapshot of the catalog; shared by every request in the process."""
+
+    def __init__(self, services, prices, version):
+        self.services = services  # project type -> tuple of service names, in display order
+        self.prices = prices      # service -> (rate, unit), priced services only
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.project_types = tuple(services)
+        self.project_type_choices = tuple((name, name) for name in services)
+        self._choices = {name: tuple((s, s) for s in names) for name, names in services.items()}
+        # What /catalog.json serves; the ETag is the content hash, so it is the
+        # same in every worker
+        self.json = json.dumps({'project_types': self.project_types, 'services': services},
+                               separators=(',', ':')).encode()
+        self.etag = hashlib.sha1(self.json).hexdigest()[:16]
+
+    def service_choices(self, project_type):
+        return self._choices.get(project_type, ())
+
+
+def load_catalog(version):
+    from app.models import ProjectType, ProjectTypeService, Service
+
+    rows = db.session.execute(
+        db.select(ProjectType.name, Service.name)
+        .select_from(ProjectType)
+        .outerjoin(ProjectTypeService, ProjectTypeService.project_type_id == ProjectType.id)
+        .outerjoin(Service, Service.id == ProjectTypeService.service_id)
+        .order_by(ProjectType.position, ProjectType.id, ProjectTypeService.position)
+    ).all()
+    services = {}
+    for project_type, service in rows:
+        services.setdefault(project_type, [])
+        if service:
+            services[project_type].append(service)
+
+    prices = {
+        name: (price, unit or 'job') for name, price, unit in db.session.execute(
+            db.select(Service.name, Service.price, Service.unit).where(Service.price.is_not(None)))
+    }
+    return Catalog({name: tuple(names) for name, names in services.items()}, prices, version)
+
+
+_current = None
+_lock = threading.Lock()
+
+
+def current_catalog():
+    """The catalog snapshot, reloaded when its version changes or it is older than CATALOG_TTL."""
+    global _current
+    version = cache.version('catalog')
+    ttl = current_app.config['CATALOG_TTL']
+    snapshot = _current
+    if snapshot is None or snapshot.version != version or time.monotonic() - snapshot.loaded_at > ttl:
+        with _lock:  # one thread reloads, the others wait for its snapshot
+            if _current is snapshot:
+                _current = load_catalog(version)
+            snapshot = _current
+    return snapshot
+
+
+def seed_defaults(conn):
+    """Insert DEFAULT_SERVICES / DEFAULT_PRICES where missing (used by migration 7)."""
+    from app.models import ProjectType, ProjectTypeService, Service
+
+    services, types, links = Service.__table__, ProjectType.__table__, ProjectTypeService.__table__
+    names = set(DEFAULT_PRICES) | {s for names in DEFAULT_SERVICES.values() for s in names}
+    service_ids = {row.name: row.id for row in conn.execute(services.select())}
+    missing = sorted(names - set(service_ids))
+    if missing:
+        conn.execute(services.insert(), [{'name': name} for name in missing])
+        service_ids = {row.name: row.id for row in conn.execute(services.select())}
+    for name, (rate, unit) in DEFAULT_PRICES.items():
+        conn.execute(services.update().where(services.c.name == name, services.c.price.is_(None))
+                     .values(price=rate, unit=unit))
+
+    if conn.execute(types.select().limit(1)).first() is not None:
+        return  # the catalog was already set up; never overwrite edits
+    conn.execute(types.insert(), [{'name': name, 'position': position}
+                                  for position, name in enumerate(DEFAULT_SERVICES)])
+    type_ids = {row.name: row.id for row in conn.execute(types.select())}
+    conn.execute(links.insert(), [
+        {'project_type_id': type_ids[project_type], 'service_id': service_ids[name], 'position': position}
+        for project_type, names in DEFAULT_SERVICES.items() for position, name in enumerate(names)
+    ])
+
+
+# -------------------
+# Invalidation on catalog changes
+# -------------------
+# Collected into the same session set as the dashboard namespaces, so the
+# version is bumped after commit and never for a rolled back edit. New
+# Service rows alone don't count: estimates create them for every name a
+# customer submits, and they only join the catalog through a link row.
+
+@event.listens_for(Session, 'after_flush')
+def _collect_catalog_changes(session, flush_context):
+    from app.models import ProjectType, ProjectTypeService, Service
+
+    dirty = [obj for obj in session.dirty if session.is_modified(obj)]
+    if any(isinstance(obj, (ProjectType, ProjectTypeService)) for obj in (*session.new, *dirty, *session.deleted)) \
+            or any(isinstance(obj, Service) for obj in (*dirty, *session.deleted)):
+        session.info.setdefault('cache_namespaces', set()).add('catalog')
+
+
+# -------------------
+# CLI: flask catalog ...
+# -------------------
+
+catalog_cli = AppGroup('catalog', help="Show or edit the service catalog.")
+
+
+def _project_type(name):
+    from app.models import ProjectType
+
+    project_type = ProjectType.query.filter_by(name=name).first()
+    if project_type is None:
+        raise click.ClickException(f"Unknown project type {name!r}.")
+    return project_type
+
+
+@catalog_cli.command('show')
+def show_command():
+    """List project types, their services and prices."""
+    catalog = current_catalog()
+    for project_type, services in catalog.services.items():
+        click.echo(project_type)
+        for service in services:
+            rate, unit = catalog.prices.get(service, (None, 'job'))
+            price = "quoted on site" if rate is None else f"${rate:,.2f} / {unit}"
+            click.echo(f"  {service:<32}{price}")
+
+
+@catalog_cli.command('add-service')
+@click.argument('project_type')
+@click.argument('service')
+@click.option('--new-type', is_flag=True, help='Create the project type if it does not exist.')
+def add_service_command(project_type, service, new_type):
+    """Offer SERVICE for PROJECT_TYPE (appended to its list)."""
+    from app.models import ProjectType, ProjectTypeService
+    from app.queries import get_or_create_services
+
+    if new_type and ProjectType.query.filter_by(name=project_type).first() is None:
+        position = (db.session.query(db.func.max(ProjectType.position)).scalar() or 0) + 1
+        db.session.add(ProjectType(name=project_type, position=position))
+        db.session.flush()
+    record = _project_type(project_type)
+    service_row, = get_or_create_services([service])
+    if any(link.service_id == service_row.id for link in record.service_links):
+        raise click.ClickException(f"{service!r} is already offered for {project_type!r}.")
+    record.service_links.append(ProjectTypeService(service=service_row, position=len(record.service_links)))
+    db.session.commit()
+    click.echo(f"✅ {service} added to {project_type}.")
+
+
+@catalog_cli.command('remove-service')
+@click.argument('project_type')
+@click.argument('service')
+def remove_service_command(project_type, service):
+    """Stop offering SERVICE for PROJECT_TYPE (existing estimates keep it)."""
+    record = _project_type(project_type)
+    links = [link for link in record.service_links if link.service.name != service]
+    if len(links) == len(record.service_links):
+        raise click.ClickException(f"{service!r} is not offered for {project_type!r}.")
+    for position, link in enumerate(links):
+        link.position = position
+    record.service_links = links
+    db.session.commit()
+    click.echo(f"✅ {service} removed from {project_type}.")
+
+
+@catalog_cli.command('set-price')
+@click.argument('service')
+@click.argument('rate', required=False, type=float)
+@click.option('--unit', type=click.Choice(UNITS), help="Defaults to the service's current unit, else 'job'.")
+def set_price_command(service, rate, unit):
+    """Set SERVICE's price; leave RATE out to quote it on site."""
+    from app.models import Service
+
+    row = Service.query.filter_by(name=service).first()
+    if row is None:
+        raise click.ClickException(f"Unknown service {service!r}.")
+    row.price = rate
+    row.unit = unit or row.unit or 'job'
+    db.session.commit()
+    click.echo(f"✅ {service}: " + ("quoted on site" if rate is None else f"${rate:,.2f} / {row.unit}"))
+
+
+def init_app(app):
+    app.cli.add_command(catalog_cli)
@@ -0,0 +1,108 @@
+import os
+import re
+import subprocess
+import sys
+
+import click
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from app import db
+
+# -------------------
+# One-shot setup commands
+# -------------------
+# Run once per deploy (release phase / build step), not in every worker:
+#   flask --app run init-db
+#   flask --app run seed-admin
+
+
+@click.command('init-db')
+def init_db_command():
+    """Create or upgrade the database schema."""
+    from app.migrations import upgrade
+
+    applied = upgrade(echo=click.echo)
+    if not applied:
+        click.echo("ℹ️ Database schema is up to date.")
+
+
+def create_admin_user(admin_email=None, admin_password=None):
+    from app.models import User
+
+    admin_email = admin_email or current_app.config['ADMIN_EMAIL']
+    admin_password = admin_password or current_app.config['ADMIN_PASSWORD']
+
+    user = User.query.filter_by(email=admin_email).first()
+
+    if user:
+        if user.role != "admin":
+            user.role = "admin"
+            db.session.commit()
+            click.echo("🔁 Existing user promoted to admin.")
+        else:
+            click.echo("ℹ️ Admin user already exists.")
+    else:
+        admin = User(
+            full_name="Admin",
+            address="Admin Address",
+            phone="0000000000",
+            email=admin_email,
+            password=generate_password_hash(admin_password),
+            role="admin"
+        )
+        db.session.add(admin)
+        db.session.commit()
+        click.echo("✅ Admin user created.")
+
+
+@click.command('seed-admin')
+@click.option('--email', default=None, help='Defaults to the ADMIN_EMAIL setting.')
+@click.option('--password', default=None, help='Defaults to the ADMIN_PASSWORD setting.')
+def seed_admin_command(email, password):
+    """Create the admin account, or promote an existing user to admin."""
+    create_admin_user(email, password)
+
+
+# -------------------
+# Startup timing
+# -------------------
+
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+@click.command('startup-report')
+@click.option('--top', default=20, help='Number of slowest imports to show.')
+def startup_report_command(top):
+    """Show import time per module and app-factory phase timings."""
+    # A fresh interpreter, so imports are measured cold like a worker boot
+    probe = "from app import create_app; create_app()"
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        capture_output=True, text=True, cwd=os.path.dirname(current_app.root_path)
+    )
+    if result.returncode != 0:
+        raise click.ClickException(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((int(cumulative_us), int(self_us), module, len(indent) // 2))
+
+    total_us = sum(cumulative for cumulative, _, _, depth in imports if depth == 0)
+    click.echo(f"Total import time: {total_us / 1000:.1f} ms")
+    click.echo(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative, self_us, module, _ in sorted(imports, reverse=True)[:top]:
+        click.echo(f"{cumulative / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {module}")
+
+    click.echo("\nApp factory (this process):")
+    for phase, seconds in current_app.extensions['startup_timings'].items():
+        click.echo(f"{seconds * 1000:>10.1f}ms  {phase}")
+
+
+def init_app(app):
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(seed_admin_command)
+    app.cli.add_command(startup_report_command)
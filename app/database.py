@@ -0,0 +1,133 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from app.instrumentation import registry
+
+# -------------------
+# Engine profiles
+# -------------------
+# SQLALCHEMY_ENGINE_OPTIONS is derived from the database URL unless set
+# explicitly:
+#
+# - Postgres: one pool per worker process sized to the threads that can use
+#   it at once (request threads + in-process job workers), pre-ping so
+#   connections the server or a proxy dropped are replaced instead of
+#   failing a request, recycling, and a server-side statement_timeout so a
+#   runaway query can't hold a connection forever. Keep
+#   workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) under max_connections.
+# - SQLite: per-connection pragmas. WAL lets readers run alongside the
+#   writer, synchronous=NORMAL is durable in WAL mode with far fewer fsyncs,
+#   busy_timeout makes a blocked writer wait instead of failing with
+#   "database is locked", and mmap_size serves reads from the page cache.
+#
+# The pool records how long each checkout waited for a connection, exposed
+# with the pool's current usage on /metrics when instrumentation is on.
+
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+POOL_WAIT = registry.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled connection.', (), POOL_WAIT_BUCKETS)
+POOL_TIMEOUTS = registry.counter(
+    'db_pool_timeouts_total', 'Checkouts that gave up after DB_POOL_TIMEOUT.')
+POOL_CONNECTIONS = registry.gauge(
+    'db_pool_connections', 'Pooled connections by state.', ('state',))
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - started)
+
+
+def normalize_url(uri):
+    # Heroku-style URLs use the scheme SQLAlchemy 1.4+ no longer accepts
+    return 'postgresql://' + uri[len('postgres://'):] if uri.startswith('postgres://') else uri
+
+
+def pool_size(config):
+    return config['DB_POOL_SIZE'] or config['WEB_THREADS'] + config['JOBS_IN_PROCESS_WORKERS']
+
+
+def engine_options(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'postgresql':
+        connect_args = {'connect_timeout': config['DB_CONNECT_TIMEOUT']}
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            connect_args['options'] = f"-c statement_timeout={config['DB_STATEMENT_TIMEOUT_MS']}"
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': pool_size(config),
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': True,
+            'connect_args': connect_args,
+        }
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        return {
+            'poolclass': TimedQueuePool,
+            'pool_size': pool_size(config),
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+        }
+    return {}
+
+
+def _sqlite_pragmas(config):
+    pragmas = [
+        ('journal_mode', 'WAL'),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+    ]
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return on_connect
+
+
+def _collect_pool_usage(engine):
+    def collect():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            POOL_CONNECTIONS.set(pool.checkedout(), state='checked_out')
+            POOL_CONNECTIONS.set(pool.checkedin(), state='idle')
+            POOL_CONNECTIONS.set(max(pool.overflow(), 0), state='overflow')
+    return collect
+
+
+def configure(app):
+    """Fill in the engine options; runs before db.init_app()."""
+    config = app.config
+    config['SQLALCHEMY_DATABASE_URI'] = normalize_url(config['SQLALCHEMY_DATABASE_URI'])
+    if not config.get('SQLALCHEMY_ENGINE_OPTIONS'):
+        config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(config)
+
+
+def init_app(app):
+    from app import db
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', _sqlite_pragmas(app.config))
+    if app.config['INSTRUMENTATION']:
+        registry.collectors.append(_collect_pool_usage(engine))
@@ -0,0 +1,174 @@
+import io
+import json
+from datetime import date, timedelta
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import update
+from werkzeug.datastructures import FileStorage
+
+from app import db
+from app.catalog import current_catalog
+from app.jobs import enqueue, job
+from app.models import EstimateRequest, EstimateStatus
+from app.pdf import FIRST_FREE_OBJECT, Layout, compile_pages, write_document
+from app.queries import split_services
+from app.storage import save_upload
+
+# -------------------
+# Estimate PDFs
+# -------------------
+# Builds the estimate a customer receives from the EstimateRequest and the
+# service catalog with its prices (app/catalog.py). Every document ends with
+# the same price list and terms pages; those are laid out and compressed once
+# per catalog version (static_pages) and only the quote pages are rendered
+# per estimate.
+# Rendering runs as an 'estimates.render_pdf' job so a batch of estimates is
+# issued in the background.
+
+TERMS = [
+    "Prices on this estimate are valid for the period shown above. Quantities are based on the square "
+    "footage provided with the request and are confirmed on site before work starts.",
+    "Services marked 'quoted on site' are priced after an inspection and added to the agreement in writing.",
+    "Materials selected by the customer outside the standard range are billed at cost. Any change to the "
+    "scope of work is agreed in writing before it is carried out.",
+    "Approving this estimate in the customer portal confirms acceptance of the prices and terms above; "
+    "scheduling starts once the estimate is approved.",
+]
+
+
+def prices():
+    # ESTIMATE_PRICES (JSON) overrides individual catalog prices
+    return {**current_catalog().prices, **{name: tuple(value) for name, value in current_app.config['ESTIMATE_PRICES'].items()}}
+
+
+def money(amount):
+    return f"${amount:,.2f}"
+
+
+def quote_lines(estimate, price_list=None):
+    """``[(service, quantity, unit, rate, amount)]``; rate/amount are None when unpriced."""
+    price_list = price_list or prices()
+    lines = []
+    for service in estimate.service_names or split_services(estimate.services):
+        rate, unit = price_list.get(service, (None, 'job'))
+        quantity = estimate.total_sqft if unit == 'sqft' and estimate.total_sqft else 1
+        if unit == 'sqft' and not estimate.total_sqft:
+            rate = None  # no area given: can't price per square foot
+        lines.append((service, quantity, unit, rate, rate * quantity if rate is not None else None))
+    return lines
+
+
+# ---- static pages (compiled once per catalog version) ----
+
+def _static_key(config):
+    catalog = current_catalog()
+    # Services as pairs: sort_keys must not reorder the project types
+    return json.dumps([list(catalog.services.items()), prices(), config['ESTIMATE_COMPANY_NAME'],
+                       config['ESTIMATE_COMPANY_CONTACT']], sort_keys=True)
+
+
+@lru_cache(maxsize=4)
+def _compile_static(key):
+    services, price_list, company, contact = json.loads(key)
+    layout = Layout(footer=f"{company} - {contact}")
+    layout.heading("Price List")
+    for project_type, names in services:
+        layout.heading(project_type, size=11)
+        for service in names:
+            rate, unit = price_list.get(service, (None, 'job'))
+            price = "Quoted on site" if rate is None else f"{money(rate)} / {'sq ft' if unit == 'sqft' else 'job'}"
+            layout.row([(12, service, 'left'), (504, price, 'right')], size=9)
+    layout.rule()
+    layout.heading("Terms and Conditions")
+    for clause in TERMS:
+        layout.paragraph(clause, size=9)
+        layout.space(6)
+    return compile_pages(layout.pages, FIRST_FREE_OBJECT)
+
+
+def static_pages():
+    return _compile_static(_static_key(current_app.config))
+
+
+# ---- per-estimate pages ----
+
+def quote_pages(estimate, first_number, issued=None):
+    config = current_app.config
+    issued = issued or date.today()
+    valid_until = issued + timedelta(days=config['ESTIMATE_VALID_DAYS'])
+    customer = estimate.customer
+
+    layout = Layout(footer=f"{config['ESTIMATE_COMPANY_NAME']} - {config['ESTIMATE_COMPANY_CONTACT']}")
+    layout.heading(config['ESTIMATE_COMPANY_NAME'], size=18)
+    layout.paragraph(config['ESTIMATE_COMPANY_CONTACT'], size=9)
+    layout.space(10)
+    layout.heading(f"Estimate {estimate.estimate_number}")
+    layout.row([(0, f"Issued: {issued:%B %d, %Y}", 'left'), (504, f"Valid until: {valid_until:%B %d, %Y}", 'right')])
+    layout.space(8)
+
+    layout.heading("Prepared for", size=11)
+    for line in (customer.full_name, customer.address, customer.phone, customer.email):
+        if line:
+            layout.paragraph(line)
+    layout.space(8)
+
+    layout.heading("Project", size=11)
+    layout.paragraph(f"Type: {estimate.project_type}")
+    if estimate.total_sqft:
+        layout.paragraph(f"Total area: {estimate.total_sqft:,} sq ft")
+    if estimate.details:
+        layout.paragraph(f"Details: {estimate.details}")
+    layout.space(10)
+
+    header = [(0, "Service", 'left'), (260, "Qty", 'right'), (330, "Rate", 'right'), (504, "Amount", 'right')]
+    layout.row(header, font='F2', shade=True)
+    total = 0
+    for service, quantity, unit, rate, amount in quote_lines(estimate):
+        if amount is None:
+            layout.row([(0, service, 'left'), (504, "Quoted on site", 'right')])
+            continue
+        total += amount
+        qty = f"{quantity:,} sq ft" if unit == 'sqft' else "1"
+        layout.row([(0, service, 'left'), (260, qty, 'right'), (330, money(rate), 'right'), (504, money(amount), 'right')])
+    layout.rule()
+    layout.row([(330, "Estimated total", 'right'), (504, money(total), 'right')], font='F2')
+    layout.space(30)
+    layout.paragraph("See the attached price list and terms. Approve or decline this estimate in your customer portal.",
+                     size=9)
+    return compile_pages(layout.pages, first_number)
+
+
+def render_estimate_pdf(estimate, issued=None):
+    static = static_pages()
+    quote = quote_pages(estimate, static.next_number, issued)
+    return write_document([quote, static], title=f"Estimate {estimate.estimate_number}")
+
+
+# ---- background issue ----
+
+@job('estimates.render_pdf')
+def render_estimate_job(estimate_id, issue=True):
+    estimate = db.session.get(EstimateRequest, estimate_id)
+    if estimate is None:
+        return
+    pdf = render_estimate_pdf(estimate)
+    estimate.estimate_pdf = save_upload(
+        FileStorage(io.BytesIO(pdf), filename=f"{estimate.estimate_number}_Estimate.pdf"), 'estimates'
+    )
+    if issue:
+        # Only an estimate still waiting is sent; re-issuing (or a retried job
+        # running after the customer answered) just replaces the PDF. One
+        # conditional UPDATE, so an approval committed meanwhile is not undone.
+        db.session.execute(
+            update(EstimateRequest)
+            .where(EstimateRequest.id == estimate_id, EstimateRequest.status == EstimateStatus.WAITING_ESTIMATE)
+            .values(status=EstimateStatus.ESTIMATE_RECEIVED)
+            .execution_options(synchronize_session='fetch')
+        )
+    # the job runner commits
+
+
+def issue_estimates(estimate_ids):
+    """Queue PDF generation for each estimate; they are sent when rendered."""
+    return [enqueue('estimates.render_pdf', {'estimate_id': estimate_id}) for estimate_id in estimate_ids]
@@ -0,0 +1,43 @@
+import threading
+
+# -------------------
+# In-process pub/sub for project messages
+# -------------------
+# send_project_message publishes the new message id after commit; open SSE and
+# long-poll connections (one per page, for all the projects it shows) block on
+# a condition variable and only query the database once something newer than
+# what they have seen is published for one of their projects.
+# Uses `threading` primitives, which gevent/eventlet monkey-patch into
+# cooperative ones, so it works with sync, gthread and gevent workers alike.
+# Publishes are per process: with several workers, subscribers also resync
+# on MESSAGE_STREAM_RESYNC so messages posted through another worker arrive.
+
+
+class MessageBroker:
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._latest = {}  # project_id -> newest published message id
+
+    def publish(self, project_id, message_id):
+        with self._condition:
+            if message_id > self._latest.get(project_id, 0):
+                self._latest[project_id] = message_id
+            self._condition.notify_all()
+
+    def latest(self, project_id):
+        return self._latest.get(project_id, 0)
+
+    def wait(self, project_ids, last_seen_id, timeout):
+        """Block until a message newer than ``last_seen_id`` is published
+        for any of ``project_ids``.
+
+        Returns True if one was, False on timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: any(self._latest.get(project_id, 0) > last_seen_id for project_id in project_ids),
+                timeout=timeout
+            )
+
+
+broker = MessageBroker()
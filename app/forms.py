@@ -1,6 +1,9 @@
+import re
+from functools import lru_cache
+
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField, IntegerField, FileField, SelectMultipleField, widgets
-from wtforms.validators import DataRequired, Email, EqualTo, Length
+from wtforms import StringField, PasswordField, SubmitField, SelectField, TextAreaField, IntegerField, FileField, SelectMultipleField, BooleanField, DateField, widgets
+from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional
 from flask_wtf.file import FileAllowed, FileRequired, FileField
 from wtforms import MultipleFileField  # ← make sure this is imported
 
@@ -28,35 +31,63 @@ class MultiCheckboxField(SelectMultipleField):
     widget = widgets.ListWidget(prefix_label=False)
     option_widget = widgets.CheckboxInput()
 
-# -------------------
-# Project & Estimate Choices
-# -------------------
-PROJECT_TYPES = [
-    ('Kitchen Remodel', 'Kitchen Remodel'),
-    ('Bath Remodel', 'Bath Remodel'),
-    ('Flooring', 'Flooring'),
-    ('Painting', 'Painting')
-]
-
-SERVICES = {
-    'Kitchen Remodel': ['Demolition', 'Standard Cabinets', 'Custom Cabinets', 'Flooring', 'Painting', 'Backsplash', 'Countertop', 'Lighting', 'Doors/Windows'],
-    'Bath Remodel': ['Demolition', 'Bathtub Replacement', 'Acrylic Shower Replacement', 'Tile Shower', 'Flooring', 'Painting', 'Lighting', 'Cabinets', 'Doors/Windows'],
-    'Flooring': ['Old Floor Removal', 'Tile', 'Carpet', 'Hardwood', 'Glue Down', 'Laminate', 'Vinyl', 'Other', 'Re-leveling', 'New Baseboard Install', 'Doors/Windows'],
-    'Painting': ['Interior Painting', 'Exterior Painting', 'Patching', 'Priming', 'Trimming', 'Doors/Windows']
-}
-
 # -------------------
 # Estimate Request Form (Updated with multiple file support)
 # -------------------
 
 class EstimateRequestForm(FlaskForm):
-    project_type = SelectField('Project Type', choices=PROJECT_TYPES, validators=[DataRequired()])
+    # Choices come from the service catalog per request (app/catalog.py)
+    project_type = SelectField('Project Type', choices=[], validators=[DataRequired()])
     services = MultiCheckboxField('Select Services', choices=[])
     total_sqft = IntegerField('Total Square Feet')
     images = MultipleFileField('Upload Sketch / Pictures (up to 5)')  # ✅ updated field
     details = TextAreaField('What do you need done in details (specify)')
     submit = SubmitField('Submit Estimate Request')
 
+# Bounded: form classes are memoized per service list
+FORM_CACHE_SIZE = 256
+
+# -------------------
+# Admin: Schedule Project (one date field per service)
+# -------------------
+class ScheduleForm(FlaskForm):
+    # Date fields are added per service by schedule_form_class()
+    force = BooleanField("Book anyway (ignore crew conflicts)")
+    submit = SubmitField("Send Schedule to Customer")
+
+def normalize_services(services):
+    return tuple(dict.fromkeys(s.strip() for s in services if s and s.strip()))
+
+def service_field_names(services):
+    """``{service: field name}``; names are unique and never shadow a form attribute."""
+    taken = set(dir(ScheduleForm)) | {'csrf_token'}
+    names = {}
+    for service in services:
+        base = re.sub(r'\W+', '_', service.lower()).strip('_') or 'service'
+        name, suffix = base, 2
+        while name in taken:
+            name, suffix = f"{base}_{suffix}", suffix + 1
+        taken.add(name)
+        names[service] = name
+    return names
+
+@lru_cache(maxsize=FORM_CACHE_SIZE)
+def _schedule_form_class(services):
+    fields = service_field_names(services)
+    form_class = type('DynamicScheduleForm', (ScheduleForm,), {
+        name: DateField(service, validators=[Optional()]) for service, name in fields.items()
+    })
+    form_class.service_fields = fields
+    return form_class
+
+def schedule_form_class(services):
+    """ScheduleForm subclass with a date field per service, built once per service list.
+
+    Field binding (WTForms' metaclass) then happens once per class instead of
+    on every request; ``service_fields`` maps each service to its field name.
+    """
+    return _schedule_form_class(normalize_services(services))
+
 # -------------------
 # Admin: Upload Estimate PDF
 # -------------------
@@ -71,6 +102,13 @@ class ProjectUploadForm(FlaskForm):
     file = FileField('Select File', validators=[DataRequired()])
     submit = SubmitField('Upload')
 
+# -------------------
+# Admin: Bulk Import
+# -------------------
+class DataImportForm(FlaskForm):
+    file = FileField('CSV or JSON Lines file', validators=[FileRequired(), FileAllowed(['csv', 'jsonl', 'json'])])
+    submit = SubmitField('Import')
+
 class MessageForm(FlaskForm):
     message = TextAreaField('Message', validators=[DataRequired()])
     submit = SubmitField('Send')
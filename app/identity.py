@@ -0,0 +1,118 @@
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import db
+from app.cache import MemoryBackend, cache
+
+# -------------------
+# Cached login identity
+# -------------------
+# Flask-Login calls the user_loader on every authenticated request. Instead of
+# fetching the whole User row (password hash included) each time, it gets a
+# small read-only Identity with the fields routes and templates actually use,
+# cached per process. A cached Identity is trusted without touching the
+# database for USER_CACHE_TTL seconds; after that it is checked against the
+# user's cache version ('user:<id>', see app/cache.py), which any committed
+# change to the User row replaces - in whichever process made it: another
+# worker, the job worker or `flask seed-admin` - and reloaded only if that
+# changed. Changes committed in this process drop its entry at once; other
+# processes pick them up within USER_CACHE_TTL seconds.
+
+
+class Identity:
+    __slots__ = ('id', 'role', 'full_name', 'email')
+
+    # Flask-Login user interface
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def __init__(self, id, role, full_name, email):
+        self.id = id
+        self.role = role
+        self.full_name = full_name
+        self.email = email
+
+    def get_id(self):
+        return str(self.id)
+
+    def __eq__(self, other):
+        return hasattr(other, 'get_id') and self.get_id() == other.get_id()
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<Identity {self.id} ({self.role})>"
+
+
+_identities = MemoryBackend(default_ttl=0)  # user id -> (checked_at, version, Identity)
+_trust_for = 60  # USER_CACHE_TTL
+
+
+def load_identity(user_id):
+    from app.models import User
+
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    now = time.monotonic()
+    entry = _identities.get(user_id)
+    if entry is not None and now - entry[0] < _trust_for:
+        return entry[2]
+
+    version = cache.version(f"user:{user_id}")
+    if entry is not None and entry[1] == version:
+        _identities.set(user_id, (now, version, entry[2]))
+        return entry[2]
+
+    row = db.session.execute(
+        db.select(User.id, User.role, User.full_name, User.email).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    identity = Identity(*row)
+    _identities.set(user_id, (now, version, identity))
+    return identity
+
+
+def init_app(app):
+    global _trust_for
+    _identities.max_entries = app.config['USER_CACHE_MAX_ENTRIES']
+    _trust_for = app.config['USER_CACHE_TTL']
+
+
+# -------------------
+# Invalidation on User changes
+# -------------------
+
+# Collected with the dashboard namespaces, so the user's version is replaced
+# by the committing transaction and rolled back edits change nothing. This
+# process also forgets the cached identities right after the commit.
+
+@event.listens_for(Session, 'after_flush')
+def _collect_user_changes(session, flush_context):
+    from app.models import User
+
+    namespaces = session.info.setdefault('cache_namespaces', set())
+    user_ids = session.info.setdefault('identity_ids', set())
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            user_id = inspect(obj).identity[0]
+            namespaces.add(f"user:{user_id}")
+            user_ids.add(user_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _forget_user_changes(session):
+    for user_id in session.info.pop('identity_ids', ()):
+        _identities.delete(user_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_user_changes(session):
+    session.info.pop('identity_ids', None)
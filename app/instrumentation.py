@@ -0,0 +1,356 @@
+import bisect
+import cProfile
+import hmac
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import traceback
+from datetime import datetime
+
+from flask import (
+    Response, abort, before_render_template, current_app, g, has_app_context, has_request_context, request,
+    template_rendered,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# -------------------
+# Request instrumentation (opt-in: INSTRUMENTATION=1)
+# -------------------
+# Per request: latency by endpoint, SQL statement count and time (cursor
+# events), template render time and uploaded bytes. Totals go to an
+# in-process registry exposed at /metrics in the Prometheus text format, and
+# to a Server-Timing header so the browser dev tools show the breakdown.
+# Queries slower than SLOW_QUERY_MS are logged with the app frame that issued
+# them. A request sent with "X-Profile: <PROFILE_TOKEN>" (or picked at
+# PROFILE_SAMPLE_RATE) runs under cProfile and its stats are written to
+# PROFILE_DIR for `python -m pstats` / snakeviz.
+#
+# Metrics are per process: with several gunicorn workers each scrape sees the
+# worker that answered it, so aggregate with sum()/rate() across scrapes.
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+PROFILE_HEADER = 'X-Profile'
+
+
+# ---- metric registry ----
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, description, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            lines.extend(self._samples(key, value))
+        return lines
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_labels(self.labels, key)} {_number(value)}"]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)  # first bound >= value
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _samples(self, key, value):
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, bucket in zip(self.buckets, counts):
+            cumulative += bucket
+            lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', '+Inf')])} {count}")
+        lines.append(f"{self.name}_sum{_labels(self.labels, key)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []  # callables run before each scrape (gauges read at scrape time)
+
+    def _add(self, metric):
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, description, labels=()):
+        return self._add(Counter(name, description, labels))
+
+    def gauge(self, name, description, labels=()):
+        return self._add(Gauge(name, description, labels))
+
+    def histogram(self, name, description, labels=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(name, description, labels, buckets))
+
+    def expose(self):
+        for collect in self.collectors:
+            collect()
+        return '\n'.join(line for metric in self.metrics.values() for line in metric.expose()) + '\n'
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method'))
+REQUESTS = registry.counter(
+    'http_requests_total', 'Requests by endpoint and status.', ('endpoint', 'method', 'status'))
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL statements per request.', ('endpoint',), QUERY_COUNT_BUCKETS)
+QUERY_SECONDS = registry.histogram(
+    'db_query_duration_seconds', 'SQL statement time by endpoint.', ('endpoint',))
+SLOW_QUERIES = registry.counter(
+    'db_slow_queries_total', 'SQL statements slower than SLOW_QUERY_MS.', ('endpoint',))
+TEMPLATE_SECONDS = registry.histogram(
+    'template_render_duration_seconds', 'render_template() time by template.', ('template',))
+UPLOAD_BYTES = registry.counter(
+    'http_upload_bytes_total', 'Bytes received in multipart uploads.', ('endpoint',))
+
+
+# ---- per-request state ----
+
+class RequestStats:
+    __slots__ = ('started', 'queries', 'query_time', 'template_time', 'template_starts', 'profiler', 'recorded')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.template_starts = []
+        self.profiler = None
+        self.recorded = False
+
+
+def _stats():
+    return g.get('_instrumentation') if has_request_context() else None
+
+
+def _endpoint():
+    return (request.endpoint or 'unmatched') if has_request_context() else 'background'
+
+
+# ---- SQL ----
+
+def _origin():
+    # Innermost frame of our own code (not this module) that led to the query
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(APP_DIR) and frame.filename != __file__:
+            return f"{os.path.relpath(frame.filename, os.path.dirname(APP_DIR))}:{frame.lineno} in {frame.name}"
+    return 'unknown'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('query_started')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_time += elapsed
+
+    endpoint = _endpoint()
+    QUERY_SECONDS.observe(elapsed, endpoint=endpoint)
+    threshold = current_app.config['SLOW_QUERY_MS'] if has_app_context() else None
+    if threshold and elapsed * 1000 >= threshold:
+        SLOW_QUERIES.inc(endpoint=endpoint)
+        logger.warning("Slow query (%.1f ms, %s) from %s: %s",
+                       elapsed * 1000, endpoint, _origin(), ' '.join(statement.split())[:500])
+
+
+def _query_failed(context):
+    starts = context.connection.info.get('query_started') if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+def _listen_for_queries():
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute),
+                           ('handle_error', _query_failed)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+# ---- templates ----
+
+def _template_starting(app, template, context, **extra):
+    stats = _stats()
+    if stats is not None:
+        stats.template_starts.append(time.perf_counter())
+
+
+def _template_done(app, template, context, **extra):
+    stats = _stats()
+    if stats is not None and stats.template_starts:
+        elapsed = time.perf_counter() - stats.template_starts.pop()
+        if not stats.template_starts:
+            stats.template_time += elapsed  # nested renders are counted once
+        TEMPLATE_SECONDS.observe(elapsed, template=template.name or 'string')
+
+
+# ---- profiling ----
+
+def _wants_profile():
+    config = current_app.config
+    token = config['PROFILE_TOKEN']
+    header = request.headers.get(PROFILE_HEADER)
+    if token and header and hmac.compare_digest(header, token):
+        return True
+    return config['PROFILE_SAMPLE_RATE'] > 0 and random.random() < config['PROFILE_SAMPLE_RATE']
+
+
+def _save_profile(profiler, response):
+    folder = current_app.config['PROFILE_DIR']
+    os.makedirs(folder, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%d-%H%M%S-%f}-{_endpoint().replace('.', '_')}.prof"
+    profiler.dump_stats(os.path.join(folder, name))
+    response.headers['X-Profile-File'] = name
+
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(15)
+    logger.info("Profiled %s %s -> %s\n%s", request.method, request.path, name, summary.getvalue())
+
+
+# ---- request hooks ----
+
+def _start_request():
+    if request.endpoint == 'metrics':
+        return
+    stats = g._instrumentation = RequestStats()
+    if _wants_profile():
+        stats.profiler = cProfile.Profile()
+        stats.profiler.enable()
+
+
+def _record(stats, status, response=None):
+    stats.recorded = True
+    if stats.profiler is not None:
+        stats.profiler.disable()
+        if response is not None:
+            _save_profile(stats.profiler, response)
+
+    elapsed = time.perf_counter() - stats.started
+    endpoint, method = _endpoint(), request.method
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, method=method)
+    REQUESTS.inc(endpoint=endpoint, method=method, status=status)
+    REQUEST_QUERIES.observe(stats.queries, endpoint=endpoint)
+    if request.content_length and request.mimetype == 'multipart/form-data':
+        UPLOAD_BYTES.inc(request.content_length, endpoint=endpoint)
+
+    if response is not None:
+        response.headers['Server-Timing'] = (
+            f'app;dur={elapsed * 1000:.1f}, '
+            f'db;dur={stats.query_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'tpl;dur={stats.template_time * 1000:.1f}'
+        )
+    logger.debug("%s %s %s %.1f ms, %d queries (%.1f ms), templates %.1f ms", method, endpoint, status,
+                 elapsed * 1000, stats.queries, stats.query_time * 1000, stats.template_time * 1000)
+
+
+def _finish_request(response):
+    stats = _stats()
+    if stats is not None and not stats.recorded:
+        _record(stats, response.status_code, response)
+    return response
+
+
+def _request_failed(exc):
+    # Unhandled exceptions skip after_request
+    stats = _stats()
+    if stats is not None and not stats.recorded and exc is not None:
+        _record(stats, 500)
+
+
+def metrics():
+    token = current_app.config['METRICS_TOKEN']
+    if token:
+        sent = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(sent, f"Bearer {token}"):
+            abort(401)
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(403)  # no token configured: local scrapers only
+    return Response(registry.expose(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    if not app.config['INSTRUMENTATION']:
+        return
+    _listen_for_queries()
+    before_render_template.connect(_template_starting, app)
+    template_rendered.connect(_template_done, app)
+    # Registered first so the other hooks' time is measured too
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_request)
+    app.after_request(_finish_request)
+    app.teardown_request(_request_failed)
+    app.add_url_rule('/metrics', 'metrics', metrics)
@@ -0,0 +1,220 @@
+import logging
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, event, inspect, or_, update
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import Job, JobStatus
+
+# -------------------
+# Durable job queue
+# -------------------
+# Slow work (image derivatives, PDFs, notifications) is stored as a row in the
+# `jobs` table in the same transaction as the request's own writes, then run
+# outside the request:
+#   * right after commit by a small in-process thread pool (JOBS_IN_PROCESS_WORKERS),
+#   * and by `flask jobs worker`, which also picks up retries and jobs whose
+#     worker died (their visibility timeout expired). A job that already used
+#     all its attempts when its worker died is marked failed instead, so a
+#     handler that keeps crashing the process is not retried forever.
+# Claiming is a conditional UPDATE, so any number of workers can share the
+# table on SQLite or Postgres without row locks.
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job(name):
+    """Register a function as the handler for jobs called ``name``."""
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=None):
+    """Add a job to the current session; it is queued when the session commits."""
+    if name not in _handlers:
+        raise ValueError(f"No job handler registered for {name!r}")
+
+    new_job = Job(
+        name=name,
+        payload=payload or {},
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+        max_attempts=max_attempts or current_app.config['JOBS_MAX_ATTEMPTS'],
+    )
+    db.session.add(new_job)
+    if not delay:
+        db.session.info.setdefault('jobs_to_dispatch', []).append(new_job)
+    return new_job
+
+
+def _claimable(now):
+    return or_(
+        and_(Job.status == JobStatus.QUEUED, Job.run_at <= now),
+        and_(Job.status == JobStatus.RUNNING, Job.locked_until < now, Job.attempts < Job.max_attempts),
+    )
+
+
+def claim(job_id):
+    """Atomically mark a job as running; returns the Job or None if taken."""
+    now = datetime.utcnow()
+    timeout = current_app.config['JOBS_VISIBILITY_TIMEOUT']
+    result = db.session.execute(
+        update(Job)
+        .where(Job.id == job_id, _claimable(now))
+        .values(
+            status=JobStatus.RUNNING,
+            locked_until=now + timedelta(seconds=timeout),
+            attempts=Job.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount != 1:
+        return None
+    return db.session.get(Job, job_id, populate_existing=True)
+
+
+def run(claimed):
+    handler = _handlers.get(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No job handler registered for {claimed.name!r}")
+        handler(**claimed.payload)
+    except Exception:
+        db.session.rollback()
+        claimed.last_error = traceback.format_exc()
+        if claimed.attempts >= claimed.max_attempts:
+            claimed.status = JobStatus.FAILED
+            claimed.finished_at = datetime.utcnow()
+            logger.error("Job %s (%s) failed permanently", claimed.id, claimed.name)
+        else:
+            # Exponential backoff before the next attempt
+            backoff = current_app.config['JOBS_RETRY_BACKOFF'] * 2 ** (claimed.attempts - 1)
+            claimed.status = JobStatus.QUEUED
+            claimed.run_at = datetime.utcnow() + timedelta(seconds=backoff)
+            logger.warning("Job %s (%s) failed, retrying in %ss", claimed.id, claimed.name, backoff)
+    else:
+        claimed.status = JobStatus.DONE
+        claimed.finished_at = datetime.utcnow()
+    claimed.locked_until = None
+    db.session.commit()
+
+
+def run_job(app, job_id):
+    # Each job gets its own app context and therefore its own DB session
+    with app.app_context():
+        try:
+            claimed = claim(job_id)
+            if claimed is not None:
+                run(claimed)
+        finally:
+            db.session.remove()
+
+
+def fail_abandoned_jobs():
+    """Mark expired running jobs with no attempts left as failed; returns how many."""
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == JobStatus.RUNNING, Job.locked_until < now, Job.attempts >= Job.max_attempts)
+        .values(
+            status=JobStatus.FAILED,
+            locked_until=None,
+            finished_at=now,
+            last_error='Worker stopped before the job finished (visibility timeout expired).',
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        logger.error("%s job(s) failed permanently: worker died on the last attempt", result.rowcount)
+    return result.rowcount
+
+
+def due_job_ids(limit):
+    now = datetime.utcnow()
+    rows = db.session.execute(
+        db.select(Job.id).where(_claimable(now)).order_by(Job.run_at).limit(limit)
+    )
+    return [row.id for row in rows]
+
+
+# -------------------
+# In-process dispatch after commit
+# -------------------
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_committed_jobs(session):
+    pending = session.info.pop('jobs_to_dispatch', None)
+    if not pending or not current_app:
+        return
+    executor = current_app.extensions.get('jobs')
+    if executor is None:
+        return  # no in-process workers: `flask jobs worker` will pick them up
+    app = current_app._get_current_object()
+    for queued in pending:
+        # The identity key is known after flush; reading .id would reload the row
+        executor.submit(run_job, app, inspect(queued).identity[0])
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_jobs(session):
+    session.info.pop('jobs_to_dispatch', None)
+
+
+# -------------------
+# CLI: flask jobs ...
+# -------------------
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('worker')
+@click.option('--concurrency', type=int, default=None, help='Jobs run in parallel.')
+@click.option('--poll-interval', type=float, default=None, help='Seconds between polls when idle.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def worker_command(concurrency, poll_interval, burst):
+    """Run queued jobs until interrupted."""
+    app = current_app._get_current_object()
+    concurrency = concurrency or app.config['JOBS_CONCURRENCY']
+    poll_interval = poll_interval or app.config['JOBS_POLL_INTERVAL']
+
+    click.echo(f"Job worker started ({concurrency} threads).")
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='jobs') as pool:
+        while True:
+            fail_abandoned_jobs()
+            job_ids = due_job_ids(concurrency)
+            db.session.remove()
+            if job_ids:
+                list(pool.map(lambda job_id: run_job(app, job_id), job_ids))
+                continue
+            if burst:
+                break
+            time.sleep(poll_interval)
+    click.echo("Job worker stopped.")
+
+
+@jobs_cli.command('status')
+def status_command():
+    """Show job counts per status."""
+    counts = db.session.execute(
+        db.select(Job.status, db.func.count(Job.id)).group_by(Job.status)
+    ).all()
+    for status, total in counts:
+        click.echo(f"{status}: {total}")
+
+
+def init_app(app):
+    workers = app.config['JOBS_IN_PROCESS_WORKERS']
+    if workers:
+        app.extensions['jobs'] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jobs')
+    app.cli.add_command(jobs_cli)
@@ -0,0 +1,226 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect
+
+from app import db
+
+# -------------------
+# Schema migrations
+# -------------------
+# Ordered, numbered steps applied once each by `flask init-db` and recorded in
+# the schema_migrations table. Steps are written to be idempotent (create
+# only what is missing) so they work both on a fresh database, where the
+# current models already contain every column, and on databases created by
+# the old db.create_all() at boot.
+
+_meta = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', _meta,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def decorator(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda step: step[0])
+        return func
+    return decorator
+
+
+# ---- helpers for writing steps ----
+
+def create_tables(conn, *models):
+    for model in models:
+        model.__table__.create(conn, checkfirst=True)
+        create_indexes(conn, model)
+
+
+def create_indexes(conn, model):
+    # Indexes on columns a later step adds are created by that step
+    existing = {col['name'] for col in inspect(conn).get_columns(model.__table__.name)}
+    for index in model.__table__.indexes:
+        if all(col.name in existing for col in index.columns):
+            index.create(conn, checkfirst=True)
+
+
+def add_column(conn, model, column_name):
+    table = model.__table__
+    existing = {col['name'] for col in inspect(conn).get_columns(table.name)}
+    if column_name in existing:
+        return False
+    column = table.c[column_name]
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column_name}" {column_type}')
+    return True
+
+
+# ---- steps ----
+
+@migration(1, 'baseline schema and listing indexes')
+def baseline(conn):
+    from app.models import User, EstimateRequest, Project, ProjectMessage, ProjectUpload
+    create_tables(conn, User, EstimateRequest, Project, ProjectMessage, ProjectUpload)
+
+
+@migration(2, 'background jobs table')
+def jobs_table(conn):
+    from app.models import Job
+    create_tables(conn, Job)
+
+
+@migration(3, 'normalized services and attachments with backfill')
+def normalize_services(conn):
+    from app.models import Service, EstimateService, ProjectService, Attachment, EstimateRequest, Project
+    create_tables(conn, Service, EstimateService, ProjectService, Attachment)
+
+    service_table = Service.__table__
+    service_ids = {row.name: row.id for row in conn.execute(service_table.select())}
+
+    def ids_for(raw):
+        names = list(dict.fromkeys(n.strip() for n in (raw or '').split(',') if n.strip()))
+        missing = [{'name': n} for n in names if n not in service_ids]
+        if missing:
+            conn.execute(service_table.insert(), missing)
+            service_ids.update({row.name: row.id for row in conn.execute(
+                service_table.select().where(service_table.c.name.in_([m['name'] for m in missing]))
+            )})
+        return [service_ids[n] for n in names]
+
+    def backfill_links(source, link_table, fk):
+        linked = {row[0] for row in conn.execute(link_table.select().with_only_columns(link_table.c[fk]))}
+        rows = []
+        for record in conn.execute(source.select().with_only_columns(source.c.id, source.c.services)).all():
+            if record.id in linked:
+                continue
+            rows.extend({fk: record.id, 'service_id': sid, 'position': pos}
+                        for pos, sid in enumerate(ids_for(record.services)))
+        if rows:
+            conn.execute(link_table.insert(), rows)  # one executemany
+
+    backfill_links(EstimateRequest.__table__, EstimateService.__table__, 'estimate_id')
+    backfill_links(Project.__table__, ProjectService.__table__, 'project_id')
+
+    attachment_table = Attachment.__table__
+    estimates = EstimateRequest.__table__
+    attached = {row[0] for row in conn.execute(attachment_table.select().with_only_columns(attachment_table.c.estimate_id))}
+    rows = []
+    for record in conn.execute(estimates.select().with_only_columns(estimates.c.id, estimates.c.image_filenames)).all():
+        if record.id in attached:
+            continue
+        keys = [k for k in (record.image_filenames or '').split(',') if k]
+        rows.extend({'estimate_id': record.id, 'kind': 'uploads', 'key': key, 'position': pos,
+                     'created_at': datetime.utcnow()} for pos, key in enumerate(keys))
+    if rows:
+        conn.execute(attachment_table.insert(), rows)
+
+
+@migration(4, 'schedule slots backfilled from schedule_data')
+def schedule_slots(conn):
+    from datetime import date
+    from app.models import ScheduleSlot, Service, Project
+    from app.scheduling import crew_for
+    create_tables(conn, ScheduleSlot)
+
+    slot_table = ScheduleSlot.__table__
+    service_table = Service.__table__
+    projects = Project.__table__
+    scheduled = {row[0] for row in conn.execute(slot_table.select().with_only_columns(slot_table.c.project_id))}
+    pending = [
+        record for record in conn.execute(
+            projects.select().with_only_columns(projects.c.id, projects.c.schedule_data)
+        ).all()
+        if record.id not in scheduled and record.schedule_data
+    ]
+
+    service_ids = {row.name: row.id for row in conn.execute(service_table.select())}
+    missing = {service for record in pending for service in record.schedule_data} - set(service_ids)
+    if missing:
+        conn.execute(service_table.insert(), [{'name': name} for name in sorted(missing)])
+        service_ids = {row.name: row.id for row in conn.execute(service_table.select())}
+
+    rows = []
+    for record in pending:
+        for service, day in record.schedule_data.items():
+            day = date.fromisoformat(day)
+            rows.append({'project_id': record.id, 'service_id': service_ids[service],
+                         'crew': crew_for(service), 'start_date': day, 'end_date': day})
+    if rows:
+        conn.execute(slot_table.insert(), rows)
+
+
+@migration(5, 'full-text search index')
+def search_index(conn):
+    from app.search import index_for, rebuild
+    if index_for(conn) is not None:
+        rebuild(conn)
+
+
+@migration(6, 'updated_at on estimates and projects')
+def updated_at_columns(conn):
+    from app.models import EstimateRequest, Project
+    for model, created in ((EstimateRequest, 'timestamp'), (Project, 'created_at')):
+        table = model.__table__
+        add_column(conn, model, 'updated_at')
+        conn.execute(table.update().where(table.c.updated_at.is_(None)).values(
+            updated_at=func.coalesce(table.c[created], datetime.utcnow())
+        ))
+        create_indexes(conn, model)
+
+
+@migration(7, 'service catalog tables seeded with the built-in services and prices')
+def service_catalog(conn):
+    from app.catalog import seed_defaults
+    from app.models import Service, ProjectType, ProjectTypeService
+    add_column(conn, Service, 'price')
+    add_column(conn, Service, 'unit')
+    create_tables(conn, ProjectType, ProjectTypeService)
+    seed_defaults(conn)
+
+
+@migration(8, 'cache version tokens shared by all processes')
+def cache_versions(conn):
+    from app.models import CacheVersion
+    create_tables(conn, CacheVersion)
+
+
+@migration(9, 'updated_at on users')
+def user_updated_at(conn):
+    from app.models import User
+    table = User.__table__
+    add_column(conn, User, 'updated_at')
+    conn.execute(table.update().where(table.c.updated_at.is_(None)).values(updated_at=datetime.utcnow()))
+
+
+# ---- runner ----
+
+def applied_versions(conn):
+    schema_migrations.create(conn, checkfirst=True)
+    return {row.version for row in conn.execute(schema_migrations.select())}
+
+
+def pending_migrations(engine=None):
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    return [step for step in MIGRATIONS if step[0] not in done]
+
+
+def upgrade(engine=None, echo=print):
+    """Apply every pending step, each in its own transaction."""
+    engine = engine or db.engine
+    applied = []
+    for version, name, step in pending_migrations(engine):
+        with engine.begin() as conn:
+            step(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        echo(f"Applied migration {version}: {name}")
+        applied.append(version)
+    return applied
@@ -1,7 +1,9 @@
 from app import db, login_manager
+from app.identity import load_identity
 from flask_login import UserMixin
 from datetime import datetime
 from sqlalchemy import JSON
+import enum
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -11,28 +13,73 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), default='customer')  # 'admin' or 'customer'
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Cached compact identity instead of a full User row per request
+    return load_identity(user_id)
 
 
 from sqlalchemy import JSON  # already imported
 
+
+# -------------------
+# Status values (stored as plain strings)
+# -------------------
+class EstimateStatus(str, enum.Enum):
+    WAITING_ESTIMATE = 'Waiting Estimate'
+    ESTIMATE_RECEIVED = 'Estimate Received'
+    APPROVED = 'Estimate Approved'
+    DECLINED = 'Declined'
+
+    def __str__(self):
+        return self.value
+
+
+class ProjectStatus(str, enum.Enum):
+    WAITING_ASSIGNMENT = 'Waiting Assignment'
+    PENDING_SCHEDULE = 'Pending Schedule'
+    WAITING_APPROVAL = 'Waiting for Schedule Approval'
+    SCHEDULE_APPROVED = 'Schedule Approved'
+    COMPLETED = 'Completed'
+
+    def __str__(self):
+        return self.value
+
+
 class EstimateRequest(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     estimate_number = db.Column(db.String(20), unique=True, nullable=False)
     customer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    customer = db.relationship('User', backref='estimates')
     project_type = db.Column(db.String(50), nullable=False)
     services = db.Column(db.Text, nullable=False)
     total_sqft = db.Column(db.Integer)
     details = db.Column(db.Text)
     sketch_filename = db.Column(db.String(100))  # Optional: keep one for compatibility
     image_filenames = db.Column(db.Text)  # ✅ NEW: stores comma-separated image names
-    status = db.Column(db.String(30), default='Waiting Estimate')
+    status = db.Column(db.String(30), default=EstimateStatus.WAITING_ESTIMATE)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     estimate_pdf = db.Column(db.String(100))
     customer_response = db.Column(db.String(20))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    # ✅ Normalized copies of `services` / `image_filenames` (indexed lookups)
+    service_links = db.relationship('EstimateService', lazy=True, cascade='all, delete-orphan',
+                                    order_by='EstimateService.position')
+    attachments = db.relationship('Attachment', lazy=True, cascade='all, delete-orphan',
+                                  order_by='Attachment.position')
+
+    @property
+    def service_names(self):
+        return [link.service.name for link in self.service_links]
+
+    # ✅ Indexes backing the keyset-paginated dashboards (newest first)
+    __table_args__ = (
+        db.Index('ix_estimate_request_status_timestamp', 'status', 'timestamp'),
+        db.Index('ix_estimate_request_customer_timestamp', 'customer_id', 'timestamp'),
+        db.Index('ix_estimate_request_timestamp_id', 'timestamp', 'id'),
+    )
 
 
 class Project(db.Model):
@@ -45,16 +92,33 @@ class Project(db.Model):
     total_sqft = db.Column(db.Integer)
     details = db.Column(db.Text)
     sketch_filename = db.Column(db.String(100))
-    status = db.Column(db.String(30), default='Pending Schedule')  # or Schedule Approved, Completed
+    status = db.Column(db.String(30), default=ProjectStatus.PENDING_SCHEDULE)  # see ProjectStatus
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     schedule_data = db.Column(JSON, nullable=True)
-    messages = db.relationship('ProjectMessage', backref='project', lazy=True, cascade='all, delete-orphan')
-    uploads = db.relationship('ProjectUpload', backref='project', lazy=True, cascade='all, delete-orphan')
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    messages = db.relationship('ProjectMessage', backref='project', lazy=True, cascade='all, delete-orphan',
+                               order_by='ProjectMessage.timestamp')
+    uploads = db.relationship('ProjectUpload', backref='project', lazy=True, cascade='all, delete-orphan',
+                              order_by='ProjectUpload.timestamp')
+    service_links = db.relationship('ProjectService', lazy=True, cascade='all, delete-orphan',
+                                    order_by='ProjectService.position')
+    schedule_slots = db.relationship('ScheduleSlot', lazy=True, cascade='all, delete-orphan',
+                                     order_by='ScheduleSlot.start_date')
+
+    @property
+    def service_names(self):
+        return [link.service.name for link in self.service_links]
+
+    __table_args__ = (
+        db.Index('ix_project_status_created_at', 'status', 'created_at'),
+        db.Index('ix_project_customer_status', 'customer_id', 'status'),
+        db.Index('ix_project_created_at_id', 'created_at', 'id'),
+    )
 
 class ProjectMessage(db.Model):
     __tablename__ = 'project_messages'
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     sender = db.Column(db.String(50))  # 'customer' or 'admin'
     content = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -62,6 +126,134 @@ class ProjectMessage(db.Model):
 class ProjectUpload(db.Model):
     __tablename__ = 'project_uploads'
     id = db.Column(db.Integer, primary_key=True)
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False, index=True)
     filename = db.Column(db.String(255), nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+# -------------------
+# Services and attachments (normalized)
+# -------------------
+class Service(db.Model):
+    __tablename__ = 'service'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    price = db.Column(db.Float)  # dollars; None = quoted on site
+    unit = db.Column(db.String(10))  # 'sqft' (price per square foot) or 'job'
+
+
+# -------------------
+# Service catalog (what customers can pick; see app/catalog.py)
+# -------------------
+class ProjectType(db.Model):
+    __tablename__ = 'project_type'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    service_links = db.relationship('ProjectTypeService', order_by='ProjectTypeService.position',
+                                    cascade='all, delete-orphan')
+
+
+class ProjectTypeService(db.Model):
+    __tablename__ = 'project_type_service'
+    project_type_id = db.Column(db.Integer, db.ForeignKey('project_type.id', ondelete='CASCADE'), primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    service = db.relationship('Service', lazy='joined')
+
+
+class EstimateService(db.Model):
+    __tablename__ = 'estimate_service'
+    estimate_id = db.Column(db.Integer, db.ForeignKey('estimate_request.id', ondelete='CASCADE'), primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)  # order the customer picked them in
+    service = db.relationship('Service', lazy='joined')
+
+    __table_args__ = (
+        db.Index('ix_estimate_service_service', 'service_id', 'estimate_id'),
+    )
+
+
+class ProjectService(db.Model):
+    __tablename__ = 'project_service'
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), primary_key=True)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    service = db.relationship('Service', lazy='joined')
+
+    __table_args__ = (
+        db.Index('ix_project_service_service', 'service_id', 'project_id'),
+    )
+
+
+class Attachment(db.Model):
+    __tablename__ = 'attachment'
+    id = db.Column(db.Integer, primary_key=True)
+    estimate_id = db.Column(db.Integer, db.ForeignKey('estimate_request.id', ondelete='CASCADE'),
+                            nullable=False, index=True)
+    kind = db.Column(db.String(30), nullable=False, default='uploads')  # storage kind, see app/storage.py
+    key = db.Column(db.String(255), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+# -------------------
+# Crew scheduling
+# -------------------
+class ScheduleSlot(db.Model):
+    __tablename__ = 'schedule_slot'
+    id = db.Column(db.Integer, primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), nullable=False, index=True)
+    service_id = db.Column(db.Integer, db.ForeignKey('service.id'), nullable=False)
+    crew = db.Column(db.String(100), nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)  # inclusive
+    service = db.relationship('Service', lazy='joined')
+
+    __table_args__ = (
+        db.Index('ix_schedule_slot_crew_start', 'crew', 'start_date'),
+        db.Index('ix_schedule_slot_service_start', 'service_id', 'start_date'),
+    )
+
+
+# -------------------
+# Cache versions (shared by every process, see app/cache.py)
+# -------------------
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_version'
+    namespace = db.Column(db.String(200), primary_key=True)
+    token = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+# -------------------
+# Background jobs
+# -------------------
+class JobStatus(str, enum.Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    def __str__(self):
+        return self.value
+
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default=JobStatus.QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # visibility timeout of a running job
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
@@ -0,0 +1,50 @@
+import base64
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+# -------------------
+# Keyset (cursor) pagination
+# -------------------
+# Pages are addressed by the (timestamp, id) of the last row shown instead of
+# an OFFSET, so fetching page 500 costs the same as page 1 as long as there is
+# an index covering (timestamp, id) or (filter, timestamp).
+
+
+def encode_cursor(timestamp, row_id):
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        # A tampered or stale cursor just restarts from the first page
+        return None
+
+
+def keyset_page(query, timestamp_col, id_col, cursor=None, per_page=25):
+    """Return ``(rows, next_cursor)`` for a newest-first page of ``query``."""
+    position = decode_cursor(cursor)
+    if position:
+        timestamp, row_id = position
+        query = query.filter(or_(
+            timestamp_col < timestamp,
+            and_(timestamp_col == timestamp, id_col < row_id)
+        ))
+
+    # Fetch one extra row to know whether a next page exists without a COUNT(*)
+    rows = query.order_by(timestamp_col.desc(), id_col.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, timestamp_col.key), getattr(last, id_col.key))
+
+    return rows, next_cursor
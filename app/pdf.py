@@ -0,0 +1,200 @@
+import zlib
+
+# -------------------
+# Minimal PDF writer
+# -------------------
+# Just enough PDF for text documents (estimates): Letter pages, text in the
+# standard Helvetica fonts every viewer ships (nothing to embed), lines and
+# filled boxes. Pages are built with Layout, turned into numbered objects with
+# compile_pages(), and several compiled parts are stitched into one file by
+# write_document(); a part that is the same for every document can be
+# compiled once and reused as-is.
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, in points
+MARGIN = 54
+
+FONTS = {'F1': 'Helvetica', 'F2': 'Helvetica-Bold'}
+FONT_OBJECTS = {'F1': 3, 'F2': 4}   # fixed numbers; 1 = catalog, 2 = page tree
+FIRST_FREE_OBJECT = 5
+
+# Glyph widths (1/1000 em) for characters 32..126 from the standard AFM metrics
+_WIDTHS = {
+    'F1': [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+           1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+           333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+           556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584],
+    'F2': [278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+           556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+           975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+           667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+           333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+           611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584],
+}
+
+
+def text_width(text, font='F1', size=10):
+    widths = _WIDTHS[font]
+    total = sum(widths[ord(ch) - 32] if 32 <= ord(ch) <= 126 else 556 for ch in text)
+    return total * size / 1000
+
+
+def wrap(text, width, font='F1', size=10):
+    """Split ``text`` into lines no wider than ``width`` points."""
+    lines = []
+    for paragraph in (text or '').splitlines() or ['']:
+        line = ''
+        for word in paragraph.split():
+            candidate = f"{line} {word}" if line else word
+            if line and text_width(candidate, font, size) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def _literal(text):
+    raw = text.encode('cp1252', 'replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+class Page:
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, font='F1', size=10, align='left'):
+        if align == 'right':
+            x -= text_width(text, font, size)
+        elif align == 'center':
+            x -= text_width(text, font, size) / 2
+        self.ops.append(b'BT /%s %g Tf %.2f %.2f Td %s Tj ET' % (font.encode(), size, x, y, _literal(text)))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.ops.append(b'%g w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def box(self, x, y, w, h, gray=0.9):
+        self.ops.append(b'q %g g %.2f %.2f %.2f %.2f re f Q' % (gray, x, y, w, h))
+
+    def content(self):
+        return b'\n'.join(self.ops)
+
+
+class Layout:
+    """Top-to-bottom flow of text across as many pages as it needs."""
+
+    def __init__(self, footer=None):
+        self.pages = []
+        self.footer = footer
+        self.new_page()
+
+    @property
+    def page(self):
+        return self.pages[-1]
+
+    def new_page(self):
+        self.pages.append(Page())
+        self.y = PAGE_HEIGHT - MARGIN
+        if self.footer:
+            self.page.text(PAGE_WIDTH / 2, MARGIN / 2, self.footer, size=8, align='center')
+
+    def ensure(self, height):
+        if self.y - height < MARGIN:
+            self.new_page()
+
+    def space(self, height):
+        self.y -= height
+
+    def heading(self, text, size=14):
+        self.ensure(size * 2.2)
+        self.y -= size * 1.4
+        self.page.text(MARGIN, self.y, text, font='F2', size=size)
+        self.y -= size * 0.6
+
+    def paragraph(self, text, font='F1', size=10, indent=0):
+        leading = size * 1.35
+        for line in wrap(text, PAGE_WIDTH - 2 * MARGIN - indent, font, size):
+            self.ensure(leading)
+            self.y -= leading
+            self.page.text(MARGIN + indent, self.y, line, font=font, size=size)
+
+    def row(self, cells, font='F1', size=10, shade=False):
+        """``cells`` are ``(x, text, align)``; x is measured from the left margin."""
+        leading = size * 1.6
+        self.ensure(leading)
+        self.y -= leading
+        if shade:
+            self.page.box(MARGIN, self.y - size * 0.45, PAGE_WIDTH - 2 * MARGIN, leading)
+        for x, text, align in cells:
+            self.page.text(MARGIN + x, self.y, text, font=font, size=size, align=align)
+
+    def rule(self):
+        self.ensure(6)
+        self.y -= 4
+        self.page.line(MARGIN, self.y, PAGE_WIDTH - MARGIN, self.y)
+
+
+class CompiledPages:
+    """Serialized page objects, numbered from ``first_number``."""
+
+    def __init__(self, objects, page_numbers, next_number):
+        self.objects = objects            # [(number, bytes)]
+        self.page_numbers = page_numbers  # object numbers of the /Page dicts
+        self.next_number = next_number
+
+
+def compile_pages(pages, first_number):
+    objects, page_numbers = [], []
+    number = first_number
+    fonts = b' '.join(b'/%s %d 0 R' % (name.encode(), num) for name, num in FONT_OBJECTS.items())
+    for page in pages:
+        content = zlib.compress(page.content())
+        page_number, content_number = number, number + 1
+        objects.append((page_number, (
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] '
+            b'/Resources << /Font << %s >> >> /Contents %d 0 R >>'
+        ) % (PAGE_WIDTH, PAGE_HEIGHT, fonts, content_number)))
+        objects.append((content_number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (
+            len(content), content)))
+        page_numbers.append(page_number)
+        number += 2
+    return CompiledPages(objects, page_numbers, number)
+
+
+def font_objects():
+    return [
+        (num, b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % FONTS[name].encode())
+        for name, num in FONT_OBJECTS.items()
+    ]
+
+
+def write_document(parts, title=''):
+    """Assemble compiled parts (in page order) and the fonts into PDF bytes."""
+    page_numbers = [num for part in parts for num in part.page_numbers]
+    objects = [
+        (1, b'<< /Type /Catalog /Pages 2 0 R >>'),
+        (2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+            b' '.join(b'%d 0 R' % num for num in page_numbers), len(page_numbers))),
+        *font_objects(),
+        *(obj for part in parts for obj in part.objects),
+    ]
+    info_number = max(num for num, _ in objects) + 1
+    objects.append((info_number, b'<< /Title %s /Producer (MULTTI) >>' % _literal(title)))
+    objects.sort()
+
+    out = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for num, body in objects:
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, body)
+
+    xref_at = len(out)
+    size = info_number + 1
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for num in range(1, size):
+        out += b'%010d 00000 n \n' % offsets[num]
+    out += b'trailer\n<< /Size %d /Root 1 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (
+        size, info_number, xref_at)
+    return bytes(out)
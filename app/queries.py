@@ -0,0 +1,182 @@
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only, selectinload
+
+from app import db
+from app.models import (
+    Attachment,
+    EstimateRequest,
+    EstimateService,
+    Project,
+    ProjectService,
+    ProjectStatus,
+    Service,
+)
+
+# -------------------
+# Reusable loader options
+# -------------------
+# Templates walk p.customer, p.messages and p.uploads inside loops. Loading
+# those relationships up front keeps every page at a fixed number of queries
+# (one per relationship) no matter how many rows it renders.
+
+
+def with_customer(model=Project):
+    # Many-to-one: a JOIN is cheaper than a second round trip
+    return joinedload(model.customer)
+
+
+def with_project_activity():
+    # One-to-many: SELECT ... WHERE project_id IN (...) avoids row explosion
+    return (
+        selectinload(Project.messages),
+        selectinload(Project.uploads),
+    )
+
+
+def projects_for_customer(customer_id):
+    return Project.query.filter_by(customer_id=customer_id)
+
+
+def project_with_activity(project_id):
+    return Project.query.options(
+        with_customer(),
+        *with_project_activity()
+    ).filter_by(id=project_id)
+
+
+def estimates_with_customer():
+    return EstimateRequest.query.options(with_customer(EstimateRequest))
+
+
+# -------------------
+# Status buckets
+# -------------------
+# Named groups of project statuses shown as separate tables. All groups of a
+# view are fetched with a single indexed status IN (...) query and split in
+# Python, instead of one query per table.
+
+ADMIN_ACTIVE = (
+    ProjectStatus.PENDING_SCHEDULE,
+    ProjectStatus.WAITING_APPROVAL,
+    ProjectStatus.SCHEDULE_APPROVED,
+)
+
+MANAGE_BUCKETS = {
+    'in_progress': (ProjectStatus.PENDING_SCHEDULE, ProjectStatus.SCHEDULE_APPROVED),
+    'waiting': (ProjectStatus.WAITING_APPROVAL,),
+    'completed': (ProjectStatus.COMPLETED,),
+}
+
+CUSTOMER_BUCKETS = {
+    'in_progress': (ProjectStatus.PENDING_SCHEDULE, ProjectStatus.SCHEDULE_APPROVED),
+    'completed': (ProjectStatus.COMPLETED,),
+}
+
+# Columns the project listing tables actually render
+LISTING_COLUMNS = (
+    Project.id,
+    Project.project_number,
+    Project.customer_id,
+    Project.project_type,
+    Project.status,
+    Project.created_at,
+)
+
+
+def bucket_projects(buckets, customer_id=None, columns=None, options=()):
+    """Fetch every project in ``buckets`` in one query and partition by status."""
+    lookup = {status.value: name for name, statuses in buckets.items() for status in statuses}
+
+    query = Project.query.filter(Project.status.in_(list(lookup)))
+    if customer_id is not None:
+        query = query.filter(Project.customer_id == customer_id)
+    if columns:
+        query = query.options(load_only(*columns))
+
+    grouped = {name: [] for name in buckets}
+    for project in query.options(*options).order_by(Project.created_at.desc()).all():
+        grouped[lookup[str(project.status)]].append(project)
+    return grouped
+
+
+def project_status_counts(customer_id=None):
+    """Per-status project counts from a single GROUP BY."""
+    query = db.session.query(Project.status, func.count(Project.id)).group_by(Project.status)
+    if customer_id is not None:
+        query = query.filter(Project.customer_id == customer_id)
+    counts = {status.value: 0 for status in ProjectStatus}
+    counts.update(dict(query.all()))
+    return counts
+
+
+# -------------------
+# Services and attachments
+# -------------------
+# The comma-joined `services` / `image_filenames` columns are still written for
+# display, but filtering and reporting go through the indexed link tables.
+
+def split_services(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def get_or_create_services(names):
+    """Return Service rows for ``names`` (in order), inserting missing ones."""
+    names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+    if not names:
+        return []
+
+    found = {service.name: service for service in Service.query.filter(Service.name.in_(names))}
+    for name in names:
+        if name in found:
+            continue
+        try:
+            # Savepoint: another request may insert the same name concurrently
+            with db.session.begin_nested():
+                found[name] = Service(name=name)
+                db.session.add(found[name])
+        except IntegrityError:
+            found[name] = Service.query.filter_by(name=name).one()
+    return [found[name] for name in names]
+
+
+def assign_services(record, names):
+    link_model = EstimateService if isinstance(record, EstimateRequest) else ProjectService
+    services = get_or_create_services(names)
+    record.services = ",".join(service.name for service in services)
+    record.service_links = [
+        link_model(service=service, position=position)
+        for position, service in enumerate(services)
+    ]
+
+
+def attach_images(estimate, keys, kind='uploads'):
+    estimate.image_filenames = ",".join(keys)
+    estimate.attachments = [
+        Attachment(kind=kind, key=key, position=position)
+        for position, key in enumerate(keys)
+    ]
+
+
+def projects_with_service(name, statuses=None):
+    query = Project.query.join(Project.service_links).join(ProjectService.service).filter(Service.name == name)
+    if statuses:
+        query = query.filter(Project.status.in_(statuses))
+    return query
+
+
+def estimates_with_service(name, statuses=None):
+    query = EstimateRequest.query.join(EstimateRequest.service_links).join(EstimateService.service) \
+        .filter(Service.name == name)
+    if statuses:
+        query = query.filter(EstimateRequest.status.in_(statuses))
+    return query
+
+
+def service_project_counts(statuses=None):
+    """(service name, number of projects) pairs, most used first."""
+    query = db.session.query(Service.name, func.count(ProjectService.project_id)) \
+        .join(ProjectService, ProjectService.service_id == Service.id)
+    if statuses:
+        query = query.join(Project, Project.id == ProjectService.project_id).filter(Project.status.in_(statuses))
+    return query.group_by(Service.name).order_by(func.count(ProjectService.project_id).desc()).all()
@@ -1,27 +1,58 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, Response, stream_with_context, abort
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
 from app import db
 from app.forms import (
     RegisterForm,
     LoginForm,
     EstimateRequestForm,
     AdminEstimateUploadForm,
-    SERVICES
+    MessageForm,
+    ProjectUploadForm,
+    DataImportForm,
+    schedule_form_class,
 )
-from app.models import User, EstimateRequest, Project
-import uuid, os
-from flask_wtf import FlaskForm
-from wtforms import DateField, SubmitField
-from wtforms.validators import Optional
-from flask import request
-from app.models import Project, ProjectMessage, ProjectUpload
-from app.forms import MessageForm
+from app.models import User, EstimateRequest, Project, ProjectMessage, ProjectUpload, EstimateStatus, ProjectStatus
+from app.pagination import keyset_page
+from app.storage import save_upload, upload_limit
+from app.thumbnails import schedule_derivatives
+from app.events import broker
+from app.scheduling import find_conflicts, next_free_dates, replace_project_slots
+from app.search import search, reindex
+from app.bulk import import_records, export_records, encode, format_for
+from app.estimates import issue_estimates, render_estimate_pdf
+from app.batch import apply_project_action, ACTIONS as BATCH_ACTIONS
+from app.cache import cache
+from app.catalog import current_catalog
+from app.queries import (
+    with_customer,
+    with_project_activity,
+    projects_for_customer,
+    project_with_activity,
+    estimates_with_customer,
+    bucket_projects,
+    project_status_counts,
+    ADMIN_ACTIVE,
+    MANAGE_BUCKETS,
+    CUSTOMER_BUCKETS,
+    LISTING_COLUMNS,
+    assign_services,
+    attach_images,
+    split_services
+)
+import uuid, json, time, io
+from datetime import date
 
 
 bp = Blueprint('main', __name__)
 
+
+@bp.app_errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    flash("File too large.")
+    return redirect(request.referrer or url_for('main.index'))
+
 # ------------------ AUTH ------------------
 
 @bp.route('/')
@@ -81,19 +112,30 @@ def customer_dashboard():
     if current_user.role != 'customer':
         return redirect(url_for('main.admin_dashboard'))
 
-    # Get all estimates for display
-    estimates = EstimateRequest.query.filter_by(customer_id=current_user.id).order_by(EstimateRequest.timestamp.desc()).all()
+    def render_tables():
+        # Get all estimates for display
+        estimates = EstimateRequest.query.filter_by(customer_id=current_user.id).order_by(EstimateRequest.timestamp.desc()).all()
 
-    # Also get active projects
-    projects = Project.query.filter_by(customer_id=current_user.id).order_by(Project.created_at.desc()).all()
+        # Also get active projects
+        projects = projects_for_customer(current_user.id).order_by(Project.created_at.desc()).all()
 
-    return render_template('customer_dashboard.html', estimates=estimates, projects=projects)
+        return render_template('_customer_dashboard_tables.html', estimates=estimates, projects=projects)
+
+    # ✅ Cached until one of this customer's estimates or projects changes
+    tables = cache.fragment(
+        'customer_dashboard', [f"customer:{current_user.id}"], render_tables,
+        ttl=current_app.config['DASHBOARD_CACHE_TTL'], vary=[current_user.id]
+    )
+    return render_template('customer_dashboard.html', tables=tables)
 
 @bp.route('/request-estimate', methods=['GET', 'POST'])
 @login_required
+@upload_limit('ESTIMATE_PHOTOS_MAX_BYTES')
 def request_estimate():
     form = EstimateRequestForm()
-    form.services.choices = [(s, s) for s in SERVICES.get(form.project_type.data, [])]
+    catalog = current_catalog()
+    form.project_type.choices = catalog.project_type_choices
+    form.services.choices = catalog.service_choices(form.project_type.data)
 
     if form.validate_on_submit():
         estimate_number = f"EST-{uuid.uuid4().hex[:8].upper()}"
@@ -102,14 +144,10 @@ def request_estimate():
 
         # Handle multiple image uploads (up to 5)
         if form.images.data:
-            upload_path = os.path.join(current_app.root_path, 'static/uploads')
-            os.makedirs(upload_path, exist_ok=True)
-
             for file in form.images.data[:5]:
                 if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    file.save(os.path.join(upload_path, filename))
-                    image_filenames.append(filename)
+                    image_filenames.append(save_upload(file, 'uploads'))
+                    schedule_derivatives('uploads', image_filenames[-1])
 
         # Backward compatibility (optional)
         sketch_filename = image_filenames[0] if image_filenames else None
@@ -118,12 +156,13 @@ def request_estimate():
             estimate_number=estimate_number,
             customer_id=current_user.id,
             project_type=form.project_type.data,
-            services=",".join(request.form.getlist('services')),
             total_sqft=form.total_sqft.data,
             details=form.details.data,
-            sketch_filename=sketch_filename,
-            image_filenames=",".join(image_filenames)  # ✅ THIS WAS MISSING
+            sketch_filename=sketch_filename
         )
+        # ✅ Fills the comma-joined columns and the indexed link/attachment rows
+        assign_services(estimate, request.form.getlist('services'))
+        attach_images(estimate, image_filenames)
 
         db.session.add(estimate)
         db.session.commit()
@@ -131,10 +170,24 @@ def request_estimate():
         flash("Estimate request submitted.")
         return redirect(url_for('main.customer_dashboard'))
 
-    return render_template('request_estimate.html', form=form, services_json=SERVICES)
+    return render_template('request_estimate.html', form=form, catalog=catalog)
+
 
+@bp.route('/catalog.json')
+def catalog_json():
+    # Project types and their services for the estimate/new project forms.
+    # Pages link it as ?v=<etag>, so a versioned URL can be cached for long;
+    # anything else is revalidated against the ETag.
+    catalog = current_catalog()
+    response = current_app.response_class(catalog.json, mimetype='application/json')
+    response.set_etag(catalog.etag)
+    if request.args.get('v') == catalog.etag:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config['CATALOG_MAX_AGE']
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
-from app.forms import MessageForm
 
 @bp.route('/track-projects')
 @login_required
@@ -142,18 +195,15 @@ def track_projects():
     if current_user.role != 'customer':
         return redirect(url_for('main.admin_dashboard'))
 
-    in_progress = Project.query.filter_by(customer_id=current_user.id).filter(
-        Project.status.in_(['Pending Schedule', 'Schedule Approved'])
-    ).all()
-
-    completed = Project.query.filter_by(customer_id=current_user.id, status='Completed').all()
+    # Both tables in one query; messages and uploads are rendered per card, so load them in bulk
+    buckets = bucket_projects(CUSTOMER_BUCKETS, customer_id=current_user.id, options=with_project_activity())
 
     form = MessageForm()
 
     return render_template(
         'track_projects.html',
-        in_progress=in_progress,
-        completed=completed,
+        in_progress=buckets['in_progress'],
+        completed=buckets['completed'],
         form=form
     )
 
@@ -166,23 +216,41 @@ def admin_dashboard():
     if current_user.role != 'admin':
         return redirect(url_for('main.customer_dashboard'))
 
-    # Get all in-progress projects
-    in_progress_projects = Project.query.filter(
-        Project.status.in_([
-            'Pending Schedule',
-            'Waiting for Schedule Approval',
-            'Schedule Approved'
-        ])
-    ).all()
+    def render_tables():
+        per_page = current_app.config['ADMIN_PAGE_SIZE']
 
-    # ✅ Get all estimate requests, ordered by newest first
-    estimate_requests = EstimateRequest.query.order_by(EstimateRequest.timestamp.desc()).all()
+        # In-progress projects, one keyset page at a time
+        in_progress_projects, next_projects_cursor = keyset_page(
+            Project.query.options(with_customer()).filter(Project.status.in_(ADMIN_ACTIVE)),
+            Project.created_at, Project.id,
+            cursor=request.args.get('projects_after'),
+            per_page=per_page
+        )
 
-    return render_template(
-        'admin_dashboard.html',
-        in_progress_projects=in_progress_projects,
-        estimate_requests=estimate_requests
+        # ✅ Estimate requests, newest first, one keyset page at a time
+        estimate_requests, next_estimates_cursor = keyset_page(
+            estimates_with_customer(),
+            EstimateRequest.timestamp, EstimateRequest.id,
+            cursor=request.args.get('estimates_after'),
+            per_page=per_page
+        )
+
+        return render_template(
+            '_admin_dashboard_tables.html',
+            status_counts=project_status_counts(),
+            in_progress_projects=in_progress_projects,
+            estimate_requests=estimate_requests,
+            next_projects_cursor=next_projects_cursor,
+            next_estimates_cursor=next_estimates_cursor
+        )
+
+    # ✅ Cached per page until any estimate, project or message changes
+    tables = cache.fragment(
+        'admin_dashboard', ['admin'], render_tables,
+        ttl=current_app.config['DASHBOARD_CACHE_TTL'],
+        vary=[current_user.id, request.args.get('projects_after'), request.args.get('estimates_after')]
     )
+    return render_template('admin_dashboard.html', tables=tables)
 
 @bp.route('/admin/estimate-requests')
 @login_required
@@ -190,30 +258,79 @@ def admin_estimate_requests():
     if current_user.role != 'admin':
         return redirect(url_for('main.customer_dashboard'))
 
-    pending = EstimateRequest.query.filter_by(status='Waiting Estimate').all()
+    pending = estimates_with_customer().filter_by(status=EstimateStatus.WAITING_ESTIMATE).all()
     return render_template('admin_estimate_requests.html', pending=pending)
 
 
+@bp.route('/admin/search')
+@login_required
+def admin_search():
+    if current_user.role != 'admin':
+        return redirect(url_for('main.customer_dashboard'))
+
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    results, has_next = search(query, page=page, per_page=current_app.config['ADMIN_PAGE_SIZE'])
+    return render_template('admin_search.html', query=query, results=results, page=page, has_next=has_next)
+
+
+@bp.route('/admin/data', methods=['GET', 'POST'])
+@login_required
+@upload_limit('IMPORT_MAX_BYTES')
+def admin_data():
+    if current_user.role != 'admin':
+        return redirect(url_for('main.customer_dashboard'))
+
+    form = DataImportForm()
+    if form.validate_on_submit():
+        upload = form.file.data
+        # Read straight from the upload stream, chunk by chunk
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        result = import_records(stream, format_for(upload.filename))
+        flash(result.summary())
+        for line_no, message in result.errors[:10]:
+            flash(f"Line {line_no}: {message}")
+        return redirect(url_for('main.admin_data'))
+
+    return render_template('admin_data.html', form=form)
+
+
+@bp.route('/admin/data/export/<kind>.<fmt>')
+@login_required
+def admin_data_export(kind, fmt):
+    if current_user.role != 'admin':
+        abort(403)
+    if kind not in ('all', 'customers', 'estimates', 'projects') or fmt not in ('csv', 'jsonl'):
+        abort(404)
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    rows = encode(export_records(kind.rstrip('s')), fmt)
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={kind}.{fmt}'}
+    )
+
+
 # ✅ SINGLE, CORRECT ADMIN VIEW (NO DUPLICATES)
 @bp.route('/admin/estimate/<int:estimate_id>/view', methods=['GET', 'POST'])
 @login_required
+@upload_limit('ESTIMATE_PDF_MAX_BYTES')
 def admin_view_estimate_request(estimate_id):
     if current_user.role != 'admin':
         return redirect(url_for('main.customer_dashboard'))
 
-    estimate = EstimateRequest.query.get_or_404(estimate_id)
-    customer = User.query.get(estimate.customer_id)
+    estimate = estimates_with_customer().filter_by(id=estimate_id).first_or_404()
+    customer = estimate.customer
     form = AdminEstimateUploadForm()
 
     if form.validate_on_submit():
-        upload_path = os.path.join(current_app.root_path, 'static/estimates')
-        os.makedirs(upload_path, exist_ok=True)
-
-        filename = f"{estimate.estimate_number}_{secure_filename(form.estimate_pdf.data.filename)}"
-        form.estimate_pdf.data.save(os.path.join(upload_path, filename))
-
-        estimate.estimate_pdf = filename
-        estimate.status = 'Estimate Received'
+        pdf = form.estimate_pdf.data
+        estimate.estimate_pdf = save_upload(
+            pdf, 'estimates',
+            filename=f"{estimate.estimate_number}_{pdf.filename}"
+        )
+        estimate.status = EstimateStatus.ESTIMATE_RECEIVED
         db.session.commit()
 
         flash("Estimate uploaded and sent to customer.")
@@ -226,6 +343,34 @@ def admin_view_estimate_request(estimate_id):
         form=form
     )
 
+@bp.route('/admin/estimates/issue', methods=['POST'])
+@login_required
+def issue_estimate_pdfs():
+    if current_user.role != 'admin':
+        return redirect(url_for('main.customer_dashboard'))
+
+    estimate_ids = request.form.getlist('estimate_ids', type=int)
+    if not estimate_ids:
+        flash("Select at least one estimate request.")
+        return redirect(request.referrer or url_for('main.admin_estimate_requests'))
+
+    # ✅ Rendered by the background workers; each is sent once its PDF is ready
+    issue_estimates(estimate_ids)
+    db.session.commit()
+    flash(f"Generating {len(estimate_ids)} estimate(s). They are sent to the customers as soon as they are ready.")
+    return redirect(url_for('main.admin_estimate_requests'))
+
+
+@bp.route('/admin/estimate/<int:estimate_id>/preview.pdf')
+@login_required
+def preview_estimate_pdf(estimate_id):
+    if current_user.role != 'admin':
+        abort(403)
+
+    estimate = estimates_with_customer().filter_by(id=estimate_id).first_or_404()
+    return Response(render_estimate_pdf(estimate), mimetype='application/pdf',
+                    headers={'Content-Disposition': f'inline; filename={estimate.estimate_number}.pdf'})
+
 # ------------------ CUSTOMER APPROVAL ------------------
 
 @bp.route('/estimate/<int:estimate_id>/approve')
@@ -238,7 +383,7 @@ def approve_estimate(estimate_id):
         return redirect(url_for('main.customer_dashboard'))
 
     # Update estimate status
-    estimate.status = 'Estimate Approved'
+    estimate.status = EstimateStatus.APPROVED
     estimate.customer_response = 'Approved'
 
     # ✅ Check if project already exists
@@ -249,12 +394,12 @@ def approve_estimate(estimate_id):
             project_number=estimate.estimate_number,
             customer_id=estimate.customer_id,
             project_type=estimate.project_type,
-            services=estimate.services,
             total_sqft=estimate.total_sqft,
             details=estimate.details,
             sketch_filename=estimate.sketch_filename,
-            status='Pending Schedule'  # Project is born here
+            status=ProjectStatus.PENDING_SCHEDULE  # Project is born here
         )
+        assign_services(project, estimate.service_names or split_services(estimate.services))
         db.session.add(project)
 
     db.session.commit()
@@ -271,7 +416,7 @@ def decline_estimate(estimate_id):
     if estimate.customer_id != current_user.id:
         return redirect(url_for('main.customer_dashboard'))
 
-    estimate.status = 'Declined'
+    estimate.status = EstimateStatus.DECLINED
     estimate.customer_response = 'Declined'
     db.session.commit()
 
@@ -279,12 +424,6 @@ def decline_estimate(estimate_id):
     return redirect(url_for('main.customer_dashboard'))
 
 
-# 🔧 Form class for scheduling
-class ScheduleForm(FlaskForm):
-    # We'll add date fields dynamically
-    submit = SubmitField("Send Schedule to Customer")
-
-
 @bp.route('/admin/project/<int:project_id>/schedule', methods=['GET', 'POST'])
 @login_required
 def schedule_project(project_id):
@@ -294,44 +433,64 @@ def schedule_project(project_id):
 
     project = Project.query.get_or_404(project_id)
 
-    # Convert services to list
-    service_list = project.services.split(',')
+    # Services in the order they were picked (normalized link rows)
+    service_list = project.service_names or split_services(project.services)
 
-    # Create dynamic fields in the form
-    class DynamicScheduleForm(ScheduleForm):
-        pass
-
-    for service in service_list:
-        field_name = service.strip().replace(" ", "_").lower()
-        setattr(
-            DynamicScheduleForm,
-            field_name,
-            DateField(service.strip(), validators=[Optional()])
-        )
-
-    form = DynamicScheduleForm()
+    # ✅ One date field per service; the class is built once per service list
+    form_class = schedule_form_class(service_list)
+    service_fields = form_class.service_fields
+    form = form_class()
 
     if form.validate_on_submit():
         # Save selected dates as a dictionary
         service_dates = {}
-        for service in service_list:
-            field_name = service.strip().replace(" ", "_").lower()
-            selected_date = getattr(form, field_name).data
+        for service, field_name in service_fields.items():
+            selected_date = form[field_name].data
             if selected_date:
-                service_dates[service.strip()] = selected_date.strftime('%Y-%m-%d')
+                service_dates[service] = selected_date
+
+        # ✅ Refuse double-booking a crew unless the admin overrides it
+        conflicts = find_conflicts(
+            {service: (day, day) for service, day in service_dates.items()},
+            exclude_project_id=project.id
+        )
+        if conflicts and not form.force.data:
+            for service, slots in conflicts.items():
+                booked = ", ".join(sorted({f"#{slot.project_id}" for slot in slots}))
+                form[service_fields[service]].errors.append(f"Crew already booked on this date (project {booked}).")
+            flash("Some dates clash with other projects. Pick another date or tick 'Book anyway'.")
+        else:
+            # Save the schedule to project
+            project.schedule_data = {service: day.strftime('%Y-%m-%d') for service, day in service_dates.items()}
+            replace_project_slots(project, service_dates)
 
-        # Save the schedule to project
-        project.schedule_data = service_dates
+            # ✅ Set correct status
+            project.status = ProjectStatus.WAITING_APPROVAL
 
-        # ✅ Set correct status
-        project.status = 'Waiting for Schedule Approval'
+            db.session.commit()
 
-        db.session.commit()
+            flash("Schedule submitted to customer for approval.")
+            return redirect(url_for('main.admin_dashboard'))
 
-        flash("Schedule submitted to customer for approval.")
-        return redirect(url_for('main.admin_dashboard'))
+    suggestions = next_free_dates(list(service_fields), exclude_project_id=project.id)
+    return render_template('schedule_project.html', form=form, project=project, service_fields=service_fields,
+                           suggestions=suggestions)
+
+
+@bp.route('/admin/schedule/next-free')
+@login_required
+def schedule_next_free():
+    if current_user.role != 'admin':
+        abort(403)
 
-    return render_template('schedule_project.html', form=form, project=project, services=service_list)
+    services = [s for s in request.args.getlist('service') if s.strip()]
+    try:
+        after = date.fromisoformat(request.args['after']) if request.args.get('after') else None
+    except ValueError:
+        abort(400)
+    exclude = request.args.get('exclude_project', type=int)
+    suggestions = next_free_dates(services, after=after, exclude_project_id=exclude)
+    return jsonify({service: day.isoformat() for service, day in suggestions.items()})
 
 @bp.route('/project/<int:project_id>/approve-schedule')
 @login_required
@@ -341,7 +500,7 @@ def approve_schedule(project_id):
         flash("Access denied.")
         return redirect(url_for('main.customer_dashboard'))
 
-    project.status = 'Schedule Approved'
+    project.status = ProjectStatus.SCHEDULE_APPROVED
     db.session.commit()
     flash("Schedule approved. Project is now in progress.")
     return redirect(url_for('main.track_projects'))
@@ -355,20 +514,19 @@ def request_new_schedule(project_id):
         flash("Access denied.")
         return redirect(url_for('main.customer_dashboard'))
 
-    project.status = 'Pending Schedule'
+    project.status = ProjectStatus.PENDING_SCHEDULE
     db.session.commit()
     flash("Schedule rejected. Admin will assign new dates.")
     return redirect(url_for('main.track_projects'))
 
 @bp.route('/admin/new-project', methods=['GET', 'POST'])
 @login_required
+@upload_limit('ESTIMATE_PHOTOS_MAX_BYTES')
 def create_new_project():
     if current_user.role != 'admin':
         flash("Access denied.")
         return redirect(url_for('main.customer_dashboard'))
 
-    from app.forms import SERVICES  # service types
-
     if request.method == 'POST':
         full_name = request.form['full_name']
         address = request.form['address']
@@ -387,45 +545,43 @@ def create_new_project():
 
         # Handle sketch upload
         sketch_filename = None
-        if sketch:
-            sketch_filename = secure_filename(sketch.filename)
-            upload_path = os.path.join(current_app.root_path, 'static/uploads')
-            os.makedirs(upload_path, exist_ok=True)
-            sketch.save(os.path.join(upload_path, sketch_filename))
+        if sketch and sketch.filename:
+            sketch_filename = save_upload(sketch, 'uploads')
+            schedule_derivatives('uploads', sketch_filename)
 
         # Generate project number
         project_number = f"PROJ-{uuid.uuid4().hex[:8].upper()}"
 
         # Determine project status
         if user:
-            status = 'Pending Schedule'
+            status = ProjectStatus.PENDING_SCHEDULE
         else:
-            status = 'Waiting Assignment'
+            status = ProjectStatus.WAITING_ASSIGNMENT
 
         # Create project
         project = Project(
             project_number=project_number,
             customer_id=user.id if user else None,
             project_type=project_type,
-            services=",".join(services),
             total_sqft=total_sqft,
             details=details,
             sketch_filename=sketch_filename,
             status=status
         )
+        assign_services(project, services)
         db.session.add(project)
         db.session.commit()
 
         flash('Project created successfully.')
         return redirect(url_for('main.admin_dashboard'))
 
-    services_json = SERVICES
-    return render_template('admin_new_project.html', services_json=services_json)
+    return render_template('admin_new_project.html', catalog=current_catalog())
 
 
 
 @bp.route('/admin/project/<int:project_id>/upload', methods=['POST'])
 @login_required
+@upload_limit('PROJECT_FILE_MAX_BYTES')
 def upload_project_file(project_id):
     if current_user.role != 'admin':
         flash("Access denied.")
@@ -435,20 +591,12 @@ def upload_project_file(project_id):
     project = Project.query.get_or_404(project_id)
 
     if form.validate_on_submit():
-        file = form.file.data
-        filename = secure_filename(file.filename)
-
-        upload_path = os.path.join(current_app.root_path, 'static/project_uploads')
-        os.makedirs(upload_path, exist_ok=True)
-
-        file_path = os.path.join(upload_path, filename)
-        file.save(file_path)
-
-        # Save record in DB
+        # Save record in DB (filename holds the storage key)
         upload = ProjectUpload(
             project_id=project.id,
-            filename=filename
+            filename=save_upload(form.file.data, 'project_uploads')
         )
+        schedule_derivatives('project_uploads', upload.filename)
         db.session.add(upload)
         db.session.commit()
 
@@ -478,6 +626,7 @@ def send_project_message(project_id):
         )
         db.session.add(message)
         db.session.commit()
+        broker.publish(project.id, message.id)  # wake open message feeds
         flash("Message sent.")
     else:
         flash("Message cannot be empty.")
@@ -498,23 +647,141 @@ def send_project_message(project_id):
         flash('Message sent.')
     return redirect(url_for('main.track_projects'))
 
+
+# ------------------ LIVE MESSAGE FEED ------------------
+# One connection per page carries the new messages of every project the page
+# shows (?projects=1,2,3). Message ids are global, so a single "after" id
+# covers them all. See MESSAGE_STREAMING in config.py for SSE vs polling.
+
+@bp.app_template_global()
+def message_feed(project_ids):
+    """data-* attributes that point message_feed.js at the feed for ``project_ids``."""
+    projects = ','.join(str(project_id) for project_id in project_ids)
+    if not projects:
+        return {}
+    config = current_app.config
+    attributes = {'data-feed-poll': url_for('main.messages_since', projects=projects)}
+    if config['MESSAGE_STREAMING']:
+        attributes['data-feed-stream'] = url_for('main.messages_stream', projects=projects)
+        attributes.update({'data-feed-wait': config['MESSAGE_POLL_MAX_WAIT'], 'data-feed-interval': 0})
+    else:
+        attributes.update({'data-feed-wait': config['MESSAGE_POLL_WAIT'],
+                           'data-feed-interval': config['MESSAGE_POLL_INTERVAL']})
+    return attributes
+
+
+def _feed_projects():
+    try:
+        project_ids = {int(value) for value in request.args.get('projects', '').split(',') if value}
+    except ValueError:
+        abort(400)
+    if not project_ids or len(project_ids) > current_app.config['MESSAGE_FEED_MAX_PROJECTS']:
+        abort(400)
+    query = db.select(Project.id).where(Project.id.in_(project_ids))
+    if current_user.role != 'admin':
+        query = query.where(Project.customer_id == current_user.id)
+    if set(db.session.execute(query).scalars()) != project_ids:
+        abort(403)
+    return sorted(project_ids)
+
+
+def _messages_after(project_ids, last_seen_id):
+    messages = ProjectMessage.query.filter(
+        ProjectMessage.project_id.in_(project_ids),
+        ProjectMessage.id > last_seen_id
+    ).order_by(ProjectMessage.id).all()
+    payload = [{
+        'id': m.id,
+        'project_id': m.project_id,
+        'sender': m.sender,
+        'content': m.content,
+        'timestamp': m.timestamp.strftime('%Y-%m-%d %H:%M')
+    } for m in messages]
+    # Give the connection back to the pool while this client idles
+    db.session.close()
+    return payload
+
+
+@bp.route('/messages')
+@login_required
+def messages_since():
+    # JSON delta for polling clients; ?wait= turns it into a long poll
+    project_ids = _feed_projects()
+    after = request.args.get('after', 0, type=int)
+    wait = min(request.args.get('wait', 0, type=float), current_app.config['MESSAGE_POLL_MAX_WAIT'])
+
+    messages = _messages_after(project_ids, after)
+    if not messages and wait > 0 and broker.wait(project_ids, after, timeout=wait):
+        messages = _messages_after(project_ids, after)
+
+    return jsonify(messages=messages, last_id=messages[-1]['id'] if messages else after)
+
+
+@bp.route('/messages/stream')
+@login_required
+def messages_stream():
+    project_ids = _feed_projects()
+    last_seen = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', 0, type=int)
+
+    heartbeat = current_app.config['MESSAGE_STREAM_HEARTBEAT']
+    resync = current_app.config['MESSAGE_STREAM_RESYNC']
+    deadline = time.monotonic() + current_app.config['MESSAGE_STREAM_MAX_SECONDS']
+
+    def events(last_seen):
+        yield f"retry: {current_app.config['MESSAGE_STREAM_RETRY_MS']}\n\n"
+        check_db = True  # catch up once on connect
+        since_resync = 0
+        while time.monotonic() < deadline:
+            if check_db:
+                for message in _messages_after(project_ids, last_seen):
+                    last_seen = message['id']
+                    yield f"id: {message['id']}\ndata: {json.dumps(message)}\n\n"
+                since_resync = 0
+
+            published = broker.wait(project_ids, last_seen, timeout=heartbeat)
+            since_resync += heartbeat
+            check_db = published or (resync and since_resync >= resync)
+            if not published:
+                yield ": keep-alive\n\n"
+        # The browser reconnects with Last-Event-ID, freeing this worker meanwhile
+
+    return Response(
+        stream_with_context(events(last_seen)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/admin/projects/manage')
 @login_required
 def manage_projects():
     if current_user.role != 'admin':
         return redirect(url_for('main.customer_dashboard'))
 
-    # Projects sorted by status
-    in_progress = Project.query.filter(Project.status.in_(['Pending Schedule', 'Schedule Approved'])).all()
-    waiting = Project.query.filter(Project.status == 'Waiting for Schedule Approval').all()
-    completed = Project.query.filter(Project.status == 'Completed').all()
+    # Projects sorted by status, all three tables from one query
+    buckets = bucket_projects(MANAGE_BUCKETS, columns=LISTING_COLUMNS, options=(with_customer(),))
 
     return render_template('manage_projects.html',
-                           in_progress=in_progress,
-                           waiting=waiting,
-                           completed=completed)
+                           in_progress=buckets['in_progress'],
+                           waiting=buckets['waiting'],
+                           completed=buckets['completed'])
 
-from app.forms import MessageForm, ProjectUploadForm  # ✅ Make sure both are imported
+@bp.route('/admin/projects/batch', methods=['POST'])
+@login_required
+def batch_projects():
+    if current_user.role != 'admin':
+        abort(403)
+
+    action = request.form.get('action')
+    project_ids = request.form.getlist('project_ids', type=int)
+    if action not in BATCH_ACTIONS:
+        abort(400)
+
+    # ✅ One set-based statement per table, one transaction, one summary
+    result = apply_project_action(action, project_ids)
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify(result.as_dict())
+    flash(result.summary())
+    return redirect(url_for('main.manage_projects'))
 
 @bp.route('/admin/project/<int:project_id>/view', methods=['GET', 'POST'])
 @login_required
@@ -523,12 +790,11 @@ def view_project_admin(project_id):
         flash("Access denied.")
         return redirect(url_for('main.customer_dashboard'))
 
-    project = Project.query.get_or_404(project_id)
+    # Customer, messages and uploads come back with the project in fixed queries
+    project = project_with_activity(project_id).first_or_404()
     customer = project.customer
-    messages = ProjectMessage.query.filter_by(project_id=project.id)\
-        .order_by(ProjectMessage.timestamp.desc()).all()
-    uploads = ProjectUpload.query.filter_by(project_id=project.id)\
-        .order_by(ProjectUpload.timestamp.desc()).all()
+    messages = list(reversed(project.messages))  # newest first
+    uploads = list(reversed(project.uploads))
 
     message_form = MessageForm()
     upload_form = ProjectUploadForm()
@@ -552,7 +818,7 @@ def mark_project_complete(project_id):
         return redirect(url_for('main.admin_dashboard'))
 
     project = Project.query.get_or_404(project_id)
-    project.status = 'Completed'
+    project.status = ProjectStatus.COMPLETED
     db.session.commit()
 
     flash(f"Project {project.project_number} marked as completed.")
@@ -568,10 +834,16 @@ def delete_project(project_id):
     project = Project.query.get_or_404(project_id)
 
     # Optional: delete related messages and uploads explicitly
+    message_ids = db.session.execute(
+        db.select(ProjectMessage.id).where(ProjectMessage.project_id == project.id)
+    ).scalars().all()
     ProjectMessage.query.filter_by(project_id=project.id).delete()
     ProjectUpload.query.filter_by(project_id=project.id).delete()
 
     db.session.delete(project)
+    db.session.flush()
+    # Bulk deletes skip the flush hooks: drop the messages from the search index
+    reindex(db.session.connection(), 'message', message_ids)
     db.session.commit()
 
     flash(f"Project {project.project_number} deleted successfully.")
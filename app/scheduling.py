@@ -0,0 +1,146 @@
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+
+from flask import current_app
+
+from app.models import Project, ScheduleSlot, Service
+
+# -------------------
+# Crew scheduling
+# -------------------
+# Each scheduled service books a crew for an inclusive date range
+# (schedule_slot rows). A proposed schedule is checked by loading only the
+# slots that overlap its window for the crews involved (one indexed query)
+# into a per-crew sorted index, so a check against thousands of bookings
+# is a few bisects rather than parsing every project's schedule_data.
+
+
+def crew_for(service_name):
+    # SERVICE_CREWS maps a service to the crew doing it; default: one crew per trade
+    return current_app.config['SERVICE_CREWS'].get(service_name, service_name)
+
+
+class CrewCalendar:
+    """Bookings of one crew sorted by start date, with a running max of end dates."""
+
+    def __init__(self, slots):
+        self.slots = sorted(slots, key=lambda slot: (slot.start_date, slot.end_date))
+        self.starts = [slot.start_date for slot in self.slots]
+        self.max_end = []
+        running = date.min
+        for slot in self.slots:
+            running = max(running, slot.end_date)
+            self.max_end.append(running)
+
+    def overlapping(self, start, end):
+        # Only slots starting on/before `end` can overlap; walk them backwards
+        # and stop once no earlier slot reaches `start`.
+        found = []
+        i = bisect_right(self.starts, end) - 1
+        while i >= 0 and self.max_end[i] >= start:
+            if self.slots[i].end_date >= start:
+                found.append(self.slots[i])
+            i -= 1
+        return found
+
+    def add(self, slot):
+        i = bisect_right(self.starts, slot.start_date)
+        self.slots.insert(i, slot)
+        self.starts.insert(i, slot.start_date)
+        running = self.max_end[i - 1] if i else date.min
+        self.max_end[i:] = []
+        for booked in self.slots[i:]:
+            running = max(running, booked.end_date)
+            self.max_end.append(running)
+
+    def next_free(self, after, days=1):
+        # First run of `days` free days on or after `after`
+        candidate = after
+        i = bisect_right(self.starts, candidate) - 1
+        if i >= 0 and self.max_end[i] >= candidate:
+            candidate = self.max_end[i] + timedelta(days=1)
+        for slot in self.slots[max(i + 1, 0):]:
+            if slot.start_date > candidate + timedelta(days=days - 1):
+                break
+            candidate = max(candidate, slot.end_date + timedelta(days=1))
+        return candidate
+
+
+class ScheduleIndex:
+    def __init__(self, slots):
+        by_crew = defaultdict(list)
+        for slot in slots:
+            by_crew[slot.crew].append(slot)
+        self.crews = {crew: CrewCalendar(crew_slots) for crew, crew_slots in by_crew.items()}
+
+    @classmethod
+    def load(cls, crews, start, end=None, exclude_project_id=None):
+        query = ScheduleSlot.query.filter(
+            ScheduleSlot.crew.in_(list(crews)),
+            ScheduleSlot.end_date >= start,
+        )
+        if end is not None:
+            query = query.filter(ScheduleSlot.start_date <= end)
+        if exclude_project_id is not None:
+            query = query.filter(ScheduleSlot.project_id != exclude_project_id)
+        return cls(query.all())
+
+    def conflicts(self, crew, start, end):
+        calendar = self.crews.get(crew)
+        return calendar.overlapping(start, end) if calendar else []
+
+    def next_free(self, crew, after, days=1):
+        calendar = self.crews.get(crew)
+        return calendar.next_free(after, days) if calendar else after
+
+    def book(self, slot):
+        # Count a slot that is about to be saved, so later picks avoid it
+        if slot.crew not in self.crews:
+            self.crews[slot.crew] = CrewCalendar([])
+        self.crews[slot.crew].add(slot)
+
+
+def find_conflicts(proposed, exclude_project_id=None):
+    """Check ``{service: (start, end)}``; returns ``{service: [conflicting slots]}``."""
+    if not proposed:
+        return {}
+    crews = {service: crew_for(service) for service in proposed}
+    window_start = min(start for start, _ in proposed.values())
+    window_end = max(end for _, end in proposed.values())
+    index = ScheduleIndex.load(set(crews.values()), window_start, window_end, exclude_project_id)
+
+    conflicts = {}
+    for service, (start, end) in proposed.items():
+        found = index.conflicts(crews[service], start, end)
+        if found:
+            conflicts[service] = found
+    return conflicts
+
+
+def next_free_dates(services, after=None, exclude_project_id=None, days=1):
+    """Earliest free date per service for its crew, from one query."""
+    after = after or date.today()
+    crews = {service: crew_for(service) for service in services}
+    index = ScheduleIndex.load(set(crews.values()), after, exclude_project_id=exclude_project_id)
+    return {service: index.next_free(crew, after, days) for service, crew in crews.items()}
+
+
+def replace_project_slots(project, service_dates):
+    """Store ``{service name: date}`` as the project's bookings."""
+    from app.queries import get_or_create_services
+
+    services = {service.name: service for service in get_or_create_services(list(service_dates))}
+    project.schedule_slots = [
+        ScheduleSlot(service=services[name], crew=crew_for(name), start_date=day, end_date=day)
+        for name, day in service_dates.items()
+    ]
+
+
+def projects_scheduled_for(service_name, start, end):
+    """Projects with ``service_name`` booked anywhere in [start, end]."""
+    return Project.query.join(Project.schedule_slots).join(ScheduleSlot.service).filter(
+        Service.name == service_name,
+        ScheduleSlot.start_date <= end,
+        ScheduleSlot.end_date >= start,
+    ).distinct()
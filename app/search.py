@@ -0,0 +1,326 @@
+import re
+
+import click
+from markupsafe import Markup, escape
+from sqlalchemy import event, inspect, select, text
+from sqlalchemy.orm import Session
+
+from app import db
+
+# -------------------
+# Full-text search
+# -------------------
+# One search_index row per estimate, project and message, holding the text an
+# admin would search for (numbers, type, services, details, message content and
+# the customer's name/email/address). It is an FTS5 table on SQLite and a
+# table with a generated tsvector column + GIN index on Postgres, so lookups
+# are index probes ranked by bm25 / ts_rank instead of LIKE '%...%' scans.
+#
+# Rows are rewritten inside the same transaction as the change (after_flush),
+# so the index never disagrees with committed data. `flask search reindex`
+# rebuilds it from scratch.
+
+KIND_CODES = {'estimate': 1, 'project': 2, 'message': 3}
+HIGHLIGHT = ('⟦', '⟧')  # snippet markers, swapped for <mark> after escaping
+MAX_TERMS = 8
+RANK_LIMIT = 5000
+BATCH_SIZE = 1000
+
+
+def _key(kind, ref_id):
+    # Stable integer key (FTS5 rowid / Postgres primary key)
+    return ref_id * 4 + KIND_CODES[kind]
+
+
+def _join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def _terms(query):
+    return re.findall(r'\w+', (query or '').lower())[:MAX_TERMS]
+
+
+class SQLiteIndex:
+    def create(self, conn):
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, parent_id UNINDEXED, title, body, people, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    def delete(self, conn, keys):
+        if keys:
+            conn.execute(text("DELETE FROM search_index WHERE rowid = :key"), [{'key': k} for k in keys])
+
+    def insert(self, conn, docs):
+        if docs:
+            conn.execute(text(
+                "INSERT INTO search_index (rowid, kind, ref_id, parent_id, title, body, people) "
+                "VALUES (:key, :kind, :ref_id, :parent_id, :title, :body, :people)"
+            ), docs)
+
+    def clear(self, conn):
+        conn.exec_driver_sql("DELETE FROM search_index")
+
+    def search(self, conn, terms, limit, offset):
+        match = ' '.join(f'"{term}"*' for term in terms)  # every term, prefix match
+        order = self._order(conn, "SELECT 1 FROM search_index WHERE search_index MATCH :match", {'match': match},
+                            ranked="bm25(search_index, 0, 0, 0, 10.0, 1.0, 4.0)", newest="rowid DESC")
+        start, stop = HIGHLIGHT
+        return conn.execute(text(
+            "SELECT kind, ref_id, parent_id, title, "
+            "snippet(search_index, -1, :start, :stop, '…', 16) AS snippet "
+            f"FROM search_index WHERE search_index MATCH :match ORDER BY {order} LIMIT :limit OFFSET :offset"
+        ), {'match': match, 'start': start, 'stop': stop, 'limit': limit, 'offset': offset}).all()
+
+    def _order(self, conn, matches_sql, params, ranked, newest):
+        # Ranking costs time per matching row. A query matching more than
+        # RANK_LIMIT rows (a word in most documents) is listed newest first
+        # instead, which the index returns without visiting every match.
+        hits = conn.execute(text(f"SELECT count(*) FROM ({matches_sql} LIMIT :cap) hits"),
+                            {**params, 'cap': RANK_LIMIT + 1}).scalar()
+        return ranked if hits <= RANK_LIMIT else newest
+
+
+class PostgresIndex(SQLiteIndex):
+    def create(self, conn):
+        conn.exec_driver_sql(
+            "CREATE TABLE IF NOT EXISTS search_index ("
+            "key BIGINT PRIMARY KEY, kind VARCHAR(10) NOT NULL, ref_id INTEGER NOT NULL, "
+            "parent_id INTEGER NOT NULL, title TEXT, body TEXT, people TEXT, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(people, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(body, '')), 'C')) STORED)"
+        )
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_search_index_document ON search_index USING gin (document)"
+        )
+
+    def delete(self, conn, keys):
+        if keys:
+            conn.execute(text("DELETE FROM search_index WHERE key = :key"), [{'key': k} for k in keys])
+
+    def insert(self, conn, docs):
+        if docs:
+            conn.execute(text(
+                "INSERT INTO search_index (key, kind, ref_id, parent_id, title, body, people) "
+                "VALUES (:key, :kind, :ref_id, :parent_id, :title, :body, :people)"
+            ), docs)
+
+    def search(self, conn, terms, limit, offset):
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        rank = self._order(
+            conn, "SELECT 1 FROM search_index WHERE document @@ to_tsquery('simple', :tsquery)", {'tsquery': tsquery},
+            ranked="ts_rank(document, q)", newest="0"
+        )
+        start, stop = HIGHLIGHT
+        # ts_headline only runs for the rows on this page
+        return conn.execute(text(
+            "SELECT kind, ref_id, parent_id, title, ts_headline('simple', "
+            "concat_ws(' ', title, body, people), q, :options) AS snippet "
+            f"FROM (SELECT key, kind, ref_id, parent_id, title, body, people, q, {rank} AS rank "
+            "      FROM search_index, to_tsquery('simple', :tsquery) q WHERE document @@ q "
+            "      ORDER BY rank DESC, key DESC LIMIT :limit OFFSET :offset) page "
+            "ORDER BY rank DESC, key DESC"
+        ), {
+            'tsquery': tsquery, 'limit': limit, 'offset': offset,
+            'options': f'StartSel={start}, StopSel={stop}, MaxWords=24, MinWords=8',
+        }).all()
+
+
+INDEXES = {'sqlite': SQLiteIndex(), 'postgresql': PostgresIndex()}
+
+
+def index_for(conn):
+    return INDEXES.get(conn.dialect.name)
+
+
+# ---- documents ----
+
+def _estimate_docs(conn, ids):
+    from app.models import EstimateRequest, User
+    estimates, users = EstimateRequest.__table__, User.__table__
+    rows = conn.execute(
+        select(estimates.c.id, estimates.c.estimate_number, estimates.c.project_type, estimates.c.services,
+               estimates.c.details, users.c.full_name, users.c.email, users.c.address)
+        .select_from(estimates.join(users, users.c.id == estimates.c.customer_id))
+        .where(estimates.c.id.in_(ids))
+    )
+    return [{
+        'key': _key('estimate', row.id), 'kind': 'estimate', 'ref_id': row.id, 'parent_id': row.id,
+        'title': _join(row.estimate_number, row.project_type),
+        'body': _join(row.services, row.details),
+        'people': _join(row.full_name, row.email, row.address),
+    } for row in rows]
+
+
+def _project_docs(conn, ids):
+    from app.models import Project, User
+    projects, users = Project.__table__, User.__table__
+    rows = conn.execute(
+        select(projects.c.id, projects.c.project_number, projects.c.project_type, projects.c.services,
+               projects.c.details, users.c.full_name, users.c.email, users.c.address)
+        .select_from(projects.join(users, users.c.id == projects.c.customer_id))
+        .where(projects.c.id.in_(ids))
+    )
+    return [{
+        'key': _key('project', row.id), 'kind': 'project', 'ref_id': row.id, 'parent_id': row.id,
+        'title': _join(row.project_number, row.project_type),
+        'body': _join(row.services, row.details),
+        'people': _join(row.full_name, row.email, row.address),
+    } for row in rows]
+
+
+def _message_docs(conn, ids):
+    from app.models import Project, ProjectMessage
+    messages, projects = ProjectMessage.__table__, Project.__table__
+    rows = conn.execute(
+        select(messages.c.id, messages.c.project_id, messages.c.sender, messages.c.content,
+               projects.c.project_number)
+        .select_from(messages.join(projects, projects.c.id == messages.c.project_id))
+        .where(messages.c.id.in_(ids))
+    )
+    return [{
+        'key': _key('message', row.id), 'kind': 'message', 'ref_id': row.id, 'parent_id': row.project_id,
+        'title': _join(row.project_number, 'message'),
+        'body': row.content,
+        'people': row.sender,
+    } for row in rows]
+
+
+DOCUMENTS = {'estimate': _estimate_docs, 'project': _project_docs, 'message': _message_docs}
+
+
+def reindex(conn, kind, ids):
+    """Rewrite the index rows of ``ids``; ids that no longer exist are dropped."""
+    index = index_for(conn)
+    ids = list(ids)
+    if index is None or not ids:
+        return
+    for start in range(0, len(ids), BATCH_SIZE):
+        chunk = ids[start:start + BATCH_SIZE]
+        index.delete(conn, [_key(kind, ref_id) for ref_id in chunk])
+        index.insert(conn, DOCUMENTS[kind](conn, chunk))
+
+
+def rebuild(conn):
+    from app.models import EstimateRequest, Project, ProjectMessage
+    index = index_for(conn)
+    index.create(conn)
+    index.clear(conn)
+    counts = {}
+    for kind, model in (('estimate', EstimateRequest), ('project', Project), ('message', ProjectMessage)):
+        ids = conn.execute(select(model.__table__.c.id)).scalars().all()
+        for start in range(0, len(ids), BATCH_SIZE):
+            index.insert(conn, DOCUMENTS[kind](conn, ids[start:start + BATCH_SIZE]))
+        counts[kind] = len(ids)
+    return counts
+
+
+# ---- querying ----
+
+class SearchResult:
+    __slots__ = ('kind', 'ref_id', 'parent_id', 'title', 'snippet')
+
+    def __init__(self, kind, ref_id, parent_id, title, snippet):
+        self.kind = kind
+        self.ref_id = ref_id
+        self.parent_id = parent_id  # project id for messages
+        self.title = title
+        self.snippet = snippet
+
+
+def _highlight(snippet):
+    start, stop = HIGHLIGHT
+    return Markup(str(escape(snippet or '')).replace(start, '<mark>').replace(stop, '</mark>'))
+
+
+def search(query, page=1, per_page=25):
+    """Ranked results for ``query``; returns ``(results, has_next)``."""
+    terms = _terms(query)
+    conn = db.session.connection()
+    index = index_for(conn)
+    if not terms or index is None:
+        return [], False
+
+    rows = index.search(conn, terms, limit=per_page + 1, offset=(page - 1) * per_page)
+    results = [SearchResult(row.kind, row.ref_id, row.parent_id, row.title, _highlight(row.snippet))
+               for row in rows[:per_page]]
+    return results, len(rows) > per_page
+
+
+# -------------------
+# Incremental maintenance
+# -------------------
+
+INDEXED_FIELDS = {
+    'EstimateRequest': ('estimate', ('estimate_number', 'project_type', 'services', 'details', 'customer_id')),
+    'Project': ('project', ('project_number', 'project_type', 'services', 'details', 'customer_id')),
+    'ProjectMessage': ('message', ('content', 'sender', 'project_id')),
+}
+USER_FIELDS = ('full_name', 'email', 'address')
+
+
+def _changed(obj, fields):
+    attrs = inspect(obj).attrs
+    return any(attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_search_index(session, flush_context):
+    from app.models import EstimateRequest, Project, User
+
+    conn = session.connection()
+    if index_for(conn) is None:
+        return
+
+    stale = {'estimate': set(), 'project': set(), 'message': set()}
+    customers = set()
+    for obj in session.new:
+        if type(obj).__name__ in INDEXED_FIELDS:
+            stale[INDEXED_FIELDS[type(obj).__name__][0]].add(obj.id)
+    for obj in session.deleted:
+        if type(obj).__name__ in INDEXED_FIELDS:
+            stale[INDEXED_FIELDS[type(obj).__name__][0]].add(inspect(obj).identity[0])
+    for obj in session.dirty:
+        name = type(obj).__name__
+        if name in INDEXED_FIELDS:
+            kind, fields = INDEXED_FIELDS[name]
+            if _changed(obj, fields):
+                stale[kind].add(obj.id)
+        elif isinstance(obj, User) and _changed(obj, USER_FIELDS):
+            customers.add(obj.id)
+
+    if customers:
+        # A renamed customer changes the text of all their estimates and projects
+        for kind, model in (('estimate', EstimateRequest), ('project', Project)):
+            stale[kind].update(conn.execute(
+                select(model.__table__.c.id).where(model.__table__.c.customer_id.in_(customers))
+            ).scalars())
+
+    for kind, ids in stale.items():
+        reindex(conn, kind, sorted(ids))
+
+
+# -------------------
+# CLI
+# -------------------
+
+@click.group('search')
+def search_cli():
+    """Full-text search index."""
+
+
+@search_cli.command('reindex')
+def reindex_command():
+    """Rebuild the search index from the current data."""
+    with db.engine.begin() as conn:
+        if index_for(conn) is None:
+            raise click.ClickException(f"Full-text search is not supported on {conn.dialect.name}.")
+        counts = rebuild(conn)
+    click.echo("✅ Search index rebuilt: " + ", ".join(f"{n} {kind}s" for kind, n in counts.items()))
+
+
+def init_app(app):
+    app.cli.add_command(search_cli)
@@ -0,0 +1,77 @@
+// Live project message feed.
+// Elements with data-feed-project receive that project's new messages as they
+// are posted. The page opens a single connection for all of them, configured
+// by this script tag's data-feed-* attributes (message_feed() in routes.py):
+// a Server-Sent Events stream when data-feed-stream is set and supported,
+// otherwise polling the JSON delta endpoint.
+(function () {
+    function renderMessage(feed, message) {
+        const item = document.createElement(feed.dataset.feedItemTag || 'li');
+        item.className = feed.dataset.feedItemClass || 'list-group-item';
+        if (feed.dataset.feedViewer === 'admin' && message.sender === 'admin') {
+            item.classList.replace('bg-white', 'bg-light');
+        }
+
+        const sender = document.createElement('strong');
+        if (feed.dataset.feedViewer === 'customer') {
+            sender.textContent = (message.sender === 'customer' ? 'You' : 'Admin') + ':';
+        } else {
+            sender.textContent = message.sender.charAt(0).toUpperCase() + message.sender.slice(1) + ':';
+        }
+        const time = document.createElement('small');
+        time.className = 'text-muted';
+        time.textContent = message.timestamp;
+
+        item.append(sender, ' ' + message.content, document.createElement('br'), time);
+        if (feed.dataset.feedOrder === 'newest-first') {
+            feed.prepend(item);
+        } else {
+            feed.append(item);
+        }
+        feed.dataset.feedLastId = message.id;
+        feed.hidden = false;
+    }
+
+    const settings = document.currentScript.dataset;
+    const feeds = {};
+    document.querySelectorAll('[data-feed-project]').forEach(function (feed) {
+        feeds[feed.dataset.feedProject] = feed;
+    });
+
+    function lastId() {
+        return Math.max(0, ...Object.values(feeds).map(function (feed) { return Number(feed.dataset.feedLastId); }));
+    }
+
+    function deliver(message) {
+        const feed = feeds[message.project_id];
+        if (feed && message.id > Number(feed.dataset.feedLastId)) {
+            renderMessage(feed, message);
+        }
+    }
+
+    function stream() {
+        const source = new EventSource(settings.feedStream + '&after=' + lastId());
+        source.onmessage = function (event) { deliver(JSON.parse(event.data)); };
+    }
+
+    function poll() {
+        const url = settings.feedPoll + '&wait=' + settings.feedWait + '&after=' + lastId();
+        const interval = Number(settings.feedInterval) * 1000;
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (response) { return response.json(); })
+            .then(function (data) {
+                data.messages.forEach(deliver);
+                setTimeout(poll, interval);
+            })
+            .catch(function () { setTimeout(poll, Math.max(interval, 5000)); });
+    }
+
+    if (!settings.feedPoll) {
+        return;
+    }
+    if (settings.feedStream && window.EventSource) {
+        stream();
+    } else {
+        poll();
+    }
+})();
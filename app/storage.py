@@ -0,0 +1,138 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from flask import current_app, request
+from werkzeug.utils import secure_filename
+
+# -------------------
+# Content-addressed upload storage
+# -------------------
+# Files live under app/static/<kind>/<digest>/<original name>, where <digest>
+# is the (truncated) SHA-256 of the content. The returned key is the path
+# relative to the kind folder, so existing `url_for('static', filename=kind
+# ~ '/' ~ key)` links keep working for both new keys and legacy flat names.
+# Identical content is stored once, however many times it is uploaded: each
+# upload keeps its own name, hard-linked to the blob already in <digest>/.
+
+CHUNK_SIZE = 64 * 1024
+DIGEST_LENGTH = 32      # hex chars of the SHA-256 used as the directory name
+MAX_KEY_LENGTH = 100    # fits the String(100) filename columns
+
+KINDS = ('uploads', 'project_uploads', 'estimates')
+
+
+def storage_path(kind, key=''):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown storage kind: {kind}")
+    return os.path.join(current_app.root_path, 'static', kind, key)
+
+
+def _fit_name(name):
+    # Keep "<digest>/<name>" within MAX_KEY_LENGTH, preserving the extension
+    room = MAX_KEY_LENGTH - DIGEST_LENGTH - 1
+    if len(name) <= room:
+        return name
+    stem, ext = os.path.splitext(name)
+    return stem[:room - len(ext)] + ext
+
+
+def _existing_blob(kind, digest):
+    folder = storage_path(kind, digest)
+    if os.path.isdir(folder):
+        for entry in sorted(os.listdir(folder)):
+            if not entry.startswith('.'):
+                return os.path.join(folder, entry)
+    return None
+
+
+def save_upload(file, kind, filename=None):
+    """Stream ``file`` to disk in chunks and return its storage key."""
+    name = _fit_name(secure_filename(filename or file.filename) or 'upload')
+    root = storage_path(kind)
+    os.makedirs(root, exist_ok=True)
+
+    # Write to a temp file in the same folder so the final move is atomic
+    sha256 = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix='.incoming-')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                sha256.update(chunk)
+                out.write(chunk)
+
+        digest = sha256.hexdigest()[:DIGEST_LENGTH]
+        key = f"{digest}/{name}"
+        target = storage_path(kind, key)
+
+        # ✅ Same bytes already stored: link this name to that blob and drop
+        # the copy, so each upload still shows its own file name
+        existing = _existing_blob(kind, digest)
+        if existing:
+            try:
+                if existing != target:
+                    os.link(existing, target)
+            except FileExistsError:
+                pass  # the same name and content, saved concurrently
+            except OSError:
+                os.replace(tmp_path, target)  # no hard links here: keep a copy
+                return key
+            os.remove(tmp_path)
+            return key
+
+        os.makedirs(storage_path(kind, digest), exist_ok=True)
+        os.replace(tmp_path, target)
+        return key
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def display_name(key):
+    # "ab12.../IMG_0001.jpg" -> "IMG_0001.jpg"; legacy flat names pass through
+    return key.rsplit('/', 1)[-1] if key else key
+
+
+@contextmanager
+def scratch_storage(app, kinds=KINDS):
+    """Remove the files stored under ``kinds`` while the block runs (benchmarks, tests)."""
+    folders = {kind: os.path.join(app.root_path, 'static', kind) for kind in kinds}
+    before = {kind: set(os.listdir(folder)) if os.path.isdir(folder) else set() for kind, folder in folders.items()}
+    try:
+        yield
+    finally:
+        for kind, folder in folders.items():
+            for entry in set(os.listdir(folder)) - before[kind] if os.path.isdir(folder) else ():
+                path = os.path.join(folder, entry)
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+
+# -------------------
+# Per-route request size limits
+# -------------------
+
+def upload_limit(config_key):
+    """Mark a view as accepting uploads up to ``app.config[config_key]`` bytes."""
+    def decorator(view):
+        view.upload_limit = config_key
+        return view
+    return decorator
+
+
+def _apply_upload_limit():
+    view = current_app.view_functions.get(request.endpoint)
+    config_key = getattr(view, 'upload_limit', None)
+    if config_key:
+        request.max_content_length = current_app.config[config_key]
+
+
+def init_app(app):
+    # Must run before CSRFProtect, which reads the form body in its own hook
+    app.before_request(_apply_upload_limit)
+    app.add_template_filter(display_name)
@@ -0,0 +1,41 @@
+import logging
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+# -------------------
+# Template compilation
+# -------------------
+# Jinja compiles each template to Python the first time it is rendered in a
+# process. Two things take that off the request path after a deploy:
+#
+# - a filesystem bytecode cache (TEMPLATE_CACHE_DIR) shared by every worker
+#   on the host: a template is compiled by one process and loaded as
+#   marshalled bytecode by the rest. Entries are keyed by the source's
+#   checksum, so an edited template is recompiled, never served stale;
+# - TEMPLATES_PRELOAD: create_app() loads every template up front. With
+#   gunicorn's preload_app the master does it once before forking, and the
+#   workers start with the compiled templates already in memory.
+#
+# TEMPLATES_AUTO_RELOAD (Flask's setting) stays off outside debug, so a
+# cached template is not re-stat'ed on every render.
+
+logger = logging.getLogger(__name__)
+
+
+def preload_templates(app):
+    """Compile every .html template into the environment's cache."""
+    started = time.perf_counter()
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    logger.info("Preloaded %d templates in %.1f ms", len(names), (time.perf_counter() - started) * 1000)
+    return names
+
+
+def init_app(app):
+    directory = app.config['TEMPLATE_CACHE_DIR']
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
@@ -0,0 +1,87 @@
+import os
+
+from flask import current_app
+
+from app.assets import versioned_url
+
+from app.jobs import enqueue, job
+
+# -------------------
+# Image derivatives (thumbnail / medium WebP)
+# -------------------
+# Uploaded photos are served at full resolution otherwise. After an upload the
+# route enqueues derivative generation as a background job; templates call
+# thumbnail_url(), which serves the original until the variant exists.
+# Derivatives live in static/derivatives/<kind>/<key>.<variant>.webp.
+
+VARIANTS = {
+    'thumb': (320, 320),
+    'medium': (1280, 1280),
+}
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+def is_image(key):
+    return bool(key) and key.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def derivative_key(kind, key, variant):
+    return f"derivatives/{kind}/{key}.{variant}.webp"
+
+
+def _static_path(root_path, filename):
+    return os.path.join(root_path, 'static', filename)
+
+
+def generate_derivatives(root_path, kind, key, quality=80):
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        # Pillow missing: templates keep serving the originals
+        return []
+
+    source = _static_path(root_path, f"{kind}/{key}")
+    created = []
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)  # phone photos carry rotation in EXIF
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        for variant, size in VARIANTS.items():
+            target = _static_path(root_path, derivative_key(kind, key, variant))
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            resized = image.copy()
+            resized.thumbnail(size)
+            tmp_path = f"{target}.tmp"
+            resized.save(tmp_path, 'WEBP', quality=quality)
+            os.replace(tmp_path, target)  # never expose a half-written file
+            created.append(target)
+    return created
+
+
+@job('thumbnails.generate')
+def generate_derivatives_job(kind, key):
+    generate_derivatives(current_app.root_path, kind, key, current_app.config['THUMBNAIL_QUALITY'])
+
+
+def schedule_derivatives(kind, key):
+    # Runs after the request's commit; a corrupt image fails the job and keeps its original
+    if not is_image(key):
+        return None
+    return enqueue('thumbnails.generate', {'kind': kind, 'key': key}, max_attempts=1)
+
+
+def thumbnail_url(kind, key, variant='thumb'):
+    if is_image(key):
+        derived = derivative_key(kind, key, variant)
+        if os.path.exists(_static_path(current_app.root_path, derived)):
+            return versioned_url(derived)
+    return versioned_url(f"{kind}/{key}")
+
+
+def init_app(app):
+    app.add_template_global(thumbnail_url)
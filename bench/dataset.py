@@ -0,0 +1,94 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from app import db
+from app.bulk import import_records
+from app.catalog import DEFAULT_SERVICES as SERVICES
+from app.models import EstimateStatus, Project, ProjectMessage, ProjectStatus, ProjectUpload
+from app.search import reindex
+
+# -------------------
+# Synthetic dataset
+# -------------------
+# Background rows the workflow runs against, so list pages and lookups see
+# realistic table sizes. Customers, estimates and projects go through the
+# bulk importer (same code path as `flask data import`); messages and uploads
+# are inserted per chunk. Seeded with a fixed random seed: the same size
+# always produces the same data.
+
+SIZES = {
+    'tiny': dict(customers=20, estimates=50, projects=30, messages=100, uploads=30),
+    'small': dict(customers=200, estimates=1000, projects=500, messages=2000, uploads=500),
+    'medium': dict(customers=2000, estimates=10000, projects=5000, messages=20000, uploads=5000),
+    'large': dict(customers=20000, estimates=100000, projects=50000, messages=200000, uploads=50000),
+}
+CHUNK_SIZE = 5000
+
+
+def _job_rows(rng, kind, count, customers, statuses, started):
+    for i in range(count):
+        project_type = rng.choice(list(SERVICES))
+        yield {
+            'type': kind,
+            'number': f"BENCH-{kind[:3].upper()}-{i:07d}",
+            'customer_email': f"bench{rng.randrange(customers):06d}@example.com",
+            'customer_name': f"Bench Customer {i % customers}",
+            'customer_address': f"{rng.randrange(1, 9999)} Main St",
+            'customer_phone': f"555{rng.randrange(10 ** 7):07d}",
+            'project_type': project_type,
+            'services': ",".join(rng.sample(SERVICES[project_type], 2)),
+            'total_sqft': rng.randrange(50, 3000),
+            'details': f"Synthetic {kind} {i}",
+            'status': rng.choice(statuses).value,
+            'created_at': (started - timedelta(minutes=i)).isoformat(),
+        }
+
+
+def _records(rng, customers, estimates, projects):
+    started = datetime.utcnow()
+    for i in range(customers):
+        yield {'type': 'customer', 'customer_email': f"bench{i:06d}@example.com",
+               'customer_name': f"Bench Customer {i}"}
+    yield from _job_rows(rng, 'estimate', estimates, customers, list(EstimateStatus), started)
+    # Most projects are done; the rest are spread over the open states
+    project_statuses = [ProjectStatus.COMPLETED] * 4 + [s for s in ProjectStatus if s != ProjectStatus.COMPLETED]
+    yield from _job_rows(rng, 'project', projects, customers, project_statuses, started)
+
+
+def _insert_children(rng, model, count, project_ids, make_row):
+    ids = []
+    for start in range(0, count, CHUNK_SIZE):
+        rows = [make_row(i, rng.choice(project_ids)) for i in range(start, min(start + CHUNK_SIZE, count))]
+        ids += db.session.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows).scalars().all()
+    return ids
+
+
+def seed(customers, estimates, projects, messages, uploads, random_seed=1):
+    """Insert the synthetic rows; returns the counts actually created."""
+    rng = random.Random(random_seed)
+    lines = (json.dumps(record) + '\n' for record in _records(rng, customers, estimates, projects))
+    result = import_records(lines, 'jsonl')
+
+    project_ids = db.session.execute(select(Project.id)).scalars().all()
+    counts = dict(result.created, message=0, upload=0)
+    if not project_ids:
+        return counts
+
+    now = datetime.utcnow()
+    message_ids = _insert_children(rng, ProjectMessage, messages, project_ids, lambda i, project_id: {
+        'project_id': project_id, 'sender': 'customer' if i % 2 else 'admin',
+        'content': f"Synthetic message {i} about the tile and the schedule",
+        'timestamp': now - timedelta(minutes=i),
+    })
+    _insert_children(rng, ProjectUpload, uploads, project_ids, lambda i, project_id: {
+        'project_id': project_id, 'filename': f"bench/upload-{i}.pdf", 'timestamp': now - timedelta(minutes=i),
+    })
+    conn = db.session.connection()
+    for start in range(0, len(message_ids), CHUNK_SIZE):
+        reindex(conn, 'message', message_ids[start:start + CHUNK_SIZE])
+    db.session.commit()
+    counts.update(message=messages, upload=uploads)
+    return counts
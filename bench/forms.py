@@ -0,0 +1,111 @@
+"""Microbenchmark: schedule form construction per request, before and after
+the form-class cache.
+
+    python -m bench.forms [--repeat 2000]
+
+"before" rebuilds the class the way schedule_project used to (a fresh
+subclass plus a setattr per service on every request); "after" uses
+schedule_form_class(). Both bind a POST with every date filled in. The
+estimate form's choices come from the catalog snapshot (a throwaway SQLite
+database is created for it).
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from wtforms import DateField
+from wtforms.validators import Optional
+
+from app.catalog import DEFAULT_SERVICES as SERVICES, current_catalog
+from app.forms import ScheduleForm, schedule_form_class, EstimateRequestForm
+from bench.run import configure_environment
+
+SERVICE_COUNTS = (2, 6, 11, 20)
+
+
+def legacy_schedule_form(services):
+    class DynamicScheduleForm(ScheduleForm):
+        pass
+
+    for service in services:
+        field_name = service.strip().replace(" ", "_").lower()
+        setattr(DynamicScheduleForm, field_name, DateField(service.strip(), validators=[Optional()]))
+    return DynamicScheduleForm()
+
+
+def cached_schedule_form(services):
+    return schedule_form_class(services)()
+
+
+def legacy_estimate_form():
+    form = EstimateRequestForm()
+    form.project_type.choices = [(t, t) for t in SERVICES]
+    form.services.choices = [(s, s) for s in SERVICES.get(form.project_type.data, [])]
+    return form
+
+
+def cached_estimate_form():
+    form = EstimateRequestForm()
+    catalog = current_catalog()
+    form.project_type.choices = catalog.project_type_choices
+    form.services.choices = catalog.service_choices(form.project_type.data)
+    return form
+
+
+def service_names(count):
+    names = list(dict.fromkeys(s for services in SERVICES.values() for s in services))
+    names += [f"Custom Service {i}" for i in range(max(0, count - len(names)))]
+    return names[:count]
+
+
+def per_call_us(app, data, build, repeat):
+    with app.test_request_context(method='POST', data=data):
+        build()  # warm: the cached variant pays its one-off class build here
+        started = time.perf_counter()
+        for _ in range(repeat):
+            build()
+        return (time.perf_counter() - started) / repeat * 1e6
+
+
+def report(app, repeat):
+    print(f"{'form':<28}{'before us':>11}{'after us':>11}{'speedup':>9}")
+    for count in SERVICE_COUNTS:
+        services = service_names(count)
+        data = {service.strip().replace(" ", "_").lower(): '2030-01-01' for service in services}
+        before = per_call_us(app, data, lambda: legacy_schedule_form(services), repeat)
+        after = per_call_us(app, data, lambda: cached_schedule_form(services), repeat)
+        print(f"{f'schedule, {count} services':<28}{before:>11.1f}{after:>11.1f}{before / after:>8.1f}x")
+
+    data = {'project_type': 'Flooring', 'services': ['Tile', 'Carpet']}
+    before = per_call_us(app, data, legacy_estimate_form, repeat)
+    after = per_call_us(app, data, cached_estimate_form, repeat)
+    print(f"{'estimate request':<28}{before:>11.1f}{after:>11.1f}{before / after:>8.1f}x")
+
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.forms')
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='multti-bench-')
+    configure_environment(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    from app import create_app, db
+    from app.migrations import upgrade
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        upgrade(echo=lambda message: None)
+    try:
+        report(app, args.repeat)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
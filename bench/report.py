@@ -0,0 +1,97 @@
+import json
+import math
+import platform
+
+# -------------------
+# Results, baselines and comparison
+# -------------------
+# A baseline is the JSON summary of a run. A comparison run fails when a
+# step's p50/p95 latency grows by more than the tolerance (plus a small
+# absolute slack, so sub-millisecond steps don't flap) or when it issues more
+# queries than the baseline did. p95 is only gated once a step has
+# MIN_P95_SAMPLES samples (below that it is just the slowest request); p99
+# and RSS are reported but never gated, they are too noisy on shared machines.
+
+LATENCY_SLACK_MS = 2.0
+MIN_P95_SAMPLES = 20
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder, wall_seconds, meta):
+    steps = {}
+    for step, samples in recorder.samples.items():
+        if not samples:
+            continue
+        latencies = sorted(seconds * 1000 for seconds, _, _ in samples)
+        queries = [count for _, count, _ in samples if count is not None]
+        steps[step] = {
+            'count': len(samples),
+            'p50': round(percentile(latencies, 50), 3),
+            'p95': round(percentile(latencies, 95), 3),
+            'p99': round(percentile(latencies, 99), 3),
+            'queries': round(sum(queries) / len(queries), 2) if queries else None,
+            'rss_mb': round(max(rss for _, _, rss in samples) / 2 ** 20, 1),
+        }
+    total = sum(step['count'] for step in steps.values())
+    return {
+        'meta': {**meta, 'python': platform.python_version()},
+        'throughput_rps': round(total / wall_seconds, 1) if wall_seconds else None,
+        'failures': recorder.failures,
+        'steps': steps,
+    }
+
+
+def format_table(summary):
+    header = f"{'step':<30}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>9}{'RSS MB':>9}"
+    lines = [header, '-' * len(header)]
+    for step, stats in summary['steps'].items():
+        queries = '-' if stats['queries'] is None else f"{stats['queries']:.1f}"
+        lines.append(f"{step:<30}{stats['count']:>6}{stats['p50']:>10.2f}{stats['p95']:>10.2f}"
+                     f"{stats['p99']:>10.2f}{queries:>9}{stats['rss_mb']:>9.1f}")
+    lines.append(f"throughput: {summary['throughput_rps']} req/s")
+    if summary['failures']:
+        lines.append(f"failures: {summary['failures']}")
+    return '\n'.join(lines)
+
+
+def save_baseline(summary, path):
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(summary, baseline, tolerance):
+    """Return the regressions as human-readable strings (empty = pass)."""
+    regressions = []
+    for step, old in baseline['steps'].items():
+        new = summary['steps'].get(step)
+        if new is None:
+            regressions.append(f"{step}: no successful samples in this run")
+            continue
+        gated = ('p50', 'p95') if min(new['count'], old['count']) >= MIN_P95_SAMPLES else ('p50',)
+        for key in gated:
+            limit = old[key] * (1 + tolerance) + LATENCY_SLACK_MS
+            if new[key] > limit:
+                regressions.append(f"{step}: {key} {new[key]:.2f} ms > {limit:.2f} ms (baseline {old[key]:.2f})")
+        if old['queries'] is not None and new['queries'] is not None and new['queries'] > old['queries'] + 0.5:
+            regressions.append(f"{step}: {new['queries']:.1f} queries/request (baseline {old['queries']:.1f})")
+    if summary['failures']:
+        regressions.append(f"failed requests: {summary['failures']}")
+    return regressions
+
+
+def meta_mismatch(summary, baseline):
+    keys = ('size', 'concurrency', 'iterations', 'database')
+    return [key for key in keys if summary['meta'].get(key) != baseline['meta'].get(key)]
@@ -0,0 +1,109 @@
+"""Benchmark the estimate-to-project workflow.
+
+    python -m bench.run                               # small dataset, one user
+    python -m bench.run --size medium --concurrency 8 --iterations 20
+    python -m bench.run --save bench/baseline.json    # record a baseline
+    python -m bench.run --compare bench/baseline.json # exit 1 on regression
+
+Runs against a throwaway SQLite database unless --database-url is given
+(never point it at real data: the run creates users and projects).
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_ADMIN = ('bench-admin@example.com', 'bench-admin-pass')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.run', description=__doc__.split('\n')[0])
+    parser.add_argument('--size', default='small', help="Dataset preset: tiny, small, medium, large.")
+    for name in ('customers', 'estimates', 'projects', 'messages', 'uploads'):
+        parser.add_argument(f'--{name}', type=int, help=f"Override the preset's number of {name}.")
+    parser.add_argument('--iterations', type=int, default=20, help="Workflows per virtual user.")
+    parser.add_argument('--concurrency', type=int, default=1, help="Virtual users (threads).")
+    parser.add_argument('--think-ms', type=float, default=0, help="Pause between a user's workflows.")
+    parser.add_argument('--warmup', type=int, default=2, help="Unrecorded workflows before measuring.")
+    parser.add_argument('--database-url', help="Defaults to a temporary SQLite file.")
+    parser.add_argument('--save', metavar='PATH', help="Write the results as a baseline.")
+    parser.add_argument('--compare', metavar='PATH', help="Fail if slower than this baseline.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed p50/p95 growth (0.25 = 25%%).")
+    return parser.parse_args(argv)
+
+
+def configure_environment(database_url):
+    # Config reads the environment at import time, so this runs before `import app`
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['INSTRUMENTATION'] = '1'          # Server-Timing carries the query count
+    os.environ['JOBS_IN_PROCESS_WORKERS'] = '0'  # thumbnail jobs would compete for the CPU
+    os.environ['CACHE_BACKEND'] = os.environ.get('BENCH_CACHE_BACKEND', 'memory')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    os.environ['ADMIN_EMAIL'], os.environ['ADMIN_PASSWORD'] = BENCH_ADMIN
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    workdir = tempfile.mkdtemp(prefix='multti-bench-')
+    configure_environment(args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+
+    from app import create_app, db
+    from app.cli import create_admin_user
+    from app.migrations import upgrade
+    from app.storage import scratch_storage
+    from bench import dataset, report, workflow
+
+    if args.size not in dataset.SIZES:
+        sys.exit(f"Unknown size {args.size!r}; choose from {', '.join(dataset.SIZES)}")
+    sizes = {name: getattr(args, name) if getattr(args, name) is not None else value
+             for name, value in dataset.SIZES[args.size].items()}
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    try:
+        with app.app_context():
+            upgrade(echo=lambda message: None)
+            create_admin_user()
+            started = time.perf_counter()
+            counts = dataset.seed(**sizes)
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f}s")
+
+        with scratch_storage(app, kinds=('uploads', 'estimates')):
+            if args.warmup:
+                workflow.run(app, workflow.Recorder(), BENCH_ADMIN, args.warmup)
+            recorder = workflow.Recorder()
+            wall = workflow.run(app, recorder, BENCH_ADMIN, args.iterations, args.concurrency, args.think_ms / 1000)
+    finally:
+        with app.app_context():
+            db.engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = report.summarize(recorder, wall, {
+        'size': args.size if not any(getattr(args, name) is not None for name in sizes) else sizes,
+        'concurrency': args.concurrency,
+        'iterations': args.iterations,
+        'database': app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+    })
+    print(report.format_table(summary))
+
+    if args.save:
+        report.save_baseline(summary, args.save)
+        print(f"Baseline written to {args.save}")
+    if args.compare:
+        baseline = report.load_baseline(args.compare)
+        mismatched = report.meta_mismatch(summary, baseline)
+        if mismatched:
+            print(f"⚠️ Baseline was recorded with different {', '.join(mismatched)}")
+        regressions = report.compare(summary, baseline, args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}")
+        if regressions:
+            return 1
+        print("✅ No regressions against the baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""WSGI entry point for bench.serving: the real app, CSRF off, and an optional
+simulated database round-trip (BENCH_DB_LATENCY_MS) to stand in for a
+networked Postgres when benchmarking against local SQLite."""
+import os
+import time
+
+from sqlalchemy import event
+
+from app import create_app, db
+
+app = create_app()
+app.config['WTF_CSRF_ENABLED'] = False
+
+latency = float(os.environ.get('BENCH_DB_LATENCY_MS', 0)) / 1000
+if latency:
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: time.sleep(latency))
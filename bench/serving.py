@@ -0,0 +1,214 @@
+"""Compare gunicorn worker modes on the I/O-bound routes.
+
+    python -m bench.serving                              # sync vs gthread
+    python -m bench.serving --modes sync,gthread,gevent --clients 32 --duration 20
+    python -m bench.serving --db-latency-ms 5            # emulate a networked Postgres
+
+Starts gunicorn with gunicorn.conf.py for each mode (same WEB_CONCURRENCY)
+against a throwaway SQLite database and drives it over real HTTP from
+--clients threads: a customer loading /track-projects and an admin posting
+files to /admin/project/<id>/upload.
+"""
+import argparse
+import http.cookiejar
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+from bench.run import BENCH_ADMIN, configure_environment
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_CUSTOMER_PASSWORD = 'bench-customer-pass'
+UPLOAD = b'%PDF-1.4\n% bench upload\n' + b'0' * 200_000
+MODES = {
+    # mode -> (WEB_WORKER_CLASS, WEB_THREADS)
+    'sync': ('sync', 1),
+    'gthread': ('gthread', 4),
+    'gevent': ('gevent', 1),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m bench.serving', description=__doc__.split('\n')[0])
+    parser.add_argument('--modes', default='sync,gthread', help=f"Comma-separated: {', '.join(MODES)}.")
+    parser.add_argument('--workers', type=int, default=2, help="WEB_CONCURRENCY for every mode.")
+    parser.add_argument('--threads', type=int, help="WEB_THREADS for gthread (default 4).")
+    parser.add_argument('--clients', type=int, default=16, help="Concurrent client threads per route.")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds of load per route.")
+    parser.add_argument('--db-latency-ms', type=float, default=2, help="Simulated round trip per query.")
+    parser.add_argument('--size', default='tiny', help="bench.dataset preset.")
+    return parser.parse_args(argv)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Client:
+    """A logged-in HTTP session (cookie jar, redirects not followed)."""
+
+    def __init__(self, base_url, email, password):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect())
+        status = self.request('/login', urllib.parse.urlencode({'email': email, 'password': password}).encode(),
+                              {'Content-Type': 'application/x-www-form-urlencoded'})
+        if status != 302:
+            raise RuntimeError(f"Could not log in as {email} (HTTP {status})")
+
+    def request(self, path, data=None, headers=None):
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:  # 3xx land here too, redirects are not followed
+            error.read()
+            return error.code
+
+    def upload(self, path, field, filename, content):
+        boundary = uuid.uuid4().hex
+        body = (f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                f'Content-Type: application/pdf\r\n\r\n').encode() + content + f'\r\n--{boundary}--\r\n'.encode()
+        return self.request(path, body, {'Content-Type': f'multipart/form-data; boundary={boundary}'})
+
+
+def seed(size):
+    """Seed the database; returns (customer email, one of their project ids)."""
+    from sqlalchemy import func, select
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app, db
+    from app.cli import create_admin_user
+    from app.migrations import upgrade
+    from app.models import Project, User
+    from bench import dataset
+
+    app = create_app()
+    with app.app_context():
+        upgrade(echo=lambda message: None)
+        create_admin_user()
+        dataset.seed(**dataset.SIZES[size])
+        # The busiest customer, so /track-projects renders a realistic page
+        customer_id, project_id = db.session.execute(
+            select(Project.customer_id, func.min(Project.id))
+            .group_by(Project.customer_id).order_by(func.count().desc()).limit(1)).one()
+        customer = db.session.get(User, customer_id)
+        customer.password = generate_password_hash(BENCH_CUSTOMER_PASSWORD)
+        db.session.commit()
+        email = customer.email
+        db.engine.dispose()
+    return app, email, project_id
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, args, port):
+    worker_class, threads = MODES[mode]
+    if worker_class == 'gthread' and args.threads:
+        threads = args.threads
+    env = dict(os.environ, PORT=str(port), WEB_WORKER_CLASS=worker_class, WEB_THREADS=str(threads),
+               WEB_CONCURRENCY=str(args.workers), BENCH_DB_LATENCY_MS=str(args.db_latency_ms))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'bench.serve_app:app'], cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn ({mode}) exited with {server.returncode}")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError(f"gunicorn ({mode}) did not start")
+
+
+def load(clients, duration, call):
+    """Run ``call(client)`` in a loop from every client; returns (latencies, errors, wall)."""
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def loop(client):
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = call(client)
+            elapsed = time.perf_counter() - started
+            with lock:
+                (latencies if status in (200, 302) else errors).append(elapsed)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(client,)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), len(errors), time.perf_counter() - started
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    unknown = [mode for mode in modes if mode not in MODES]
+    if unknown:
+        sys.exit(f"Unknown mode(s) {', '.join(unknown)}; choose from {', '.join(MODES)}")
+
+    workdir = tempfile.mkdtemp(prefix='multti-serving-')
+    configure_environment(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ['INSTRUMENTATION'] = '0'  # measure the app, not the metrics
+
+    from app.storage import scratch_storage
+    from bench.report import percentile
+
+    app, customer_email, project_id = seed(args.size)
+    routes = {
+        'track_projects': (customer_email, BENCH_CUSTOMER_PASSWORD, lambda c: c.request('/track-projects')),
+        'upload': (*BENCH_ADMIN, lambda c: c.upload(f'/admin/project/{project_id}/upload', 'file', 'plan.pdf', UPLOAD)),
+    }
+
+    results = []
+    try:
+        with scratch_storage(app, kinds=('project_uploads',)):
+            for mode in modes:
+                port = free_port()
+                server = start_server(mode, args, port)
+                try:
+                    for route, (email, password, call) in routes.items():
+                        clients = [Client(f'http://127.0.0.1:{port}', email, password) for _ in range(args.clients)]
+                        latencies, errors, wall = load(clients, args.duration, call)
+                        results.append((mode, route, len(latencies) / wall,
+                                        percentile(latencies, 50), percentile(latencies, 95), errors))
+                finally:
+                    server.terminate()
+                    server.wait()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{args.workers} workers, {args.clients} clients/route, {args.duration:g}s/route, "
+          f"{args.db_latency_ms:g} ms simulated DB round trip")
+    print(f"{'mode':<10}{'route':<16}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'errors':>8}")
+    for mode, route, rate, p50, p95, errors in results:
+        p50 = f"{p50 * 1000:.1f}" if p50 is not None else '-'
+        p95 = f"{p95 * 1000:.1f}" if p95 is not None else '-'
+        print(f"{mode:<10}{route:<16}{rate:>9.1f}{p50:>9}{p95:>9}{errors:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import io
+import os
+import re
+import resource
+import threading
+import time
+import uuid
+from datetime import date, timedelta
+
+from app import db
+from app.models import EstimateRequest, Project
+
+# -------------------
+# Estimate-to-project workflow
+# -------------------
+# One iteration walks a new customer through the whole lifecycle with the
+# Flask test client, one timed request per step (redirects are not followed):
+#
+#   register -> login -> request_estimate -> admin_view_estimate_request
+#   (GET, then POST the PDF) -> approve_estimate -> schedule_project (GET,
+#   then POST) -> approve_schedule -> mark_project_complete
+#
+# Concurrent mode runs several virtual users, each in its own thread with its
+# own clients, like a locust swarm without the network in between.
+
+STEPS = (
+    'register', 'login', 'request_estimate', 'admin_view_estimate_request', 'admin_upload_estimate_pdf',
+    'approve_estimate', 'schedule_project', 'schedule_project_submit', 'approve_schedule', 'mark_project_complete',
+)
+QUERIES = re.compile(r'desc="(\d+) queries"')
+PHOTO = b'\x89PNG\r\n\x1a\n' + b'bench photo' * 200
+PDF = b'%PDF-1.4\n% bench estimate\n' + b'0' * 20000
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # peak, not current
+
+
+class Recorder:
+    """Latency, queries and RSS samples per step, shared by all threads."""
+
+    def __init__(self):
+        self.samples = {step: [] for step in STEPS}  # step -> [(seconds, queries, rss)]
+        self.failures = {}
+        self._lock = threading.Lock()
+
+    def request(self, step, call, expect=(200, 302)):
+        started = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - started
+        match = QUERIES.search(response.headers.get('Server-Timing', ''))
+        sample = (elapsed, int(match.group(1)) if match else None, rss_bytes())
+        with self._lock:
+            if response.status_code in expect:
+                self.samples[step].append(sample)
+            else:
+                self.failures[step] = self.failures.get(step, 0) + 1
+        if response.status_code not in expect:
+            raise RuntimeError(f"{step}: HTTP {response.status_code}")
+        return response
+
+
+class Workflow:
+    def __init__(self, app, recorder, admin_email, admin_password):
+        self.app = app
+        self.recorder = recorder
+        self.admin = app.test_client()
+        self._post_login(self.admin, admin_email, admin_password)
+
+    @staticmethod
+    def _post_login(client, email, password):
+        response = client.post('/login', data={'email': email, 'password': password})
+        if response.status_code != 302:
+            raise RuntimeError(f"Could not log in as {email}")
+
+    def run_once(self, day_offset=0):
+        record = self.recorder.request
+        customer = self.app.test_client()
+        tag = uuid.uuid4().hex[:12]
+        email = f"flow-{tag}@example.com"
+
+        record('register', lambda: customer.post('/register', data={
+            'full_name': f"Flow {tag}", 'address': '1 Bench Rd', 'phone': '5550000000',
+            'email': email, 'password': 'benchpass', 'confirm_password': 'benchpass',
+        }))
+        record('login', lambda: customer.post('/login', data={'email': email, 'password': 'benchpass'}))
+        record('request_estimate', lambda: customer.post('/request-estimate', data={
+            'project_type': 'Flooring', 'services': ['Tile', 'Carpet'], 'total_sqft': '640',
+            'details': f"bench {tag}", 'images': [(io.BytesIO(PHOTO), 'kitchen.png')],
+        }, content_type='multipart/form-data'))
+
+        with self.app.app_context():
+            estimate_id = db.session.query(EstimateRequest.id).filter_by(details=f"bench {tag}").scalar()
+
+        record('admin_view_estimate_request', lambda: self.admin.get(f'/admin/estimate/{estimate_id}/view'))
+        record('admin_upload_estimate_pdf', lambda: self.admin.post(
+            f'/admin/estimate/{estimate_id}/view', data={'estimate_pdf': (io.BytesIO(PDF), 'quote.pdf')},
+            content_type='multipart/form-data'))
+        record('approve_estimate', lambda: customer.get(f'/estimate/{estimate_id}/approve'))
+
+        with self.app.app_context():
+            number = db.session.get(EstimateRequest, estimate_id).estimate_number
+            project_id = db.session.query(Project.id).filter_by(project_number=number).scalar()
+
+        day = date.today() + timedelta(days=30 + day_offset)
+        record('schedule_project', lambda: self.admin.get(f'/admin/project/{project_id}/schedule'))
+        record('schedule_project_submit', lambda: self.admin.post(f'/admin/project/{project_id}/schedule', data={
+            'tile': day.isoformat(), 'carpet': (day + timedelta(days=1)).isoformat(), 'force': 'y',
+        }), expect=(302,))
+        record('approve_schedule', lambda: customer.get(f'/project/{project_id}/approve-schedule'))
+        record('mark_project_complete', lambda: self.admin.post(f'/admin/project/{project_id}/complete'))
+
+
+def run(app, recorder, admin, iterations, concurrency=1, think_time=0.0):
+    """Run ``iterations`` flows per virtual user; returns wall-clock seconds."""
+    errors = []
+
+    def virtual_user(index):
+        try:
+            workflow = Workflow(app, recorder, *admin)
+            for i in range(iterations):
+                workflow.run_once(day_offset=index * iterations + i)
+                if think_time:
+                    time.sleep(think_time)
+        except Exception as exc:  # reported after the other users finish
+            errors.append(exc)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=virtual_user, args=(i,), name=f"vu-{i}") for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return time.perf_counter() - started
@@ -1,7 +1,146 @@
 # config.py
+import json
 import os
 
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')  # fallback for local dev
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///local.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Engine/pool profile (app/database.py), derived from the URL unless
+    # SQLALCHEMY_ENGINE_OPTIONS is set. Pool per worker process: DB_POOL_SIZE
+    # defaults to WEB_THREADS (request threads per worker) + in-process job
+    # workers. DB_STATEMENT_TIMEOUT_MS is a Postgres server-side limit (0 = none).
+    SQLALCHEMY_ENGINE_OPTIONS = {}
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 1))
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 10))
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+    # Rows per page on the admin dashboard tables (keyset paginated)
+    ADMIN_PAGE_SIZE = int(os.environ.get('ADMIN_PAGE_SIZE', 25))
+
+    # Upload size limits in bytes (413 above these). MAX_CONTENT_LENGTH is the
+    # default for every request; upload routes opt into their own limit.
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 2 * 1024 * 1024))
+    ESTIMATE_PHOTOS_MAX_BYTES = int(os.environ.get('ESTIMATE_PHOTOS_MAX_BYTES', 50 * 1024 * 1024))
+    PROJECT_FILE_MAX_BYTES = int(os.environ.get('PROJECT_FILE_MAX_BYTES', 25 * 1024 * 1024))
+    ESTIMATE_PDF_MAX_BYTES = int(os.environ.get('ESTIMATE_PDF_MAX_BYTES', 10 * 1024 * 1024))
+
+    # WebP quality of the thumbnail/medium derivatives of uploaded photos
+    THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', 80))
+
+    # Background job queue (see app/jobs.py). In-process workers run jobs right
+    # after the request commits; set to 0 when a `flask jobs worker` runs instead.
+    JOBS_IN_PROCESS_WORKERS = int(os.environ.get('JOBS_IN_PROCESS_WORKERS', 2))
+    JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', 4))
+    JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 2))
+    JOBS_VISIBILITY_TIMEOUT = int(os.environ.get('JOBS_VISIBILITY_TIMEOUT', 300))
+    JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 3))
+    JOBS_RETRY_BACKOFF = int(os.environ.get('JOBS_RETRY_BACKOFF', 30))
+
+    # Live project message feed: one connection per page for all its projects.
+    # An SSE stream holds a request thread for up to MESSAGE_STREAM_MAX_SECONDS,
+    # so it is only on by default with gevent workers; otherwise pages poll
+    # every MESSAGE_POLL_INTERVAL seconds, each poll waiting at most
+    # MESSAGE_POLL_WAIT for a new message.
+    MESSAGE_STREAMING = os.environ.get(
+        'MESSAGE_STREAMING', '1' if os.environ.get('WEB_WORKER_CLASS') == 'gevent' else ''
+    ).lower() in ('1', 'true', 'yes')
+    MESSAGE_POLL_WAIT = int(os.environ.get('MESSAGE_POLL_WAIT', 2))
+    MESSAGE_POLL_INTERVAL = int(os.environ.get('MESSAGE_POLL_INTERVAL', 10))
+    MESSAGE_FEED_MAX_PROJECTS = int(os.environ.get('MESSAGE_FEED_MAX_PROJECTS', 50))
+    MESSAGE_STREAM_HEARTBEAT = int(os.environ.get('MESSAGE_STREAM_HEARTBEAT', 15))
+    MESSAGE_STREAM_RESYNC = int(os.environ.get('MESSAGE_STREAM_RESYNC', 60))  # 0 = single worker, never poll
+    MESSAGE_STREAM_MAX_SECONDS = int(os.environ.get('MESSAGE_STREAM_MAX_SECONDS', 300))
+    MESSAGE_STREAM_RETRY_MS = int(os.environ.get('MESSAGE_STREAM_RETRY_MS', 3000))
+    MESSAGE_POLL_MAX_WAIT = int(os.environ.get('MESSAGE_POLL_MAX_WAIT', 25))  # long poll without EventSource
+
+    # Fragment cache for the dashboards: 'memory' (per worker), 'filesystem'
+    # (shared by the workers on one host), 'null', or a dotted backend class path
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'cache'))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL', 300))
+    # Where the invalidation versions live: 'database' (seen by every worker,
+    # job worker and CLI process) or 'cache' (CACHE_BACKEND; single process or
+    # a filesystem cache all processes share)
+    CACHE_VERSIONS = os.environ.get('CACHE_VERSIONS', 'database')
+    # Seconds a process reuses the 'database' versions it read: commits made in
+    # other processes show up after at most this long
+    CACHE_VERSION_TTL = int(os.environ.get('CACHE_VERSION_TTL', 5))
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+
+    # Per-process cache of logged-in user identities (see app/identity.py),
+    # trusted without a database check for USER_CACHE_TTL seconds
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 4096))
+
+    # Service catalog (app/catalog.py): reloaded on the next request after an
+    # edit, and at least every CATALOG_TTL seconds (for CACHE_VERSIONS='cache');
+    # browsers keep the versioned /catalog.json CATALOG_MAX_AGE
+    CATALOG_TTL = int(os.environ.get('CATALOG_TTL', 60))
+    CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 24 * 3600))
+
+    # Crew that performs each service, as JSON {"Service": "Crew"}; services
+    # not listed get their own crew. Used for double-booking checks.
+    SERVICE_CREWS = json.loads(os.environ.get('SERVICE_CREWS', '{}'))
+
+    # Bulk import (`flask data import`, /admin/data): rows per INSERT batch and
+    # commit, and the largest file accepted through the admin page
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 1000))
+    IMPORT_MAX_BYTES = int(os.environ.get('IMPORT_MAX_BYTES', 50 * 1024 * 1024))
+
+    # Generated estimate PDFs (app/estimates.py). ESTIMATE_PRICES is JSON
+    # {"Service": [rate, "sqft" | "job"]} overriding catalog prices
+    ESTIMATE_COMPANY_NAME = os.environ.get('ESTIMATE_COMPANY_NAME', 'MULTTI Construction')
+    ESTIMATE_COMPANY_CONTACT = os.environ.get('ESTIMATE_COMPANY_CONTACT', 'contact@multticonstruction.com')
+    ESTIMATE_VALID_DAYS = int(os.environ.get('ESTIMATE_VALID_DAYS', 30))
+    ESTIMATE_PRICES = json.loads(os.environ.get('ESTIMATE_PRICES', '{}'))
+
+    # JSON API (/api/v1) page sizes for ?limit=
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 25))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 100))
+
+    # Static assets (app/assets.py). Fingerprinted /assets/ URLs are cached for
+    # ASSETS_MAX_AGE seconds. ASSETS_SENDFILE hands file bodies to the front
+    # server: '' (Flask streams them), 'x-sendfile' (Apache/lighttpd) or
+    # 'x-accel-redirect' (nginx; an internal location at ASSETS_ACCEL_PREFIX
+    # aliased to app/static)
+    ASSETS_MAX_AGE = int(os.environ.get('ASSETS_MAX_AGE', 365 * 24 * 3600))
+    ASSETS_SENDFILE = os.environ.get('ASSETS_SENDFILE', '')
+    ASSETS_ACCEL_PREFIX = os.environ.get('ASSETS_ACCEL_PREFIX', '/_static')
+
+    # Jinja: compiled templates shared by the workers through TEMPLATE_CACHE_DIR
+    # ('' disables), all templates compiled at boot with TEMPLATES_PRELOAD (set
+    # by gunicorn.conf.py), and no per-render source checks unless
+    # TEMPLATES_AUTO_RELOAD is set (unset = only in debug)
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'jinja-cache'))
+    TEMPLATES_PRELOAD = os.environ.get('TEMPLATES_PRELOAD', '').lower() in ('1', 'true', 'yes')
+    TEMPLATES_AUTO_RELOAD = {'1': True, 'true': True, '0': False, 'false': False}.get(
+        os.environ.get('TEMPLATES_AUTO_RELOAD', '').lower())
+
+    # Root log level (gunicorn's own loggers are configured separately)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+    # Request instrumentation (app/instrumentation.py), off by default. When on:
+    # latency/SQL/template/upload metrics at /metrics (send METRICS_TOKEN as a
+    # Bearer token; without one only localhost may scrape), a warning for each
+    # query slower than SLOW_QUERY_MS, and cProfile dumps in PROFILE_DIR for
+    # requests sent with "X-Profile: <PROFILE_TOKEN>" or sampled at PROFILE_SAMPLE_RATE
+    INSTRUMENTATION = os.environ.get('INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(os.path.dirname(__file__), 'instance', 'profiles'))
+
+    # Account created/promoted by `flask seed-admin`
+    ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', 'contact@multticonstruction.com')
+    ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD', 'Africa19!')
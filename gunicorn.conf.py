@@ -0,0 +1,71 @@
+# gunicorn.conf.py - read automatically by `gunicorn run:app` from the repo root
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# -------------------
+# Worker model (WEB_WORKER_CLASS)
+# -------------------
+# gthread (default): each worker process serves WEB_THREADS requests at once,
+#   so an upload or a slow query no longer blocks the worker. Message feeds
+#   poll briefly here (MESSAGE_POLL_WAIT) instead of streaming: an SSE stream
+#   would hold one of those few threads for up to MESSAGE_STREAM_MAX_SECONDS.
+#   Everything shared between threads is thread-safe: the DB session is
+#   scoped per app context, uploads are written to a temp file and moved into
+#   place atomically, the message broker, caches and metrics take locks.
+# gevent: same code, cooperative greenlets (pip install gevent; psycogreen
+#   too on Postgres so queries yield). Message feeds stream over SSE here
+#   (MESSAGE_STREAMING), one greenlet per open page. Experimental: not
+#   measured yet, so gthread stays the recommendation. The app is then built
+#   in each worker after gevent has monkey-patched threading (no
+#   preload_app, see below).
+# sync: one request per worker, the old behaviour.
+#
+# Sizing:
+#   workers = CPU cores + 1, capped at available RAM / RSS per worker
+#             (~65 MB here; see the RSS column of `python -m bench.run`)
+#   threads = 1 / (1 - share of a request spent waiting on I/O); e.g. 75%
+#             waiting -> 4. Open pages with a message feed add about
+#             MESSAGE_POLL_WAIT / MESSAGE_POLL_INTERVAL of a thread each
+#   DB connections per worker = threads + JOBS_IN_PROCESS_WORKERS (the
+#             DB_POOL_SIZE default), so workers * (that + DB_MAX_OVERFLOW)
+#             must stay under Postgres' max_connections
+# `python -m bench.serving` compares the modes on this machine; measure
+# gevent there (--modes gthread,gevent) before switching to it.
+
+worker_class = os.environ.get('WEB_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() + 1, 4)))
+threads = int(os.environ.get('WEB_THREADS', 4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.environ.get('WEB_WORKER_CONNECTIONS', 100))  # gevent only
+keepalive = 5
+
+# The app sizes its DB pool from the same number (greenlets share a pool of 10)
+# and picks the message feed transport from the worker class
+os.environ['WEB_WORKER_CLASS'] = worker_class
+os.environ['WEB_THREADS'] = str({'gthread': threads, 'gevent': 10}.get(worker_class, 1))
+
+# ✅ Build the app once in the master and fork the workers from it: templates
+# are compiled before the fork (TEMPLATES_PRELOAD) and every worker starts
+# warm, sharing that memory copy-on-write. Not with gevent: the message
+# broker's Condition, the job thread pools and the engine's pool locks would
+# be created before the worker monkey-patches threading.
+preload_app = worker_class != 'gevent'
+os.environ.setdefault('TEMPLATES_PRELOAD', '1')
+
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()  # psycopg2 waits on the gevent hub instead of blocking it
+        except ImportError:
+            pass
+
+    if not preload_app:
+        return  # the worker builds its own app; the master opened nothing
+
+    # Connections opened in the master must not be shared with the workers
+    from app import db
+    with server.app.wsgi().app_context():  # the app preloaded in the master
+        db.engine.dispose(close=False)
@@ -3,4 +3,12 @@ from app import create_app
 app = create_app()
 
 if __name__ == '__main__':
+    # Local development: bring the schema up to date and make sure the admin exists
+    from app.cli import create_admin_user
+    from app.migrations import upgrade
+
+    with app.app_context():
+        upgrade()
+        create_admin_user()
+
     app.run(debug=True)
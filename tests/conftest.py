@@ -0,0 +1,36 @@
+import os
+import tempfile
+
+import pytest
+
+# Config reads the environment at import time, so this runs before `import app`
+_workdir = tempfile.mkdtemp(prefix='multti-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ['CACHE_BACKEND'] = 'null'          # always render, never serve a cached fragment
+os.environ['JOBS_IN_PROCESS_WORKERS'] = '0'
+os.environ['TEMPLATE_CACHE_DIR'] = ''
+os.environ['ADMIN_EMAIL'], os.environ['ADMIN_PASSWORD'] = 'admin@example.com', 'admin-pass'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app, db
+    from app.cli import create_admin_user
+    from app.migrations import upgrade
+
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with app.app_context():
+        upgrade(echo=lambda message: None)
+        create_admin_user()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def scratch_uploads(app):
+    from app.storage import scratch_storage
+
+    with scratch_storage(app):
+        yield
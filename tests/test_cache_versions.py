@@ -0,0 +1,32 @@
+"""Version tokens are shared between processes: a commit in one worker (or the
+job worker, or a CLI command) invalidates fragments cached by the others."""
+from app import db
+from app.cache import Cache, DatabaseVersions, MemoryBackend, cache
+from app.models import Project, ProjectStatus, User
+
+
+def worker_cache():
+    # What another gunicorn worker has: its own memory backend, shared versions
+    other = Cache()
+    other.backend = MemoryBackend()
+    other.versions = DatabaseVersions()
+    return other
+
+
+def test_bump_in_one_process_invalidates_another(app):
+    first, second = worker_cache(), worker_cache()
+    with app.app_context():
+        assert first.fragment('page', ['admin'], lambda: 'old') == 'old'
+        assert first.fragment('page', ['admin'], lambda: 'new') == 'old'  # cached
+        second.bump('admin')
+        assert first.fragment('page', ['admin'], lambda: 'new') == 'new'
+
+
+def test_commit_bumps_the_shared_version(app):
+    with app.app_context():
+        admin = User.query.filter_by(role='admin').first()
+        before = cache.version('admin')
+        db.session.add(Project(project_number='PROJ-CACHEVER', customer_id=admin.id, project_type='Flooring',
+                               services='Tile', status=ProjectStatus.PENDING_SCHEDULE))
+        db.session.commit()
+        assert worker_cache().version('admin') != before
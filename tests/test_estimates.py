@@ -0,0 +1,35 @@
+"""Issuing an estimate's PDF only moves estimates that are still waiting."""
+import uuid
+
+import pytest
+
+from app import db
+from app.estimates import render_estimate_job
+from app.models import EstimateRequest, EstimateStatus, User
+
+
+def add_estimate(status):
+    admin = User.query.filter_by(role='admin').first()
+    estimate = EstimateRequest(estimate_number=f"EST-{uuid.uuid4().hex[:8].upper()}", customer_id=admin.id,
+                               project_type='Flooring', services='Tile', total_sqft=100, details='test', status=status)
+    db.session.add(estimate)
+    db.session.commit()
+    return estimate.id
+
+
+@pytest.mark.parametrize('status, expected', [
+    (EstimateStatus.WAITING_ESTIMATE, EstimateStatus.ESTIMATE_RECEIVED),
+    (EstimateStatus.ESTIMATE_RECEIVED, EstimateStatus.ESTIMATE_RECEIVED),
+    (EstimateStatus.APPROVED, EstimateStatus.APPROVED),
+    (EstimateStatus.DECLINED, EstimateStatus.DECLINED),
+])
+def test_render_job_keeps_answered_estimates(app, scratch_uploads, status, expected):
+    with app.app_context():
+        estimate_id = add_estimate(status)
+        render_estimate_job(estimate_id)
+        db.session.commit()
+        db.session.expire_all()
+
+        estimate = db.session.get(EstimateRequest, estimate_id)
+        assert estimate.status == expected
+        assert estimate.estimate_pdf  # the PDF is regenerated either way
@@ -0,0 +1,37 @@
+"""A role change made by another process (here `flask seed-admin`) reaches the
+identity cache of this one once the cached identity is due for a check."""
+import os
+import subprocess
+import sys
+
+from werkzeug.security import generate_password_hash
+
+from app import db, identity
+from app.cache import cache
+from app.identity import load_identity
+from app.models import User
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_promotion_from_the_cli_is_seen_by_cached_workers(app, monkeypatch):
+    with app.app_context():
+        user = User(full_name='Promoted', address='1 Test Rd', phone='5550000000', email='promoted@example.com',
+                    password=generate_password_hash('secret1'), role='customer')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    with app.test_request_context():
+        assert load_identity(user_id).role == 'customer'  # now cached in this process
+
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'run', 'seed-admin', '--email', 'promoted@example.com'],
+                   cwd=ROOT, check=True, capture_output=True)
+
+    with app.test_request_context():
+        assert load_identity(user_id).role == 'customer'  # still trusted, no database check
+
+    monkeypatch.setattr(identity, '_trust_for', 0)  # USER_CACHE_TTL has run out
+    cache.versions.memo.clear()  # and so has CACHE_VERSION_TTL
+    with app.test_request_context():
+        assert load_identity(user_id).role == 'admin'
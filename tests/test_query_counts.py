@@ -0,0 +1,138 @@
+"""Each page runs a fixed number of SQL statements, however many projects
+(or messages and uploads) it shows: doubling the data must not add queries."""
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.cache import MemoryBackend, cache
+from app.models import EstimateRequest, Project, ProjectMessage, ProjectStatus, ProjectUpload, User
+from app.queries import assign_services
+
+N = 3
+STATUSES = (ProjectStatus.PENDING_SCHEDULE, ProjectStatus.WAITING_APPROVAL,
+            ProjectStatus.SCHEDULE_APPROVED, ProjectStatus.COMPLETED)
+
+
+@contextmanager
+def count_queries(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def queries_for(app, client, url):
+    assert client.get(url).status_code == 200  # warm per-process caches (identity, templates)
+    with count_queries(app) as statements:
+        assert client.get(url).status_code == 200
+    return len(statements)
+
+
+def login(client, email, password):
+    response = client.post('/login', data={'email': email, 'password': password})
+    assert response.status_code == 302, f"could not log in as {email}"
+    return client
+
+
+def add_customer(app):
+    email = f"customer-{uuid.uuid4().hex[:8]}@example.com"
+    with app.app_context():
+        user = User(full_name='Query Count', address='1 Test Rd', phone='5550000000', email=email,
+                    password=generate_password_hash('secret1'), role='customer')
+        db.session.add(user)
+        db.session.commit()
+        return user.id, email
+
+
+def add_projects(app, customer_id, count, activity=2):
+    """``count`` projects (with estimates, messages and uploads); returns their ids."""
+    ids = []
+    with app.app_context():
+        for i in range(count):
+            tag = uuid.uuid4().hex[:8].upper()
+            estimate = EstimateRequest(estimate_number=f"EST-{tag}", customer_id=customer_id,
+                                       project_type='Flooring', total_sqft=100, details='test')
+            project = Project(project_number=f"PROJ-{tag}", customer_id=customer_id, project_type='Flooring',
+                              total_sqft=100, details='test', status=STATUSES[i % len(STATUSES)])
+            assign_services(estimate, ['Tile', 'Carpet'])
+            assign_services(project, ['Tile', 'Carpet'])
+            db.session.add_all([estimate, project])
+            db.session.flush()
+            add_activity(project.id, activity)
+            ids.append(project.id)
+        db.session.commit()
+    return ids
+
+
+def add_activity(project_id, count):
+    for i in range(count):
+        db.session.add(ProjectMessage(project_id=project_id, sender='admin', content=f"message {i}"))
+        db.session.add(ProjectUpload(project_id=project_id, filename=f"tests/upload-{i}.pdf"))
+
+
+@pytest.fixture
+def customer(app):
+    customer_id, email = add_customer(app)
+    return customer_id, login(app.test_client(), email, 'secret1')
+
+
+@pytest.fixture
+def admin(app):
+    return login(app.test_client(), app.config['ADMIN_EMAIL'], app.config['ADMIN_PASSWORD'])
+
+
+@pytest.mark.parametrize('url', ['/track-projects', '/dashboard'])
+def test_customer_pages(app, customer, url):
+    customer_id, client = customer
+    add_projects(app, customer_id, N)
+    with_n = queries_for(app, client, url)
+    add_projects(app, customer_id, N)
+    assert queries_for(app, client, url) == with_n
+
+
+@pytest.mark.parametrize('url', ['/admin/dashboard', '/admin/projects/manage'])
+def test_admin_listings(app, admin, url):
+    customer_id, _ = add_customer(app)
+    add_projects(app, customer_id, N)
+    with_n = queries_for(app, admin, url)
+    customer_id, _ = add_customer(app)  # a second customer too: names are joined in per row
+    add_projects(app, customer_id, N)
+    assert queries_for(app, admin, url) == with_n
+
+
+def test_view_project_admin(app, admin):
+    customer_id, _ = add_customer(app)
+    project_id, = add_projects(app, customer_id, 1, activity=N)
+    url = f'/admin/project/{project_id}/view'
+    with_n = queries_for(app, admin, url)
+    with app.app_context():
+        add_activity(project_id, N)
+        db.session.commit()
+    assert queries_for(app, admin, url) == with_n
+
+
+def test_warm_authenticated_request(app, customer):
+    # The cached identity is trusted until USER_CACHE_TTL: no user lookup,
+    # not even a cache version check
+    _, client = customer
+    assert queries_for(app, client, '/login') == 0
+
+
+def test_warm_dashboard(app, customer, monkeypatch):
+    # Fragment and version tokens both cached: a repeat load skips the database
+    monkeypatch.setattr(cache, 'backend', MemoryBackend())
+    customer_id, client = customer
+    add_projects(app, customer_id, N)
+    assert queries_for(app, client, '/dashboard') == 0
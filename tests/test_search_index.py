@@ -0,0 +1,24 @@
+"""Deleting a project removes its messages from the search index."""
+from app import db
+from app.models import Project, ProjectMessage, ProjectStatus, User
+from app.search import search
+
+
+def test_deleted_project_messages_leave_the_index(app):
+    with app.app_context():
+        admin = User.query.filter_by(role='admin').first()
+        project = Project(project_number='PROJ-SEARCHDEL', customer_id=admin.id, project_type='Flooring',
+                          services='Tile', status=ProjectStatus.PENDING_SCHEDULE)
+        db.session.add(project)
+        db.session.flush()
+        db.session.add(ProjectMessage(project_id=project.id, sender='admin', content='zanzibar grout colour'))
+        db.session.commit()
+        project_id = project.id
+        assert [r.kind for r in search('zanzibar')[0]] == ['message']
+
+    client = app.test_client()
+    client.post('/login', data={'email': app.config['ADMIN_EMAIL'], 'password': app.config['ADMIN_PASSWORD']})
+    assert client.post(f'/admin/project/{project_id}/delete').status_code == 302
+
+    with app.app_context():
+        assert search('zanzibar')[0] == []